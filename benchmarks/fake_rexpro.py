@@ -0,0 +1,241 @@
+"""
+A local stand-in for a Rexster RexPro server, to benchmark mogwai end to end without Titan.
+
+It speaks the RexPro 1 binary protocol with the msgpack serializer: every message is framed as
+
+    [protocol version: 1 byte][serializer: 1 byte][reserved: 4 bytes][message type: 1 byte][body length: 4 bytes]
+
+followed by the msgpack array of the message. Scripts are answered by a responder, the default `InMemoryGraph`
+keeps the vertices saved by mogwai in memory and answers the scripts used by `Vertex.save` and `Vertex.get`; any
+other script returns the canned response registered for it, or null.
+
+Run it on its own to point another process at it::
+
+    python benchmarks/fake_rexpro.py --port 8184
+
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import itertools
+import os
+import socket
+import struct
+import threading
+
+import msgpack
+from six.moves import socketserver
+
+PROTOCOL_VERSION = 1
+SERIALIZER_MSGPACK = 0
+
+ERROR = 0
+SESSION_REQUEST = 1
+SESSION_RESPONSE = 2
+SCRIPT_REQUEST = 3
+SCRIPT_RESPONSE = 5
+
+_HEADER = struct.Struct(str('!BB4xBI'))
+EMPTY_SESSION = b'\x00' * 16
+
+
+def _unpack(data):
+    # raw strings, the session is made of 16 arbitrary bytes
+    try:
+        return msgpack.unpackb(data, raw=True)
+    except TypeError:  # msgpack < 0.5 returns raw strings by default
+        return msgpack.unpackb(data)
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            return value
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        return dict((_decode(k), _decode(v)) for k, v in value.items())
+    return value
+
+
+def pack_message(message_type, body):
+    """
+    Frame a RexPro message.
+
+    :param message_type: The message type
+    :type message_type: int
+    :param body: The message fields
+    :type body: list
+    :rtype: bytes
+    """
+    data = msgpack.packb(body, use_bin_type=False)
+    return _HEADER.pack(PROTOCOL_VERSION, SERIALIZER_MSGPACK, message_type, len(data)) + data
+
+
+def _read_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_message(sock):
+    """
+    Read one RexPro message.
+
+    :param sock: The socket
+    :type sock: socket.socket
+    :returns: The message type and fields, None when the connection is closed
+    :rtype: tuple | None
+    """
+    header = _read_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    version, serializer, message_type, length = _HEADER.unpack(header)
+    body = _read_exactly(sock, length)
+    if body is None:
+        return None
+    return message_type, _unpack(body)
+
+
+class InMemoryGraph(object):
+    """ Answers the scripts of `Vertex.save` and `Vertex.get`, and canned responses for other scripts """
+
+    features = {'supportsTransactions': True, 'supportsVertexIndex': True, 'supportsEdgeIndex': True}
+
+    def __init__(self, canned=None):
+        """
+        :param canned: Responses by script substring, the first one found in a script is returned
+        :type canned: dict | None
+        """
+        self.canned = dict(canned or {})
+        self.vertices = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _vertex(self, vid):
+        properties = self.vertices.get(vid)
+        if properties is None:
+            return None
+        return {'_id': vid, '_type': 'vertex', '_properties': properties}
+
+    def __call__(self, script, bindings):
+        if 'g.addVertex()' in script and 'attrs' in bindings:
+            return self.save_vertex(bindings)
+        if script.startswith('ids.collect{g.v(it)}'):
+            return [self._vertex(int(vid)) for vid in bindings['ids']]
+        if script == 'g.v(id)':
+            return self._vertex(int(bindings['id']))
+        if 'getFeatures' in script:
+            return self.features
+        for fragment, response in self.canned.items():
+            if fragment in script:
+                return response(script, bindings) if callable(response) else response
+        return None
+
+    def save_vertex(self, bindings):
+        vid = bindings.get('id')
+        with self._lock:
+            if vid is None:
+                vid = next(self._ids)
+                self.vertices[vid] = {}
+            properties = self.vertices[int(vid)]
+            for key, value in bindings['attrs'].items():
+                if value is None:
+                    properties.pop(key, None)
+                else:
+                    properties[key] = value
+        if bindings.get('ack'):
+            fields = bindings.get('fields')
+            return {'id': vid, 'values': dict((f, properties.get(f)) for f in fields) if fields else None}
+        return self._vertex(vid)
+
+
+class RexProHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        responder = self.server.responder
+        while True:
+            message = read_message(self.request)
+            if message is None:
+                return
+            message_type, body = message
+            session = body[0] if body else EMPTY_SESSION
+            if message_type == SESSION_REQUEST:
+                meta = _decode(body[1]) if len(body) > 1 else {}
+                if not meta.get('killSession'):
+                    session = os.urandom(16)
+                response = pack_message(SESSION_RESPONSE, [session, {}, ['groovy']])
+            elif message_type == SCRIPT_REQUEST:
+                script, bindings = _decode(body[3]), _decode(body[4]) or {}
+                try:
+                    results = responder(script, bindings)
+                    response = pack_message(SCRIPT_RESPONSE, [session, {}, results, {}])
+                except Exception as e:
+                    response = pack_message(ERROR, [session, {'flag': 0}, '{}: {}'.format(type(e).__name__, e)])
+            else:
+                error = 'Unsupported message type {}'.format(message_type)
+                response = pack_message(ERROR, [session, {'flag': 0}, error])
+            self.request.sendall(response)
+
+
+class FakeRexProServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """ Serves RexPro connections from a background thread, one thread per connection """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, responder=None):
+        """
+        :param host: The address to listen on
+        :type host: str
+        :param port: The port, 0 for any free port
+        :type port: int
+        :param responder: Returns the results of a script and its bindings, an InMemoryGraph by default
+        :type responder: callable | None
+        """
+        self.responder = responder or InMemoryGraph()
+        socketserver.TCPServer.__init__(self, (host, port), RexProHandler)
+        self.host, self.port = self.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-rexpro')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8184)
+    options = parser.parse_args()
+
+    server = FakeRexProServer(options.host, options.port)
+    print('Serving RexPro on {}:{}'.format(server.host, server.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
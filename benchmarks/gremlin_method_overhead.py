@@ -0,0 +1,81 @@
+"""
+Microbenchmark of the client side overhead of calling a GremlinMethod.
+
+The query is never sent, `connection.execute_query` is replaced by a function returning a canned result, so the
+numbers only cover argument binding, parameter conversion, script assembly and result handling.
+
+Run it on two revisions to compare them::
+
+    python benchmarks/gremlin_method_overhead.py
+    git checkout <other revision> && python benchmarks/gremlin_method_overhead.py
+
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mogwai import connection, gremlin, properties
+from mogwai.models import Vertex
+
+GROOVY = """import com.thinkaurelius.titan.core.TitanGraph;
+
+def get_value(id, value, other) {
+    return value
+}
+
+def get_static(value) {
+    return value
+}
+"""
+
+
+def build_model(groovy_path):
+    class BenchmarkVertex(Vertex):
+        name = properties.String()
+        get_value = gremlin.GremlinValue(path=groovy_path, defaults={'other': lambda: None})
+        get_static = gremlin.GremlinValue(path=groovy_path, classmethod=True)
+
+    return BenchmarkVertex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-n', '--number', type=int, default=100000, help='calls per measurement')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='measurements, the best one is reported')
+    options = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    groovy_path = os.path.join(tmp_dir, 'benchmark.groovy')
+    with open(groovy_path, 'w') as f:
+        f.write(GROOVY)
+
+    execute_query = connection.execute_query
+    connection.execute_query = lambda query, params={}, *args, **kwargs: 1
+    try:
+        model = build_model(groovy_path)
+        vertex = model(_id=1, name='benchmark')
+        bulk_ids = list(range(10000))
+        cases = [
+            ('instance method, positional', lambda: vertex.get_value(5)),
+            ('instance method, keyword', lambda: vertex.get_value(value=5)),
+            ('classmethod', lambda: model.get_static(5)),
+            ('classmethod, 10000 ids', lambda: model.get_static(bulk_ids)),
+        ]
+        for name, func in cases:
+            func()  # parse and set up outside of the measurement
+            number = options.number if 'ids' not in name else max(options.number // 1000, 1)
+            best = min(timeit.repeat(func, number=number, repeat=options.repeat))
+            print('{:<30} {:10.2f} us/call'.format(name, best / number * 1e6))
+    finally:
+        connection.execute_query = execute_query
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Import time benchmark, guards against heavy dependencies creeping back into `import mogwai.models`.
+
+Each measurement runs in a fresh interpreter. The modules listed in HEAVY_MODULES must not be imported by defining
+models, the script exits with an error if they are, or if the median import time exceeds --max-ms::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module mogwai.models --max-ms 400
+
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# only needed by reporters, factories and the groovy parser
+HEAVY_MODULES = ['twisted', 'factory', 'pyformance', 'pyparsing', 'rexpro.connectors']
+
+MEASURE = """
+import json, sys, time
+start = time.time()
+import {module}
+elapsed = time.time() - start
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{'ms': elapsed * 1000, 'heavy': heavy}}))
+"""
+
+
+def measure(module):
+    script = MEASURE.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-m', '--module', default='mogwai.models', help='module to import')
+    parser.add_argument('-r', '--repeat', type=int, default=10, help='number of fresh interpreters')
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if the median import time is higher')
+    options = parser.parse_args()
+
+    results = [measure(options.module) for _ in range(options.repeat)]
+    times = sorted(r['ms'] for r in results)
+    median = times[len(times) // 2]
+    heavy = results[-1]['heavy']
+
+    print('import {}: median {:.1f} ms, min {:.1f} ms, max {:.1f} ms'.format(options.module, median, times[0],
+                                                                              times[-1]))
+    if heavy:
+        print('heavy modules imported: {}'.format(', '.join(heavy)))
+        sys.exit(1)
+    if options.max_ms is not None and median > options.max_ms:
+        print('import time regression: {:.1f} ms > {:.1f} ms'.format(median, options.max_ms))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Microbenchmark of the cost MetricManager.time_calls adds to every query.
+
+`connection.execute_query` is decorated with `time_calls`, this times the same decorator around a function doing
+nothing and reports the added cost per call, without metric reporters and with one reporter (with and without a
+query context).
+
+Run it on two revisions to compare them::
+
+    python benchmarks/metrics_overhead.py
+    git checkout <other revision> && python benchmarks/metrics_overhead.py
+
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mogwai.metrics.base import BaseMetricsReporter
+from mogwai.metrics.manager import MetricManager
+
+
+def execute_query(query, params={}, *args, **kwargs):
+    return None
+
+
+def best_of(func, number, repeat):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-n', '--number', type=int, default=200000, help='calls per measurement')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='measurements, the best one is reported')
+    options = parser.parse_args()
+
+    disabled = MetricManager()
+    enabled = MetricManager()
+    enabled.setup_reporters(BaseMetricsReporter())
+
+    disabled_query = disabled.time_calls(execute_query)
+    enabled_query = enabled.time_calls(execute_query)
+
+    baseline = best_of(lambda: execute_query('g.v(id)', context='vertex.get'), options.number, options.repeat)
+    cases = [
+        ('no reporters', lambda: disabled_query('g.v(id)', context='vertex.get')),
+        ('one reporter', lambda: enabled_query('g.v(id)')),
+        ('one reporter, context', lambda: enabled_query('g.v(id)', context='vertex.get')),
+    ]
+    print('{:<30} {:10.0f} ns/call'.format('undecorated', baseline))
+    for name, func in cases:
+        func()  # resolve the timers outside of the measurement
+        print('{:<30} {:10.0f} ns/call added'.format(name, best_of(func, options.number, options.repeat) - baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+Benchmark suite of the client side of mogwai, run offline against a local RexPro stand-in server.
+
+Covers model construction, deserialization and save parameters, gremlin parameter conversion, Query compilation,
+Groovy parsing, pool acquire/release and end to end queries, save and get through `benchmarks/fake_rexpro.py`.
+The results are written as JSON, and compared against the results of another revision to fail CI on
+regressions::
+
+    python benchmarks/suite.py --output baseline.json
+    git checkout <other revision>
+    python benchmarks/suite.py --output results.json --compare baseline.json --max-regression 0.2
+
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..'))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from mogwai import connection, gremlin, properties
+from mogwai.gremlin import groovy
+from mogwai.models import Vertex, Query, GREATER_THAN
+from mogwai.models.element import Element
+
+from fake_rexpro import FakeRexProServer
+
+RESULTS_FORMAT = 1
+
+# (name, setup) in run order, setup returns the function to time
+BENCHMARKS = []
+
+
+def benchmark(name):
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return decorator
+
+
+class BenchmarkVertex(Vertex):
+    name = properties.String()
+    age = properties.Integer()
+    score = properties.Double()
+    created = properties.DateTime()
+    attributes = properties.Dictionary()
+
+
+def make_vertex():
+    return BenchmarkVertex(name='alice', age=30, score=1.5, created=datetime.datetime(2015, 1, 1),
+                           attributes={'team': 'graph', 'level': 3})
+
+
+class Context(object):
+    """ Resources shared by the benchmarks: a temporary directory and the fake server with a mogwai connection """
+
+    def __init__(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.server = None
+        self._cleanups = []
+
+    def add_cleanup(self, func, *args):
+        """ Call `func` when the benchmarks are done, ie. to restore global state """
+        self._cleanups.append((func, args))
+
+    def connect(self):
+        """ Start the fake server and set up the mogwai connection to it, once """
+        if self.server is None:
+            self.server = FakeRexProServer().start()
+            self.add_cleanup(self._restore_connection, connection._connection_pool, connection.HOST_PARAMS)
+            connection.setup('{}:{}'.format(self.server.host, self.server.port), graph_name='graph', pool_size=4)
+
+    def _restore_connection(self, pool, host_params):
+        connection._connection_pool.close_all()
+        connection._connection_pool = pool
+        connection.HOST_PARAMS = host_params
+
+    def close(self):
+        for func, args in reversed(self._cleanups):
+            func(*args)
+        if self.server is not None:
+            self.server.stop()
+        shutil.rmtree(self.tmp_dir)
+
+
+@benchmark('models.construct')
+def bench_construct(ctx):
+    return make_vertex
+
+
+@benchmark('models.deserialize')
+def bench_deserialize(ctx):
+    vertex = make_vertex()
+    data = {'_id': 1, '_type': 'vertex', '_properties': dict(vertex.as_save_params(),
+                                                             element_type=BenchmarkVertex.get_element_type())}
+    return lambda: Element.deserialize(data)
+
+
+@benchmark('models.as_save_params')
+def bench_as_save_params(ctx):
+    vertex = make_vertex()
+    return vertex.as_save_params
+
+
+@benchmark('gremlin.transform_params_to_database')
+def bench_transform_params(ctx):
+    method = gremlin.GremlinMethod()
+    params = {'id': 1, 'attrs': make_vertex().as_save_params(), 'ids': list(range(100)), 'label': 'knows'}
+    return lambda: method.transform_params_to_database(params)
+
+
+@benchmark('query.compile')
+def bench_query_compile(ctx):
+    vertex = make_vertex()
+    vertex._id = 1
+    query = Query(vertex).labels('knows').has('age', 30, GREATER_THAN).limit(10)
+    return query._get_partial
+
+
+@benchmark('groovy.parse')
+def bench_groovy_parse(ctx):
+    filename = os.path.join(os.path.dirname(os.path.abspath(groovy.__file__)), '..', 'models', 'vertex.groovy')
+    with open(filename) as f:
+        lines = f.read().splitlines()
+    return lambda: groovy._parse_lines(filename, lines)
+
+
+@benchmark('groovy.parse_disk_cached')
+def bench_groovy_parse_cached(ctx):
+    filename = os.path.join(os.path.dirname(os.path.abspath(groovy.__file__)), '..', 'models', 'vertex.groovy')
+    ctx.add_cleanup(groovy.set_cache_dir, groovy._disk_cache_dir)
+    groovy.set_cache_dir(os.path.join(ctx.tmp_dir, 'groovy'))
+    groovy.parse(filename)
+
+    def parse():
+        groovy._parsed_file_cache.pop(filename, None)
+        groovy.parse(filename)
+    return parse
+
+
+@benchmark('pool.acquire_release')
+def bench_pool(ctx):
+    ctx.connect()
+    pool = connection._connection_pool
+
+    def acquire_release():
+        with pool.connection():
+            pass
+    return acquire_release
+
+
+@benchmark('e2e.execute_query')
+def bench_execute_query(ctx):
+    ctx.connect()
+    return lambda: connection.execute_query('g.getFeatures().toMap()', {})
+
+
+@benchmark('e2e.save')
+def bench_save(ctx):
+    ctx.connect()
+    vertex = make_vertex().save()
+    return vertex.save
+
+
+@benchmark('e2e.get')
+def bench_get(ctx):
+    ctx.connect()
+    vid = make_vertex().save()._id
+    return lambda: BenchmarkVertex.get(vid)
+
+
+def measure(func, number, repeat, min_time=0.2):
+    """
+    Time the function, with enough calls per measurement to run for `min_time` seconds unless `number` is given.
+
+    :rtype: dict
+    """
+    timer = timeit.Timer(func)
+    if not number:
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 10 if number < 1000 else 2
+    times = sorted(t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number))
+    return {
+        'ns_per_op': times[0],
+        'median_ns_per_op': times[len(times) // 2],
+        'ops_per_sec': 1e9 / times[0] if times[0] else None,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARKS_DIR,
+                                       stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=None, number=None, repeat=5):
+    """
+    Run the benchmarks whose name contains one of `names`.
+
+    :rtype: dict
+    """
+    with open(os.path.join(BENCHMARKS_DIR, '..', 'mogwai', 'VERSION')) as f:
+        version = f.readline().strip()
+    results = {
+        'format': RESULTS_FORMAT,
+        'created': datetime.datetime.utcnow().isoformat() + 'Z',
+        'mogwai': version,
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'benchmarks': {},
+    }
+    ctx = Context()
+    try:
+        for name, setup in BENCHMARKS:
+            if names and not any(n in name for n in names):
+                continue
+            result = results['benchmarks'][name] = measure(setup(ctx), number, repeat)
+            print('{:<40} {:>14.0f} ns/op'.format(name, result['ns_per_op']))
+    finally:
+        ctx.close()
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """
+    Print the change of each benchmark against the baseline results.
+
+    :returns: The benchmarks slower than the baseline by more than `max_regression` (a fraction)
+    :rtype: list
+    """
+    regressions = []
+    print('\n{:<40} {:>14} {:>14} {:>9}'.format('benchmark', 'baseline ns', 'current ns', 'change'))
+    for name, result in sorted(results['benchmarks'].items()):
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base:
+            continue
+        change = result['ns_per_op'] / base['ns_per_op'] - 1
+        flag = ''
+        if change > max_regression:
+            regressions.append(name)
+            flag = ' REGRESSION'
+        print('{:<40} {:>14.0f} {:>14.0f} {:>+8.1%}{}'.format(name, base['ns_per_op'], result['ns_per_op'], change,
+                                                             flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('benchmarks', nargs='*', help='only run the benchmarks whose name contains one of these')
+    parser.add_argument('-n', '--number', type=int, default=None, help='calls per measurement, calibrated by default')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='measurements, the best one is reported')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of a baseline run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='exit with an error when a benchmark is slower than the baseline by more than this '
+                             'fraction')
+    options = parser.parse_args()
+
+    results = run(options.benchmarks, options.number, options.repeat)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.max_regression)
+        if regressions:
+            print('\nRegressions: {}'.format(', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
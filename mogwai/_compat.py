@@ -1,4 +1,6 @@
 from __future__ import unicode_literals
+from importlib import import_module
+import sys
 import six
 
 PY2 = six.PY2
@@ -31,5 +33,47 @@ with_metaclass = six.with_metaclass
 add_metaclass = six.add_metaclass
 print_ = six.print_
 urllib = six.moves.urllib
+queue = six.moves.queue
 
-get_method_self = six.get_method_self
\ No newline at end of file
+get_method_self = six.get_method_self
+
+
+def intern_string(value):
+    """ Interns the string where possible, Python 2 can only intern byte strings """
+    if isinstance(value, str):
+        return six.moves.intern(value)
+    return value  # pragma: no cover
+
+
+def lazy_attributes(module_globals, attributes):
+    """
+    Defer loading module attributes until their first use, through a module level __getattr__ (PEP 562).
+
+    Pythons without module __getattr__ (before 3.7) load the attributes right away.
+
+    :param module_globals: The globals() of the module
+    :type module_globals: dict
+    :param attributes: Attribute names mapped to their 'module:name' import path, or a function returning the value
+    :type attributes: dict
+
+    """
+    def load(name):
+        loader = attributes[name]
+        if callable(loader):
+            value = loader()
+        else:
+            module, _, attr = loader.partition(':')
+            value = getattr(import_module(module), attr)
+        module_globals[name] = value
+        return value
+
+    def __getattr__(name):
+        if name not in attributes:
+            raise AttributeError("module {!r} has no attribute {!r}".format(module_globals['__name__'], name))
+        return load(name)
+
+    if sys.version_info >= (3, 7):
+        module_globals['__getattr__'] = __getattr__
+    else:  # pragma: no cover
+        for name in attributes:
+            load(name)
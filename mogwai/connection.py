@@ -2,11 +2,14 @@ from __future__ import unicode_literals
 from mogwai._compat import string_types, array_types
 import logging
 from re import compile
-from rexpro.connection import RexProConnection
-from rexpro.utils import get_rexpro
+import time
+import msgpack
 from rexpro.exceptions import RexProConnectionException, RexProScriptException
 from mogwai.exceptions import MogwaiConnectionError, MogwaiQueryError
-from mogwai.metrics.manager import MetricManager
+from mogwai.metrics.manager import (MetricManager, PHASE_ACQUIRE, PHASE_EXECUTE, PAYLOAD_REQUEST,
+                                    PAYLOAD_RESPONSE)
+from mogwai.metrics.pool import instrument_pool_class
+from mogwai.metrics import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +26,7 @@ __cached_spec = None
 
 
 @metric_manager.time_calls
+@tracing.traced('mogwai.query')
 def execute_query(query, params={}, transaction=True, isolate=True, pool=None, *args, **kwargs):
     """
     Execute a raw Gremlin query with the given parameters passed in.
@@ -47,12 +51,49 @@ def execute_query(query, params={}, transaction=True, isolate=True, pool=None, *
     if not connection_pool:  # pragma: no cover
         raise MogwaiConnectionError('Must call mogwai.connection.setup before querying.')
 
+    # phases are only timed when a trace is recording them
+    trace = metric_manager.current_trace()
+    span = tracing.current_span()
+    if trace is not None:
+        trace.script = query
+        trace.params = params
+        start_time = time.time()
     with connection_pool.connection(transaction=transaction) as conn:
+        if trace is not None:
+            trace.host = getattr(conn, 'host', None)
+            trace.port = getattr(conn, 'port', None)
+            metric_manager.record_phase(PHASE_ACQUIRE, start_time)
+            start_time = time.time()
+        if span.recording:
+            span.set_attributes({'host': getattr(conn, 'host', None), 'port': getattr(conn, 'port', None)})
         response = get_response(query, params=params, isolate=isolate, transaction=transaction, connection=conn, connection_pool=connection_pool)
-
+        if trace is not None:
+            metric_manager.record_phase(PHASE_EXECUTE, start_time)
+
+    # payloads are measured for the sampled queries which are recorded, measuring packs them a second time
+    if (trace is not None or span.recording) and metric_manager.sample_payloads():
+        request_size = payload_size(query) + payload_size(params)
+        response_size = payload_size(response)
+        if trace is not None:
+            trace.add_payload(PAYLOAD_REQUEST, request_size)
+            trace.add_payload(PAYLOAD_RESPONSE, response_size)
+        span.set_attributes({PAYLOAD_REQUEST: request_size, PAYLOAD_RESPONSE: response_size})
     return response
 
 
+def payload_size(value):
+    """
+    The number of bytes of a value serialized with msgpack, the RexPro serialization, without the message framing.
+
+    :param value: The query, parameters or response
+    :rtype: int
+    """
+    try:
+        return len(msgpack.packb(value))
+    except Exception:  # pragma: no cover
+        return 0
+
+
 def get_response(query, params, isolate, transaction, connection, connection_pool):
 
     def soft_close_connection(connection_pool, connection):
@@ -96,9 +137,20 @@ def _parse_host(host, username, password, graph_name, graph_obj_name='g'):
 
 
 def setup(host, graph_name='graph', graph_obj_name='g', username='', password='',
-          metric_reporters=None, pool_size=10, concurrency='sync'):
+          metric_reporters=None, pool_size=10, concurrency='sync', preload_gremlin=False, slow_query_log=None,
+          tracer=None, payload_sample_rate=None):
     """  Sets up the connection, and instantiates the models
 
+    :param preload_gremlin: Parse and set up the gremlin methods of all loaded models now instead of on first use
+    :type preload_gremlin: bool
+    :param slow_query_log: Log the queries slower than its threshold
+    :type slow_query_log: mogwai.metrics.slow_query.SlowQueryLog
+    :param tracer: Report spans of model operations, gremlin methods and queries to a tracer
+    :type tracer: mogwai.metrics.tracing.BaseTracer
+    :param payload_sample_rate: Fraction (0 to 1) of the recorded queries whose request and response sizes are
+        measured, 0 (the default) measures none
+    :type payload_sample_rate: float
+
     """
     global _connection_pool
     global SOCKET_TYPE, CONNECTION_TYPE, CONNECTION_POOL_TYPE, HOST_PARAMS
@@ -106,22 +158,34 @@ def setup(host, graph_name='graph', graph_obj_name='g', username='', password=''
 
     if metric_reporters:  # pragma: no cover
         metric_manager.setup_reporters(metric_reporters)
-
+    if slow_query_log is not None and slow_query_log not in metric_manager.trace_listeners:
+        metric_manager.add_trace_listener(slow_query_log)
+    if tracer is not None:
+        tracing.set_tracer(tracer, concurrency=concurrency)
+    if payload_sample_rate is not None:
+        metric_manager.payload_sample_rate = payload_sample_rate
+
+    # the rexpro connectors are imported when the connection is set up
+    from rexpro.utils import get_rexpro
     sock, conn, pool = get_rexpro(stype=concurrency)
     # store for reference
     SOCKET_TYPE = sock
     CONNECTION_TYPE = conn
-    CONNECTION_POOL_TYPE = pool
+    CONNECTION_POOL_TYPE = instrument_pool_class(pool)
     HOST_PARAMS = _parse_host(host, username, password, graph_name, graph_obj_name)
 
     if isinstance(host, string_types):
-        _connection_pool = pool(pool_size=pool_size, **HOST_PARAMS)
+        _connection_pool = create_pool(pool_size=pool_size)
 
     else:  # pragma: no cover
         raise MogwaiConnectionError("Must Specify at least one host or list of hosts: host: {}, graph_name: {}".format(
             host, graph_name)
         )
 
+    if preload_gremlin:
+        from mogwai.gremlin import preload_gremlin_methods
+        preload_gremlin_methods()
+
 
 def _add_model_to_space(model):
     global _loaded_models
@@ -201,11 +265,38 @@ def sync_spec(filename, host, graph_name='graph', graph_obj_name='g', username='
     :returns: None
 
     """
+    from rexpro.connection import RexProConnection
     conn = RexProConnection(graph_name=graph_name, **_parse_host(host, username, password, graph_name, graph_obj_name))
     #Spec(filename).sync(conn, dry_run=dry_run)
     pass
 
 
+def create_pool(pool_name='default', **kwargs):
+    """ Create a connection pool to the configured host, instrumented with the pool telemetry
+
+    :param pool_name: The name of the pool in its metrics
+    :type pool_name: str
+    :param kwargs: The arguments to the pool, ie. pool_size and with_session
+    :rtype: RexProConnectionPool
+    """
+    if CONNECTION_POOL_TYPE is None:  # pragma: no cover
+        raise MogwaiConnectionError('Must call mogwai.connection.setup before creating pools.')
+    params = dict(HOST_PARAMS)
+    params.update(kwargs)
+    # setup stores the instrumented pool class
+    return CONNECTION_POOL_TYPE(pool_name=pool_name, **params)
+
+
+def pool_stats():
+    """ Snapshot of the telemetry of the default connection pool, see InstrumentedPoolMixin.stats
+
+    :rtype: dict | None
+    """
+    if _connection_pool is None:
+        return None
+    return _connection_pool.stats()
+
+
 def pop_execute_query_kwargs(keyword_arguments):
     """ pop the optional execute query arguments from arbitrary kwargs;
         return non-None query kwargs in a dict
@@ -1,17 +1,188 @@
 import inspect
 import os.path
+import time
 from datetime import datetime
 from decimal import Decimal as _Decimal
 from uuid import UUID as _UUID
 import logging
-from mogwai._compat import array_types, string_types, integer_types, float_types, iteritems
+from mogwai._compat import array_types, string_types, integer_types, float_types, bool_types, binary_types, \
+    text_type, iteritems
 from mogwai import connection
 from mogwai.exceptions import MogwaiQueryError, MogwaiGremlinException
-from .groovy import parse, GroovyImport
+from mogwai.metrics.manager import PHASE_DESERIALIZE
+from mogwai.metrics import tracing
+from .groovy import parse, get_function, GroovyImport
 from .table import Table, Row
 
 logger = logging.getLogger(__name__)
 
+# types that are sent to rexpro as they are
+PRIMITIVE_PARAM_TYPES = frozenset((text_type, str, type(None)) + binary_types + integer_types + float_types +
+                                  bool_types)
+
+# names used by the script of GremlinMethod.map
+MAP_FUNCTION = '_mogwai_function'
+MAP_PARAMS = '_mogwai_params'
+
+# user registered converters, by type
+_param_converters = {}
+
+# the resolved converter of each concrete type seen, None for values sent as they are
+_resolved_converters = dict.fromkeys(PRIMITIVE_PARAM_TYPES)
+
+
+def register_param_converter(value_type, converter):
+    """
+    Register how values of a type (and its subclasses) are converted before being sent to rexpro as a gremlin
+    method parameter.
+
+    :param value_type: The type of the values to convert
+    :type value_type: type
+    :param converter: Function taking a value and returning its database representation
+    :type converter: callable
+
+    """
+    _param_converters[value_type] = converter
+    _reset_resolved_converters()
+
+
+def unregister_param_converter(value_type):
+    """
+    Remove the converter registered for a type with `register_param_converter`.
+
+    :param value_type: The type of the values converted
+    :type value_type: type
+
+    """
+    _param_converters.pop(value_type, None)
+    _reset_resolved_converters()
+
+
+def _reset_resolved_converters():
+    _resolved_converters.clear()
+    _resolved_converters.update(dict.fromkeys(PRIMITIVE_PARAM_TYPES))
+
+
+def _convert_dict(params):
+    return {k: _convert_param(v) for k, v in iteritems(params)}
+
+
+def _convert_array(params):
+    # arrays of primitives (bulk ids) don't need to be converted one by one
+    for param in params:
+        if type(param) not in PRIMITIVE_PARAM_TYPES:
+            return [_convert_param(x) for x in params]
+    return list(params)
+
+
+def _convert_element(param):
+    return param._id
+
+
+def _convert_class(param):
+    from mogwai.models import Edge, Vertex
+    if issubclass(param, Edge):
+        return param.label
+    if issubclass(param, Vertex):
+        return param.element_type
+    return param
+
+
+def _resolve_converter(value_type):
+    """
+    Find the converter for values of the given type.
+
+    :param value_type: The concrete type of a parameter
+    :type value_type: type
+    :rtype: callable | None
+
+    """
+    from mogwai.models.element import BaseElement
+    from mogwai.properties import DateTime, Decimal, UUID
+
+    for base in inspect.getmro(value_type):
+        if base in _param_converters:
+            return _param_converters[base]
+    if issubclass(value_type, dict):
+        return _convert_dict
+    if issubclass(value_type, array_types):
+        return _convert_array
+    if issubclass(value_type, BaseElement):
+        return _convert_element
+    if issubclass(value_type, type):
+        return _convert_class
+    if issubclass(value_type, datetime):
+        return DateTime().to_database
+    if issubclass(value_type, _UUID):
+        return UUID().to_database
+    if issubclass(value_type, _Decimal):
+        return Decimal().to_database
+    return None
+
+
+def _convert_param(param):
+    """
+    Translate a parameter into its database representation, the converter is resolved once per concrete type.
+
+    :param param: The parameter to be sent to the function
+    :rtype: mixed
+
+    """
+    value_type = type(param)
+    try:
+        converter = _resolved_converters[value_type]
+    except KeyError:
+        converter = _resolved_converters[value_type] = _resolve_converter(value_type)
+    if converter is None:
+        return param
+    return converter(param)
+
+
+def deserialize_result(obj):
+    """
+    Deserializes the vertices and edges in a result returned from rexster.
+
+    Scalars and lists of scalars are returned untouched, nested results are walked iteratively (no recursion limit)
+    and their lists and maps are updated in place.
+
+    :param obj: The raw result returned from rexster
+    :type obj: object
+    :rtype: object
+
+    """
+    value_type = type(obj)
+    if value_type in PRIMITIVE_PARAM_TYPES:
+        return obj
+    if value_type is list:
+        for value in obj:
+            if type(value) not in PRIMITIVE_PARAM_TYPES:
+                break
+        else:
+            return obj
+
+    from mogwai.models.element import Element
+
+    root = [obj]
+    pending = [(root, 0)]
+    while pending:
+        container, key = pending.pop()
+        value = container[key]
+        if isinstance(value, dict):
+            if '_id' in value and '_type' in value:
+                container[key] = Element.deserialize(value)
+                continue
+            items = iteritems(value)
+        elif isinstance(value, array_types):
+            if not isinstance(value, list):
+                value = container[key] = list(value)
+            items = enumerate(value)
+        else:
+            continue
+        for k, v in items:
+            if type(v) not in PRIMITIVE_PARAM_TYPES:
+                pending.append((value, k))
+    return root[0]
+
 
 class BaseGremlinMethod(object):
     """ Maps a function in a groovy file to a method on a python class """
@@ -23,7 +194,9 @@ class BaseGremlinMethod(object):
                  property=False,
                  defaults=None,
                  transaction=True,
-                 imports=None):
+                 imports=None,
+                 raw=False,
+                 helpers=None):
         """
         Initialize the gremlin method and define how it is attached to class.
 
@@ -42,6 +215,12 @@ class BaseGremlinMethod(object):
         :type transaction: bool
         :param imports: Additional imports to include when calling the GremlinMethod
         :type imports: list | tuple | str
+        :param raw: Return the raw result maps instead of hydrating vertices and edges (can be overridden per call
+                    with a `raw` keyword, unless the groovy function has an argument of that name)
+        :type raw: bool
+        :param helpers: Functions of other groovy files the function calls, as (path, function name) pairs with the
+                        path relative to the file the class is defined in. They are defined in the script.
+        :type helpers: list
 
         """
         self.is_configured = False
@@ -52,6 +231,7 @@ class BaseGremlinMethod(object):
         self.property = property
         self.defaults = defaults or {}
         self.transaction = transaction
+        self.raw = raw
 
         # function
         self.attr_name = None
@@ -65,10 +245,20 @@ class BaseGremlinMethod(object):
         if isinstance(imports, (str, string_types)):
             imports = [imports, ]
         self.extra_imports = imports
+        self.helpers = helpers or []
 
         #configuring attributes
         self.parent_class = None
 
+        # precomputed in _setup
+        self.script = None
+        self.map_script = None
+        self.import_string = None
+        self._arg_positions = {}
+        self._static_defaults = {}
+        self._callable_defaults = []
+        self._metric_contexts = {}
+
     def configure_method(self, klass, attr_name, gremlin_path):
         """
         Sets up the methods internals
@@ -102,26 +292,22 @@ class BaseGremlinMethod(object):
             default_path = (name_func() if name_func else 'gremlin') + '.groovy'
 
             self.path = self.path or default_path
-            if self.path.startswith('/'):
-                path = self.path  # pragma: no cover
-            else:
-                path = inspect.getfile(self.parent_class)
-                path = os.path.split(path)[0]
-                path += '/' + self.path
+            path = self._get_path(self.path)
 
             #TODO: make this less naive
-            gremlin_obj = None
             file_def = parse(path)
-
-            # Functions
-            for grem_func in file_def.functions:
-                if grem_func.name == self.method_name:
-                    gremlin_obj = grem_func
-                    break
-
+            gremlin_obj = get_function(path, self.method_name)
             if gremlin_obj is None:
                 raise MogwaiGremlinException("The method '%s' wasn't found in %s" % (self.method_name, path))
 
+            helper_defs = []
+            for helper_path, helper_name in self.helpers:
+                helper_path = self._get_path(helper_path)
+                helper = get_function(helper_path, helper_name)
+                if helper is None:
+                    raise MogwaiGremlinException("The method '%s' wasn't found in %s" % (helper_name, helper_path))
+                helper_defs.append(helper.defn)
+
             for arg in gremlin_obj.args:
                 if arg in self.arg_list:
                     raise MogwaiGremlinException("'%s' defined more than once in gremlin method arguments" % arg)
@@ -137,8 +323,55 @@ class BaseGremlinMethod(object):
                 extra_imports.append(GroovyImport([], [extra_import], ['import {};'.format(extra_import)]))
             self.extra_imports = extra_imports
 
+            # everything that doesn't change between calls is computed once
+            import_list = []
+            for imp in self.imports + self.extra_imports:
+                if imp is not None:
+                    import_list.extend(imp.import_list)
+            self.import_string = '\n'.join(import_list)
+            self.script = '\n'.join([self.import_string] + helper_defs + [self.function_body])
+
+            # the function body as a closure, called for each row of arguments by map
+            self.map_script = '\n'.join([self.import_string] + helper_defs +
+                                         ['def {} = {{ {} ->'.format(MAP_FUNCTION, ', '.join(self.arg_list)),
+                                          self.function_body,
+                                          '}',
+                                          '{}.collect{{ {}.call(it as Object[]) }}'.format(MAP_PARAMS, MAP_FUNCTION)])
+
+            self._arg_positions = {arg: i for i, arg in enumerate(self.arg_list)}
+            self._static_defaults = {k: v for k, v in self.defaults.items() if not callable(v)}
+            self._callable_defaults = [(k, v) for k, v in self.defaults.items() if callable(v)]
+
             self.is_setup = True
 
+    def _get_path(self, path):
+        """ The path of a groovy file, relative paths start at the file the class is defined in """
+        if path.startswith('/'):
+            return path  # pragma: no cover
+        return os.path.split(inspect.getfile(self.parent_class))[0] + '/' + path
+
+    def _get_metric_context(self, instance):
+        """
+        The metrics context of a call, cached per class since inherited methods are shared between models.
+
+        :param instance: The class or class instance the method was called on
+        :type instance: object
+        :rtype: str
+
+        """
+        klass = instance if inspect.isclass(instance) else type(instance)
+        context = self._metric_contexts.get(klass)
+        if context is None:
+            if hasattr(klass, 'get_element_type'):
+                context = "vertices.{}".format(klass.get_element_type())
+            elif hasattr(klass, 'get_label'):
+                context = "edges.{}".format(klass.get_label())
+            else:
+                context = "other"
+            context = "{}.{}".format(context, self.method_name)
+            self._metric_contexts[klass] = context
+        return context
+
     def __call__(self, instance, *args, **kwargs):
         """
         Intercept attempts to call the GremlinMethod attribute and perform a gremlin query returning the results.
@@ -149,104 +382,161 @@ class BaseGremlinMethod(object):
 
         """
         self._setup()
+        raw = self._pop_raw(kwargs)
 
         # pop the optional execute query arguments from kwargs
         query_kwargs = connection.pop_execute_query_kwargs(kwargs)
         query_kwargs['transaction'] = query_kwargs.get('transaction') or self.transaction
 
-        args = list(args)
         if not self.classmethod:
-            args = [instance._id] + args
+            args = (instance._id, ) + args
 
-        params = self.defaults.copy()
-        if len(args + list(kwargs.values())) > len(self.arg_list):  # pragma: no cover
+        params = self._bind_params(args, kwargs)
+        return self._run(self.script, params, self._get_metric_context(instance), query_kwargs, raw)
+
+    def map(self, instances, *args, **kwargs):
+        """
+        Run the method for many instances in a single query, the results are returned in order.
+
+        Each instance (the arguments for classmethods) is passed as the first argument of the function, followed by
+        the shared arguments. A tuple is unpacked into the first arguments: `(vertex, 3)` calls the function with
+        vertex and 3 before the shared arguments. The groovy function body runs once per instance on the server.
+
+        :param instances: The instances, values or argument tuples to run the method for
+        :type instances: list
+        :param pool: The RexPro connection pool to execute the query with (optional)
+        :rtype: list
+
+        """
+        self._setup()
+        raw = self._pop_raw(kwargs)
+
+        query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        query_kwargs['transaction'] = query_kwargs.get('transaction') or self.transaction
+
+        rows = []
+        caller = self.parent_class
+        for item in instances:
+            item_args = tuple(item) if isinstance(item, tuple) else (item, )
+            if not rows and not self.classmethod:
+                caller = item_args[0]
+            params = self._bind_params(item_args + args, dict(kwargs))
+            rows.append([params.get(arg) for arg in self.arg_list])
+        if not rows:
+            return []
+
+        context = "{}.map".format(self._get_metric_context(caller))
+        return self._run(self.map_script, {MAP_PARAMS: rows}, context, query_kwargs, raw, mapped=True)
+
+    def _bind_params(self, args, kwargs):
+        """
+        Bind the positional and keyword arguments of a call to the groovy function arguments.
+
+        :param args: The positional arguments, including the id for instance methods
+        :type args: tuple
+        :param kwargs: The keyword arguments
+        :type kwargs: dict
+        :returns: The parameters, translated for sending over rexpro
+        :rtype: dict
+
+        """
+        if len(args) + len(kwargs) > len(self.arg_list):  # pragma: no cover
             raise TypeError('%s() takes %s args, %s given' % (self.attr_name, len(self.arg_list), len(args)))
 
-        #check for and calculate callable defaults
-        for k, v in params.items():
-            if callable(v):
-                params[k] = v()
+        params = self._static_defaults.copy()
 
-        arglist = self.arg_list[:]
-        for arg in args:
-            params[arglist.pop(0)] = arg
+        #calculate callable defaults
+        for k, v in self._callable_defaults:
+            params[k] = v()
+
+        params.update(zip(self.arg_list, args))
 
         for k, v in kwargs.items():
-            if k not in arglist:
+            position = self._arg_positions.get(k)
+            if position is None or position < len(args):
                 an = self.attr_name
                 if k in params:  # pragma: no cover
                     raise TypeError("%s() got multiple values for keyword argument '%s'" % (an, k))
                 else:  # pragma: no cover
                     raise TypeError("%s() got an unexpected keyword argument '%s'" % (an, k))
-            arglist.pop(arglist.index(k))
             params[k] = v
 
-        params = self.transform_params_to_database(params)
-
-        import_list = []
-        for imp in self.imports + self.extra_imports:
-            if imp is not None:
-                for import_string in imp.import_list:
-                    import_list.append(import_string)
-        import_string = '\n'.join(import_list)
+        return self.transform_params_to_database(params)
 
-        script = '\n'.join([import_string, self.function_body])
+    def _run(self, script, params, context, query_kwargs, raw, mapped=False):
+        """
+        Execute the script and handle its result (the list of results of a mapped call), recording the time spent in
+        each phase when metrics are enabled.
 
+        """
+        metric_manager = connection.metric_manager
+        trace = metric_manager.start_trace(context)
         try:
-            if hasattr(instance, 'get_element_type'):
-                context = "vertices.{}".format(instance.get_element_type())
-            elif hasattr(instance, 'get_label'):
-                context = "edges.{}".format(instance.get_label())
-            else:
-                context = "other"
-
-            context = "{}.{}".format(context, self.method_name)
+            with tracing.span('mogwai.gremlin') as span:
+                if span.recording:
+                    span.set_attributes({'method': context or self.method_name, 'mapped': mapped})
+                results = self._execute(script, params, context, query_kwargs)
+                start_time = time.time() if trace is not None else None
+                if mapped:
+                    results = [self._handle_result(result, raw) for result in results]
+                else:
+                    results = self._handle_result(results, raw)
+                if trace is not None:
+                    metric_manager.record_phase(PHASE_DESERIALIZE, start_time)
+                if span.recording and isinstance(results, array_types):
+                    span.set_attribute('result_count', len(results))
+                return results
+        finally:
+            metric_manager.finish_trace(trace)
+
+    def _execute(self, script, params, context, query_kwargs):
+        """
+        Execute the script, wrapping query errors with the method details.
 
-            tmp = connection.execute_query(script, params, context=context, **query_kwargs)
+        """
+        try:
+            return connection.execute_query(script, params, context=context, **query_kwargs)
         except MogwaiQueryError as pqe:  # pragma: no cover
             import pprint
             msg = "Error while executing Gremlin method\n\n"
             msg += "[Method]\n{}\n\n".format(self.method_name)
             msg += "[Params]\n{}\n\n".format(pprint.pformat(params))
             msg += "[Function Body]\n{}\n".format(self.function_body)
-            msg += "[Imports]\n{}\n".format(import_string)
+            msg += "[Imports]\n{}\n".format(self.import_string)
             msg += "\n[Error]\n{}\n".format(pqe)
             if hasattr(pqe, 'raw_response'):
                 msg += "\n[Raw Response]\n{}\n".format(pqe.raw_response)
             raise MogwaiGremlinException(msg)
-        return tmp
+
+    def _pop_raw(self, kwargs):
+        """
+        Pop the per call `raw` option, unless the groovy function has an argument of that name.
+
+        :rtype: bool
+
+        """
+        if 'raw' in kwargs and 'raw' not in self._arg_positions:
+            return kwargs.pop('raw')
+        return self.raw
+
+    def _handle_result(self, results, raw):
+        """
+        Turn the result of one function call into the return value.
+
+        """
+        return results
 
     def transform_params_to_database(self, params):
         """
         Takes a dictionary of parameters and recursively translates them into parameters appropriate for sending over
-        Rexpro.
+        Rexpro. Converters for other types can be added with `register_param_converter`.
 
         :param params: The parameters to be sent to the function
         :type params: dict
         :rtype: dict
 
         """
-        from mogwai.models.element import BaseElement
-        from mogwai.models import Edge, Vertex
-        from mogwai.properties import DateTime, Decimal, UUID
-
-        if isinstance(params, dict):
-            return {k: self.transform_params_to_database(v) for k, v in iteritems(params)}
-        if isinstance(params, array_types):
-            return [self.transform_params_to_database(x) for x in params]
-        if isinstance(params, BaseElement):
-            return params._id
-        if inspect.isclass(params) and issubclass(params, Edge):
-            return params.label
-        if inspect.isclass(params) and issubclass(params, Vertex):
-            return params.element_type
-        if isinstance(params, datetime):
-            return DateTime().to_database(params)
-        if isinstance(params, _UUID):
-            return UUID().to_database(params)
-        if isinstance(params, _Decimal):
-            return Decimal().to_database(params)
-        return params
+        return _convert_param(params)
 
 
 class GremlinMethod(BaseGremlinMethod):
@@ -255,33 +545,25 @@ class GremlinMethod(BaseGremlinMethod):
     @staticmethod
     def _deserialize(obj):
         """
-        Recursively deserializes elements returned from rexster
+        Deserializes elements returned from rexster
 
         :param obj: The raw result returned from rexster
         :type obj: object
 
         """
-        from mogwai.models.element import Element
+        return deserialize_result(obj)
 
-        if isinstance(obj, dict) and '_id' in obj and '_type' in obj:
-            return Element.deserialize(obj)
-        elif isinstance(obj, dict):
-            return {k: GremlinMethod._deserialize(v) for k, v in obj.items()}
-        elif isinstance(obj, array_types):
-            return [GremlinMethod._deserialize(v) for v in obj]
-        else:
-            return obj
-
-    def __call__(self, instance, *args, **kwargs):
-        results = super(GremlinMethod, self).__call__(instance, *args, **kwargs)
-        return GremlinMethod._deserialize(results)
+    def _handle_result(self, results, raw):
+        if raw:
+            return results
+        return deserialize_result(results)
 
 
 class GremlinValue(GremlinMethod):
     """Gremlin Method that returns one value"""
 
-    def __call__(self, instance, *args, **kwargs):
-        results = super(GremlinValue, self).__call__(instance, *args, **kwargs)
+    def _handle_result(self, results, raw):
+        results = super(GremlinValue, self)._handle_result(results, raw)
 
         if results is None:  # pragma: no cover
             return
@@ -305,8 +587,32 @@ class GremlinValue(GremlinMethod):
 class GremlinTable(GremlinMethod):  # pragma: no cover
     """Gremlin method that returns a table as its result"""
 
-    def __call__(self, instance, *args, **kwargs):
-        results = super(GremlinTable, self).__call__(instance, *args, **kwargs)
+    def _handle_result(self, results, raw):
+        results = super(GremlinTable, self)._handle_result(results, raw)
         if results is None or (isinstance(results, array_types) and len(results) != 1):
             return
         return Table(results[0])
+
+
+def preload_gremlin_methods(models=None):
+    """
+    Parse the groovy files and set up the gremlin methods of the given models ahead of time, so no query pays for it.
+
+    Call this at import time, or in each worker after forking, once the models have been defined.
+
+    :param models: The models to set up (defaults to every loaded Vertex and Edge model)
+    :type models: list
+    :returns: The number of gremlin methods set up
+    :rtype: int
+
+    """
+    if models is None:
+        models = connection._loaded_models
+
+    count = 0
+    for model in models:
+        for method in getattr(model, '_gremlin_methods', {}).values():
+            if method.is_configured and not method.is_setup:
+                method._setup()
+                count += 1
+    return count
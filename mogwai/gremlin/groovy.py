@@ -1,10 +1,21 @@
 import collections
-import pyparsing
+import hashlib
+import json
+import logging
+import os
 import re
+import tempfile
 
+logger = logging.getLogger(__name__)
 
 # Cache of parsed files
 _parsed_file_cache = {}
+
+# On-disk cache of parsed files, shared between processes. Bump the version when the parse results change.
+_DISK_CACHE_VERSION = 1
+_disk_cache_dir = os.environ.get('MOGWAI_GROOVY_CACHE',
+                                 os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+                                              'mogwai', 'groovy'))
 GroovyImport = collections.namedtuple('GroovyImport', ['comment_list', 'import_strings', 'import_list'])
 GroovyFunction = collections.namedtuple('GroovyFunction', ['name', 'args', 'body', 'defn'])
 GroovyFileDef = collections.namedtuple('GroovyFileDefinition', ['functions', 'imports', 'filename'])
@@ -16,11 +27,18 @@ class GroovyFunctionParser(object):
     information regarding it.
     """
 
-    # Simple Groovy sub-grammar definitions
-    KeywordDef = pyparsing.Keyword('def')
-    VarName = pyparsing.Regex(r'[A-Za-z_]\w*')
-    FuncName = VarName
-    FuncDefn = KeywordDef + FuncName + "(" + pyparsing.delimitedList(VarName) + ")" + "{"
+    # Simple Groovy sub-grammar definition, built on first use so pyparsing is only imported when parsing
+    FuncDefn = None
+
+    @classmethod
+    def _get_grammar(cls):
+        if cls.FuncDefn is None:
+            import pyparsing
+            KeywordDef = pyparsing.Keyword('def')
+            VarName = pyparsing.Regex(r'[A-Za-z_]\w*')
+            FuncName = VarName
+            cls.FuncDefn = KeywordDef + FuncName + "(" + pyparsing.delimitedList(VarName) + ")" + "{"
+        return cls.FuncDefn
 
     @classmethod
     def parse(cls, data):
@@ -32,9 +50,10 @@ class GroovyFunctionParser(object):
         :rtype: dict
 
         """
+        grammar = cls._get_grammar()
         try:
             # Parse the function here
-            result = cls.FuncDefn.parseString(data)
+            result = grammar.parseString(data)
             result_list = result.asList()
             args = result_list[3:result_list.index(')')]
             # Return single line or multi-line function body
@@ -52,18 +71,24 @@ class GroovyImportParser(object):
     information regarding it.
     """
 
-    # Simple Groovy sub-grammar definitions
-    ImportDef = pyparsing.Suppress(pyparsing.Keyword('import'))
-    ImportVarName = pyparsing.Regex(r'[A-Za-z_.\*]*')
-    CommentVar = pyparsing.Word(pyparsing.alphas, pyparsing.alphanums).setName('comment')
-    OptionalSpace = pyparsing.Optional(' ')
-    ImportDefn = ImportDef + \
-                 pyparsing.delimitedList(ImportVarName, delim='.').setResultsName('imports') + \
-                 pyparsing.Suppress(";") + \
-                 pyparsing.Optional(
-                     pyparsing.Suppress('//') +
-                     pyparsing.delimitedList(CommentVar, delim=pyparsing.Empty()).setResultsName('comment')
-                 )
+    # Simple Groovy sub-grammar definition, built on first use so pyparsing is only imported when parsing
+    ImportDefn = None
+
+    @classmethod
+    def _get_grammar(cls):
+        if cls.ImportDefn is None:
+            import pyparsing
+            ImportDef = pyparsing.Suppress(pyparsing.Keyword('import'))
+            ImportVarName = pyparsing.Regex(r'[A-Za-z_.\*]*')
+            CommentVar = pyparsing.Word(pyparsing.alphas, pyparsing.alphanums).setName('comment')
+            cls.ImportDefn = ImportDef + \
+                pyparsing.delimitedList(ImportVarName, delim='.').setResultsName('imports') + \
+                pyparsing.Suppress(";") + \
+                pyparsing.Optional(
+                    pyparsing.Suppress('//') +
+                    pyparsing.delimitedList(CommentVar, delim=pyparsing.Empty()).setResultsName('comment')
+                )
+        return cls.ImportDefn
 
     @classmethod
     def parse(cls, data):
@@ -75,9 +100,10 @@ class GroovyImportParser(object):
         :rtype: dict
 
         """
+        grammar = cls._get_grammar()
         try:
             # Parse the function here
-            result = cls.ImportDefn.parseString(data)
+            result = grammar.parseString(data)
             package_list = []
             if 'imports' in result:
                 package_list = result['imports'].asList()
@@ -93,11 +119,109 @@ class GroovyImportParser(object):
             return None
 
 
+def set_cache_dir(path):
+    """
+    Set the directory parsed Groovy files are cached in between processes.
+
+    Defaults to the `MOGWAI_GROOVY_CACHE` environment variable, or ~/.cache/mogwai/groovy. An empty path or None
+    disables the on-disk cache.
+
+    :param path: The cache directory
+    :type path: str | None
+
+    """
+    global _disk_cache_dir
+    _disk_cache_dir = path or None
+
+
+def _get_cache_filename(filename):
+    """
+    The on-disk cache entry for the given groovy file, or None when the on-disk cache is disabled.
+
+    :param filename: The groovy file
+    :type filename: str
+    :rtype: str | None
+
+    """
+    if not _disk_cache_dir:
+        return None
+    key = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()
+    return os.path.join(_disk_cache_dir, '{}.json'.format(key))
+
+
+def _load_cached(filename, mtime, digest):
+    """
+    Load the parse results of the given file from the on-disk cache.
+
+    :param filename: The groovy file
+    :type filename: str
+    :param mtime: The modification time of the groovy file
+    :type mtime: float
+    :param digest: The sha1 of the groovy file contents
+    :type digest: str
+    :rtype: GroovyFileDef | None
+
+    """
+    cache_filename = _get_cache_filename(filename)
+    if cache_filename is None or not os.path.exists(cache_filename):
+        return None
+    try:
+        with open(cache_filename, 'r') as f:
+            entry = json.load(f)
+        if (entry['version'], entry['path'], entry['mtime'], entry['sha1']) != \
+                (_DISK_CACHE_VERSION, os.path.abspath(filename), mtime, digest):
+            return None
+        functions = [GroovyFunction(*fn) if fn is not None else None for fn in entry['functions']]
+        imports = [GroovyImport(*im) if im is not None else None for im in entry['imports']]
+    except (IOError, OSError, ValueError, KeyError, TypeError) as ex:
+        logger.debug("Ignoring unreadable groovy cache entry %s: %s", cache_filename, ex)
+        return None
+    return GroovyFileDef(functions, imports, filename)
+
+
+def _store_cached(filename, mtime, digest, file_def):
+    """
+    Write the parse results of the given file to the on-disk cache, failures are logged and ignored.
+
+    :param filename: The groovy file
+    :type filename: str
+    :param mtime: The modification time of the groovy file
+    :type mtime: float
+    :param digest: The sha1 of the groovy file contents
+    :type digest: str
+    :param file_def: The parse results
+    :type file_def: GroovyFileDef
+
+    """
+    cache_filename = _get_cache_filename(filename)
+    if cache_filename is None:
+        return
+    entry = {'version': _DISK_CACHE_VERSION,
+             'path': os.path.abspath(filename),
+             'mtime': mtime,
+             'sha1': digest,
+             'functions': [list(fn) if fn is not None else None for fn in file_def.functions],
+             'imports': [list(im) if im is not None else None for im in file_def.imports]}
+    try:
+        if not os.path.isdir(_disk_cache_dir):
+            os.makedirs(_disk_cache_dir)
+        # write to a temporary file and rename it, so concurrently starting workers never read a partial entry
+        fd, tmp_filename = tempfile.mkstemp(dir=_disk_cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.rename(tmp_filename, cache_filename)
+    except (IOError, OSError) as ex:
+        logger.debug("Could not write groovy cache entry %s: %s", cache_filename, ex)
+
+
 def parse(filename):
     """
     Parse Groovy code in the given file and return a list of information about each function necessary for usage in
     queries to database.
 
+    Results are cached in memory and on disk (see `set_cache_dir`), keyed by the file path, modification time and
+    content hash, so other processes don't have to parse the file again.
+
     :param filename: The file containing groovy code.
     :type filename: str
     :rtype: list
@@ -108,12 +232,52 @@ def parse(filename):
     if filename in _parsed_file_cache:
         return _parsed_file_cache[filename]
 
+    with open(filename, 'rb') as f:
+        data = f.read()
+    mtime = os.path.getmtime(filename)
+    digest = hashlib.sha1(data).hexdigest()
+
+    result = _load_cached(filename, mtime, digest)
+    if result is None:
+        result = _parse_lines(filename, data.decode('utf-8').splitlines())
+        _store_cached(filename, mtime, digest, result)
+
+    _parsed_file_cache[filename] = result
+    return result
+
+
+def get_function(filename, name):
+    """
+    Find a function of a Groovy file.
+
+    :param filename: The file containing groovy code.
+    :type filename: str
+    :param name: The name of the function
+    :type name: str
+    :rtype: GroovyFunction | None
+
+    """
+    for function in parse(filename).functions:
+        if function is not None and function.name == name:
+            return function
+    return None
+
+
+def _parse_lines(filename, file_lines):
+    """
+    Parse the lines of a Groovy file.
+
+    :param filename: The file containing groovy code.
+    :type filename: str
+    :param file_lines: The lines of the file, without line endings
+    :type file_lines: list
+    :rtype: GroovyFileDef
+
+    """
     ImportDefnRegexp = r'^import.*'
     FuncDefnRegexp = r'^def.*\{'
     FuncEndRegexp = r'^\}.*$'
     passedFirstFunction = False
-    with open(filename, 'r') as f:
-        file_lines = [line.rstrip('\n') for line in f.readlines()]
     all_fns = []
     all_imports = []
     fn_lines = ''
@@ -134,6 +298,4 @@ def parse(filename):
     import_results = [GroovyImportParser.parse(im) for im in all_imports]
     func_results = [GroovyFunctionParser.parse(fn) for fn in all_fns]
 
-    result = GroovyFileDef(func_results, import_results, filename)
-    _parsed_file_cache[filename] = result
-    return result
+    return GroovyFileDef(func_results, import_results, filename)
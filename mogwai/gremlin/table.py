@@ -1,4 +1,5 @@
 from __future__ import unicode_literals
+from collections import OrderedDict
 from mogwai._compat import integer_types, float_types, string_types, iteritems
 from mogwai.tools import LazyImportClass
 from mogwai.exceptions import MogwaiException
@@ -28,14 +29,19 @@ class Row(object):
         elif not isinstance(data, dict):
             raise MogwaiException("Result data is not tabular!")
         self.__data = data
-        for k, v in data.items():
-            if isinstance(k, string_types):
-                setattr(self, k, v)
+        self.__values = tuple(data.values())
         self.__position = 0
         self.__ready = True
 
+    def __getattr__(self, item):
+        # only called for names that aren't regular attributes, columns are looked up instead of copied onto the row
+        data = self.__dict__.get('_Row__data')
+        if data is not None and isinstance(item, string_types) and item in data:
+            return data[item]
+        raise AttributeError("{!r} object has no attribute {!r}".format(self.__class__.__name__, item))
+
     def __getslice__(self, i, j):
-        return list(self.__data.values())[i:j]
+        return list(self.__values[i:j])
 
     def __setslice__(self, i, j, sequence):
         raise MogwaiException("Row is not editable")
@@ -44,8 +50,10 @@ class Row(object):
         raise MogwaiException("Row is not editable")
 
     def __getitem__(self, item):
-        if isinstance(item, numeric_types) or isinstance(item, slice):
-            return list(self.__data.values())[item]
+        if isinstance(item, numeric_types):
+            return self.__values[item]
+        if isinstance(item, slice):
+            return list(self.__values[item])
         return self.__data[item]
 
     def __setitem__(self, key, value):
@@ -83,10 +91,10 @@ class Row(object):
             yield k, v
 
     def next(self):
-        if self.__position == len(self.__data):
+        if self.__position == len(self.__values):
             self.__position = 0
             raise StopIteration()
-        tmp = list(self.__data.values())[self.__position]
+        tmp = self.__values[self.__position]
         self.__position += 1
         return tmp
 
@@ -115,6 +123,9 @@ class Table(object):
     It can be iterated over like a normal list, but within the rows
     the dictionaries are accessible via .notation
 
+    The results are stored by column, so whole columns are available without building a Row per result
+    (see `column`, `to_arrays` and `to_numpy`).
+
     For example:
 
     # returns a table of people & my friend edge to them
@@ -125,20 +136,53 @@ class Table(object):
         result = self.friends()
         for i in result:
             print "{}:{}".format(i.friend_edge.nickname, i.person.name)
+
+        nicknames = result.column('friend_edge')
     """
 
     def __init__(self, gremlin_result):
         if gremlin_result == [[]]:
             gremlin_result = []
 
-        self.__gremlin_result = gremlin_result
+        columns = OrderedDict()
+        sparse = False
+        for position, row in enumerate(gremlin_result):
+            if isinstance(row, element.klass):
+                row = row.as_dict()
+            elif not isinstance(row, dict):
+                raise MogwaiException("Result data is not tabular!")
+            for key in row:
+                if key not in columns:
+                    # earlier rows don't have this column
+                    sparse = sparse or position > 0
+                    columns[key] = [_MISSING] * position
+            if len(row) != len(columns):
+                sparse = True
+            for key, values in columns.items():
+                values.append(row.get(key, _MISSING))
+
+        self.__columns = OrderedDict((key, tuple(values)) for key, values in columns.items())
+        self.__length = len(gremlin_result)
+        self.__sparse = sparse
         self.__position = 0
 
+    def _get_row_data(self, position):
+        if self.__sparse:
+            return OrderedDict((key, values[position]) for key, values in self.__columns.items()
+                               if values[position] is not _MISSING)
+        return OrderedDict((key, values[position]) for key, values in self.__columns.items())
+
     def __getitem__(self, item):
         """
         Returns an enhanced dictionary
         """
-        return Row(self.__gremlin_result[item])
+        if isinstance(item, slice):
+            return [Row(self._get_row_data(i)) for i in range(*item.indices(self.__length))]
+        if item < 0:
+            item += self.__length
+        if not 0 <= item < self.__length:
+            raise IndexError("Table index out of range")
+        return Row(self._get_row_data(item))
 
     def __setitem__(self, key, value):
         raise MogwaiException("Cannot edit Table result")
@@ -147,7 +191,7 @@ class Table(object):
         raise MogwaiException("Cannot edit Table result")
 
     def __getslice__(self, i, j):
-        return [Row(r) for r in self.__gremlin_result[i:j]]
+        return self[max(0, i):max(0, j)]
 
     def __setslice__(self, i, j, sequence):
         raise MogwaiException("Cannot edit Table result")
@@ -162,18 +206,98 @@ class Table(object):
         return self.next()
 
     def next(self):
-        if self.__position == len(self.__gremlin_result):
+        if self.__position == self.__length:
             self.__position = 0
             raise StopIteration()
-        tmp = self.__gremlin_result[self.__position]
+        tmp = self._get_row_data(self.__position)
         self.__position += 1
         return Row(tmp)
 
     def __len__(self):
-        return len(self.__gremlin_result)
+        return self.__length
 
     def __repr__(self):
-        return '{}(rows={})'.format(self.__class__.__name__, len(self.__gremlin_result))
+        return '{}(rows={})'.format(self.__class__.__name__, self.__length)
+
+    @property
+    def columns(self):
+        """
+        The column names, in the order they first appear in the results
+
+        :rtype: list
+        """
+        return list(self.__columns.keys())
+
+    def column(self, name):
+        """
+        All values of a column, rows without the column have None
+
+        :param name: The column name
+        :type name: str
+        :rtype: tuple
+        """
+        try:
+            values = self.__columns[name]
+        except KeyError:
+            raise MogwaiException("Table has no column {!r}".format(name))
+        if self.__sparse:
+            return tuple(None if value is _MISSING else value for value in values)
+        return values
+
+    def to_records(self):
+        """
+        The rows as plain dictionaries
+
+        :rtype: list[dict]
+        """
+        return [self._get_row_data(i) for i in range(self.__length)]
+
+    def to_arrays(self):
+        """
+        Each column as a one dimensional NumPy array, requires numpy
+
+        :rtype: OrderedDict
+        """
+        numpy = _import_numpy()
+        arrays = OrderedDict()
+        for name in self.__columns:
+            values = self.column(name)
+            array = numpy.array(values)
+            if array.ndim != 1:
+                # cells holding sequences stay python objects
+                array = numpy.empty(len(values), dtype=object)
+                array[:] = values
+            arrays[name] = array
+        return arrays
+
+    def to_numpy(self):
+        """
+        The table as a NumPy structured array with a field per column, requires numpy
+
+        Column names that aren't strings are converted to strings, columns holding elements or mixed values are object
+        fields.
+
+        :rtype: numpy.ndarray
+        """
+        numpy = _import_numpy()
+        arrays = self.to_arrays()
+        dtype = [(str(name), array.dtype) for name, array in arrays.items()]
+        result = numpy.empty(self.__length, dtype=dtype)
+        for (field, _), array in zip(dtype, arrays.values()):
+            result[field] = array
+        return result
+
+
+# marks a missing cell in tables whose rows don't all have the same columns
+_MISSING = object()
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        raise MogwaiException("numpy is required to export Table results as arrays")
+    return numpy
 
 
-__all__ = ['Table', 'Row']
\ No newline at end of file
+__all__ = ['Table', 'Row']
@@ -1,7 +1,16 @@
 # common tooling
-from pyformance.registry import MetricsRegistry, RegexRegistry
-from pyformance.meters import Counter, Histogram, Meter, Timer
+from mogwai._compat import lazy_attributes
 from mogwai.exceptions import MogwaiMetricsException
 
+# pyformance is only imported once metrics are used
+lazy_attributes(globals(), {
+    'MetricsRegistry': 'pyformance.registry:MetricsRegistry',
+    'RegexRegistry': 'pyformance.registry:RegexRegistry',
+    'Counter': 'pyformance.meters:Counter',
+    'Histogram': 'pyformance.meters:Histogram',
+    'Meter': 'pyformance.meters:Meter',
+    'Timer': 'pyformance.meters:Timer',
+})
+
 # Default Reporter
 from .base import ConsoleMetricReporter
@@ -1,9 +1,18 @@
 from __future__ import unicode_literals
-from pyformance.registry import MetricsRegistry, RegexRegistry
 import time
-from twisted.internet import task
 from mogwai.exceptions import MogwaiMetricsException
-from mogwai._compat import print_
+from mogwai._compat import print_, lazy_attributes
+from mogwai.metrics.scheduler import get_scheduler
+
+# pyformance is imported when the first reporter is created
+lazy_attributes(globals(), {
+    'MetricsRegistry': 'pyformance.registry:MetricsRegistry',
+    'RegexRegistry': 'pyformance.registry:RegexRegistry',
+    'Counter': 'pyformance.meters:Counter',
+    'Histogram': 'pyformance.meters:Histogram',
+    'Meter': 'pyformance.meters:Meter',
+    'Timer': 'pyformance.meters:Timer',
+})
 
 
 def get_time():
@@ -16,7 +25,7 @@ class BaseMetricsReporter(object):
     Customize this class for the specific metrics service, ie. Graphite, NewRelic, etc.
     """
 
-    def __init__(self, registry=None, reportingInterval=5*60, metric_prefix=None):
+    def __init__(self, registry=None, reportingInterval=5*60, metric_prefix=None, scheduler=None):
         """ Create a Metrics Reporter
 
         To override this method, please make sure to call the superclass *after* your methods. Ie.
@@ -30,10 +39,14 @@ class BaseMetricsReporter(object):
         :type reportingInterval: float | long | int
         :param metric_prefix: The prefix on the collected metrics. The default implementation ignores this.
         :type metric_prefix: basestring | None
+        :param scheduler: Runs `send_metrics` every reportingInterval: a scheduler, the name of a scheduler backend
+            (thread, gevent, asyncio or twisted) or None for a daemon thread
+        :type scheduler: mogwai.metrics.scheduler.BaseScheduler | basestring | None
         """
         self.setup_registry(registry=registry)
         self.reporting_interval = reportingInterval
         self.metric_prefix = metric_prefix or ''
+        self.scheduler = get_scheduler(scheduler)
         self.task = None
 
     def start(self):
@@ -42,10 +55,13 @@ class BaseMetricsReporter(object):
 
     def stop(self):
         """ Stop the Metric Reporter """
-        self.task.stop()
+        if self.task is not None:
+            self.task.stop()
 
     def setup_registry(self, registry=None):
         """ Setup the Metric Reporter with the given registry(s) """
+        from pyformance.registry import MetricsRegistry, RegexRegistry
+
         if not registry:
             self.registry = [MetricsRegistry(), ]
         else:
@@ -62,13 +78,13 @@ class BaseMetricsReporter(object):
     def start_reporter(self, reportingInterval):
         """ Start the Metric Reporter Agent
 
-        Kicks off a loop that every reportingInterval runs the `send_metrics` method.
+        Kicks off the scheduler, which runs the `send_metrics` method every reportingInterval in the background.
 
         :param reportingInterval: The interval (number of seconds) on which to report the collected metrics.
         :type reportingInterval: float | long | int
         """
-        self.task = task.LoopingCall(self.send_metrics)
-        self.task.start(reportingInterval)
+        self.task = self.scheduler
+        self.task.start(self.send_metrics, reportingInterval)
 
     def _get_metrics(self, timestamp=None, *args, **kwargs):
         """ Default pyformance implementation to collect all the metrics from the registries.
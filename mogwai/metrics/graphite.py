@@ -28,6 +28,8 @@ class HostedGraphiteReporter(BaseMetricsReporter):
         :type registry: list[ MetricsRegistry | RegexRegistry ] | MetricsRegistry | RegexRegistry
         :param reportingInterval: The interval (number of seconds) on which to report the collected metrics.
         :type reportingInterval: float | long | int
+        :param scheduler: Runs `send_metrics` every reportingInterval, a daemon thread by default
+        :type scheduler: mogwai.metrics.scheduler.BaseScheduler | basestring | None
         """
         self.url = url
         self.api_key = api_key
@@ -65,4 +67,4 @@ class HostedGraphiteReporter(BaseMetricsReporter):
                                                               valuekey,
                                                               metrics[key][valuekey],
                                                               timestamp))
-            return ''.join(metrics_data)
+        return ''.join(metrics_data)
@@ -1,7 +1,8 @@
 from mogwai._compat import print_
 from .base import BaseMetricsReporter
 from mogwai.exceptions import MogwaiMetricsException
-from pyformance import call_too_long
+import random
+import threading
 import time
 from functools import wraps
 import logging
@@ -9,6 +10,15 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# query phases recorded by the connection and the gremlin methods
+PHASE_ACQUIRE = 'acquire'  # waiting for a pooled connection
+PHASE_EXECUTE = 'execute'  # packing the request, the network round trip, running the script and unpacking the response
+PHASE_DESERIALIZE = 'deserialize'  # building elements and other python values from the response
+
+# payload sizes of a call, recorded in bytes
+PAYLOAD_REQUEST = 'request_bytes'  # the serialized script and bindings
+PAYLOAD_RESPONSE = 'response_bytes'  # the serialized results
+
 
 class TimerContext(object):
     """ Timer Context Manager customization to compensate for multiple Metric Registries """
@@ -30,12 +40,54 @@ class TimerContext(object):
             timer._update(elapsed)
             if timer.threshold and timer.threshold < elapsed:  # pragma: no cover
                 # this is a future feature in pyformance and will need to be tested
+                from pyformance import call_too_long
                 call_too_long.send(timer, elapsed=elapsed, *self.args, **self.kwargs)
         if exc_type is not None:
             return False
         return elapsed
 
 
+class QueryTrace(object):
+    """ The time spent in each phase of one (timed) call, passed to the trace listeners of the MetricManager """
+    __slots__ = ('context', 'phases', 'payloads', 'start_time', 'elapsed', 'script', 'params', 'host', 'port')
+
+    def __init__(self, context, start_time):
+        self.context = context
+        self.phases = {}
+        self.payloads = {}
+        self.start_time = start_time
+        self.elapsed = None
+        # the last query of the call and the host it ran on, set by connection.execute_query
+        self.script = None
+        self.params = None
+        self.host = None
+        self.port = None
+
+    def add(self, phase, elapsed):
+        """ Add time spent in a phase, phases may be entered more than once
+
+        :param phase: The phase name
+        :type phase: basestring
+        :param elapsed: The number of seconds spent
+        :type elapsed: float
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+
+    def add_payload(self, payload, size):
+        """ Add the size of a payload, the sizes of all queries of the call are summed
+
+        :param payload: The payload name
+        :type payload: basestring
+        :param size: The number of bytes
+        :type size: int
+        """
+        self.payloads[payload] = self.payloads.get(payload, 0) + size
+
+    def __repr__(self):
+        return "{}(context={!r}, elapsed={!r}, phases={!r})".format(self.__class__.__name__, self.context,
+                                                                    self.elapsed, self.phases)
+
+
 class MetricManager(object):
     """ Manages your Metric Agents
 
@@ -44,6 +96,12 @@ class MetricManager(object):
 
     def __init__(self):
         self.metric_reporters = []  #BaseMetricsReporter()]
+        self.trace_listeners = []
+        # fraction of the traced queries whose payload sizes are measured, measuring packs them again
+        self.payload_sample_rate = 0.0
+        self._gauges = {}
+        self._local = threading.local()
+        self.clear_cache()
 
     def setup_reporters(self, metric_reporters):
         """ Setup the Metric Reporter(s) for the MetricManager """
@@ -57,6 +115,208 @@ class MetricManager(object):
                 raise MogwaiMetricsException("{} Not derived from Mogwai BaseMetricsReporter".format(mr))
 
         self.metric_reporters = metric_reporters
+        self.clear_cache()
+        for key in self._gauges:
+            self._register_gauge(key)
+
+    def setup_multiprocess(self, directory):
+        """ Record the metrics of this (pre-forked worker) process into the store shared by the workers in `directory`
+
+        The metrics are not sent by the workers: start a single reporter with an AggregatedRegistry of the same
+        directory, ie. in the server process, to send the merged metrics of all workers.
+
+        :param directory: The directory shared by the worker processes
+        :type directory: str
+        """
+        from mogwai.metrics.multiprocess import MultiprocessReporter
+        self.setup_reporters(MultiprocessReporter(directory))
+
+    def clear_cache(self):
+        """ Forget the cached timers, call this after changing the registries of the configured reporters """
+        self._timer_cache = {}
+        self._histogram_cache = {}
+        self._metric_cache = {}
+        self._error_metrics = None
+
+    def resolve(self, kind, key):
+        """ The metrics of a kind (`counter`, `histogram`, `meter` or `timer`) for a key in all registries, resolved
+        once and cached until the reporters change
+
+        :param kind: The kind of metric, the name of the registry method creating it
+        :type kind: basestring
+        :param key: The metric key to use
+        :type key: basestring
+        :rtype: tuple
+        """
+        metrics = self._metric_cache.get((kind, key))
+        if metrics is None:
+            metrics = tuple(getattr(reg, kind)(key) for mr in self.metric_reporters for reg in mr.registry)
+            self._metric_cache[(kind, key)] = metrics
+        return metrics
+
+    def register_gauge(self, key, callback):
+        """ Register a gauge reading its value from `callback` in the registries, now and of later reporters.
+        Registering a key again replaces its callback.
+
+        :param key: The metric key to use
+        :type key: basestring
+        :param callback: Returns the current value of the gauge
+        :type callback: C{func}
+        """
+        self._gauges[key] = callback
+        self._register_gauge(key)
+
+    def _register_gauge(self, key):
+        # the registries keep the first gauge of a key, which reads the latest callback
+        def read():
+            return self._gauges[key]()
+
+        for mr in self.metric_reporters:
+            for reg in mr.registry:
+                reg.gauge(key, read)
+
+    def add_trace_listener(self, listener):
+        """ Call `listener` with the QueryTrace of every timed call (ie. every query) once it completes
+
+        :param listener: The callable receiving a QueryTrace
+        :type listener: C{func}
+        """
+        self.trace_listeners.append(listener)
+
+    def remove_trace_listener(self, listener):
+        """ Stop calling a trace listener
+
+        :param listener: The callable added with add_trace_listener
+        :type listener: C{func}
+        """
+        self.trace_listeners.remove(listener)
+
+    def start_trace(self, context):
+        """ Start recording the phases of a call on this thread
+
+        Calls made while a trace is active (ie. the query of a gremlin method) record their phases into the active
+        trace, and no trace is started for them.
+
+        :param context: The context of the call, if any
+        :type context: basestring | None
+        :returns: The started trace, None when a trace is active or nothing would use it
+        :rtype: QueryTrace | None
+        """
+        if not self.metric_reporters and not self.trace_listeners:
+            return None
+        local = self._local
+        if getattr(local, 'trace', None) is not None:
+            return None
+        trace = local.trace = QueryTrace(context, time.time())
+        return trace
+
+    def record_phase(self, phase, start_time):
+        """ Record the time spent in a phase since `start_time` into the active trace of this thread, if any
+
+        :param phase: The phase name
+        :type phase: basestring
+        :param start_time: The time.time() the phase started at
+        :type start_time: float
+        """
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace.add(phase, time.time() - start_time)
+
+    def tracing(self):
+        """ Whether a trace is active on this thread, phases do not need to be timed otherwise
+
+        :rtype: bool
+        """
+        return getattr(self._local, 'trace', None) is not None
+
+    def current_trace(self):
+        """ The active trace of this thread
+
+        :rtype: QueryTrace | None
+        """
+        return getattr(self._local, 'trace', None)
+
+    def sample_payloads(self):
+        """ Whether the payload sizes of the current query are measured, for `payload_sample_rate` of the queries
+
+        :rtype: bool
+        """
+        rate = self.payload_sample_rate
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def finish_trace(self, trace):
+        """ Finish a trace started by start_trace: update the phase and payload histograms and call the trace listeners
+
+        :param trace: The trace returned by start_trace
+        :type trace: QueryTrace | None
+        """
+        if trace is None:
+            return
+        self._local.trace = None
+        trace.elapsed = time.time() - trace.start_time
+
+        for phase, elapsed in trace.phases.items():
+            for histogram in self._get_trace_histograms(trace.context, phase):
+                histogram.add(elapsed)
+        for payload, size in trace.payloads.items():
+            for histogram in self._get_trace_histograms(trace.context, payload):
+                histogram.add(size)
+
+        for listener in self.trace_listeners:
+            try:
+                listener(trace)
+            except Exception:
+                logger.exception("Trace listener %r failed", listener)
+
+    def _get_trace_histograms(self, context, name):
+        """ The histograms of all registries for a phase or payload, overall and for the context, resolved once
+
+        :param context: The context of the call, if any
+        :type context: basestring | None
+        :param name: The phase or payload name
+        :type name: basestring
+        :rtype: tuple
+        """
+        by_name = self._histogram_cache.get(context)
+        if by_name is None:
+            by_name = self._histogram_cache.setdefault(context, {})
+        histograms = by_name.get(name)
+        if histograms is None:
+            keys = ["mogwai.{}.hist".format(name)]
+            if context is not None:
+                keys.append("{}.{}.hist".format(context, name))
+            histograms = tuple(reg.histogram(key)
+                               for key in keys for mr in self.metric_reporters for reg in mr.registry)
+            by_name[name] = histograms
+        return histograms
+
+    def _get_timers(self, fn_name, context):
+        """ The timers of all registries for a function (and context), resolved once per function and context
+
+        :param fn_name: The timer name of the function
+        :type fn_name: basestring
+        :param context: The context of the call, if any
+        :type context: basestring | None
+        :rtype: tuple
+        """
+        by_context = self._timer_cache.get(fn_name)
+        if by_context is None:
+            by_context = self._timer_cache.setdefault(fn_name, {})
+        timers = by_context.get(context)
+        if timers is None:
+            names = [fn_name] if context is None else ["{}.timer".format(context), fn_name]
+            timers = tuple(reg.timer(name) for name in names for mr in self.metric_reporters for reg in mr.registry)
+            by_context[context] = timers
+        return timers
+
+    def _mark_error(self):
+        """ Mark the error meter and counter of all registries """
+        if self._error_metrics is None:
+            self._error_metrics = tuple((reg.meter("mogwai.error.meter"), reg.counter("mogwai.error"))
+                                        for mr in self.metric_reporters for reg in mr.registry)
+        for meter, counter in self._error_metrics:
+            meter.mark()
+            counter.inc()
 
     def start(self):
         """ Start the Metric Reporter """
@@ -132,30 +392,40 @@ class MetricManager(object):
         """
         Decorator to time the execution of the function.
 
+        The timers are resolved once per function and context. Without metric reporters or trace listeners the
+        function is called directly. Otherwise a QueryTrace is started for the call (unless one is active), the
+        phases recorded during the call go to the histograms of the call context.
+
         :param fn: the function to be decorated
         :type fn: C{func}
         :return: the decorated function
         :rtype: C{func}
         """
+        fn_name = "{}.timer".format(fn.__name__)
+        clock = time.time
+
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            fn_name = "{}.timer".format(fn.__name__)
-            if 'context' in kwargs:
-                context_name = "{}.timer".format(kwargs.get('context'))
-                del kwargs['context']
-                timers = [reg.timer(context_name) for mr in self.metric_reporters for reg in mr.registry]
-            else:
-                timers = []
-            timers += [reg.timer(fn_name) for mr in self.metric_reporters for reg in mr.registry]
-            with TimerContext(timers):
-                try:
-                    return fn(*args, **kwargs)
-                except:
-                    for mr in self.metric_reporters:
-                        for reg in mr.registry:
-                            reg.meter("mogwai.error.meter").mark()
-                            reg.counter("mogwai.error").inc()
-                    raise
+            context = kwargs.pop('context', None)
+            if not self.metric_reporters and not self.trace_listeners:
+                return fn(*args, **kwargs)
+
+            timers = self._get_timers(fn_name, context)
+            trace = self.start_trace(context)
+            start_time = clock()
+            try:
+                return fn(*args, **kwargs)
+            except:
+                self._mark_error()
+                raise
+            finally:
+                elapsed = clock() - start_time
+                self.finish_trace(trace)
+                for timer in timers:
+                    timer._update(elapsed)
+                    if timer.threshold and timer.threshold < elapsed:  # pragma: no cover
+                        from pyformance import call_too_long
+                        call_too_long.send(timer, elapsed=elapsed)
         return wrapper
 
     def hist_calls(self, fn):
@@ -257,4 +527,5 @@ class MetricManager(object):
                 raise
         return wrapper
 
-__all__ = ['MetricManager', 'MogwaiMetricsException']
+__all__ = ['MetricManager', 'QueryTrace', 'MogwaiMetricsException', 'PHASE_ACQUIRE', 'PHASE_EXECUTE',
+           'PHASE_DESERIALIZE', 'PAYLOAD_REQUEST', 'PAYLOAD_RESPONSE']
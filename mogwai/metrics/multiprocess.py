@@ -0,0 +1,764 @@
+from __future__ import unicode_literals
+import glob
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from pyformance.registry import MetricsRegistry
+from pyformance.stats.moving_average import ExpWeightedMovingAvg
+from pyformance.stats.snapshot import Snapshot
+
+from mogwai.metrics.base import BaseMetricsReporter
+
+# histogram samples are counted in logarithmic buckets, a bucket spans 4% so percentiles are within 2% of the value
+BUCKET_GROWTH = 1.04
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+_ZERO_BUCKET = 'z'
+
+# percentiles cover the samples of the last WINDOW seconds, the buckets rotate through WINDOW_SLOTS generations so
+# the window slides in steps of WINDOW / WINDOW_SLOTS seconds
+WINDOW = 300
+WINDOW_SLOTS = 5
+
+_FILE_PATTERN = 'mogwai_{}.db'
+_INITIAL_SIZE = 64 * 1024
+_HEADER = struct.Struct(str('i'))
+_VALUE = struct.Struct(str('d'))
+
+COUNTER = 'counter'
+METER = 'meter'
+HISTOGRAM = 'histogram'
+TIMER = 'timer'
+
+
+def bucket_index(value):
+    """
+    The bucket counting a histogram sample.
+
+    :param value: The sample
+    :type value: float
+    :rtype: int | str
+    """
+    if value <= 0:
+        return _ZERO_BUCKET
+    return int(math.floor(math.log(value) / _LOG_GROWTH))
+
+
+def bucket_value(index):
+    """
+    The value representing the samples of a bucket, its geometric middle.
+
+    :param index: The bucket index
+    :type index: int | str
+    :rtype: float
+    """
+    if index == _ZERO_BUCKET:
+        return 0.0
+    return BUCKET_GROWTH ** (index + 0.5)
+
+
+class MmapDict(object):
+    """
+    Float values by key in a memory mapped file, written by a single process.
+
+    The file starts with the number of bytes used, followed by the entries: the length of the utf-8 key, the key
+    padded to 8 bytes and the value. Entries are only appended, so other processes can read the file at any time.
+
+    Keys containing a `:` are grouped by the part up to their last `:` (ie. the buckets of a histogram window slot),
+    `zero_group` resets the values of a group without reading the other entries.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: The file, created when missing
+        :type filename: str
+        """
+        self.filename = filename
+        self._f = open(filename, 'a+b')
+        self._capacity = os.fstat(self._f.fileno()).st_size
+        if self._capacity == 0:
+            self._f.truncate(_INITIAL_SIZE)
+            self._capacity = _INITIAL_SIZE
+        self._m = mmap.mmap(self._f.fileno(), self._capacity)
+        self._positions = {}
+        self._groups = {}
+        self._used = _HEADER.unpack_from(self._m, 0)[0]
+        if self._used == 0:
+            self._used = 8
+            _HEADER.pack_into(self._m, 0, self._used)
+        else:
+            for key, value, position in _read_entries(self._m, self._used):
+                self._index(key, position)
+
+    def _index(self, key, position):
+        self._positions[key] = position
+        group, separator, _ = key.rpartition(':')
+        if separator:
+            self._groups.setdefault(group + separator, []).append(position)
+
+    def _init_value(self, key):
+        encoded = key.encode('utf-8')
+        padding = 8 - (len(encoded) + 4) % 8
+        entry = _HEADER.pack(len(encoded)) + encoded + b' ' * padding + _VALUE.pack(0.0)
+        while self._used + len(entry) > self._capacity:
+            self._capacity *= 2
+            self._f.truncate(self._capacity)
+            self._m.close()
+            self._m = mmap.mmap(self._f.fileno(), self._capacity)
+        self._m[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        # the entry is complete before readers see it
+        _HEADER.pack_into(self._m, 0, self._used)
+        position = self._used - 8
+        self._index(key, position)
+        return position
+
+    def read_value(self, key):
+        """
+        :param key: The key
+        :type key: str
+        :rtype: float | None
+        """
+        position = self._positions.get(key)
+        if position is None:
+            return None
+        return _VALUE.unpack_from(self._m, position)[0]
+
+    def write_value(self, key, value):
+        """
+        :param key: The key
+        :type key: str
+        :param value: The value
+        :type value: float
+        """
+        position = self._positions.get(key)
+        if position is None:
+            position = self._init_value(key)
+        _VALUE.pack_into(self._m, position, value)
+
+    def add(self, key, value):
+        """
+        :param key: The key
+        :type key: str
+        :param value: Added to the current value
+        :type value: float
+        """
+        position = self._positions.get(key)
+        if position is None:
+            position = self._init_value(key)
+        _VALUE.pack_into(self._m, position, _VALUE.unpack_from(self._m, position)[0] + value)
+
+    def zero_group(self, group):
+        """
+        :param group: The keys up to and including their last `:`
+        :type group: str
+        """
+        for position in self._groups.get(group, ()):
+            _VALUE.pack_into(self._m, position, 0.0)
+
+    def items(self):
+        """
+        :rtype: generator
+        """
+        for key, value, position in _read_entries(self._m, self._used):
+            yield key, value
+
+    def close(self):
+        self._m.close()
+        self._f.close()
+
+
+def _read_entries(data, used):
+    position = 8
+    while position < used:
+        length = _HEADER.unpack_from(data, position)[0]
+        key = bytes(data[position + 4:position + 4 + length]).decode('utf-8')
+        position += 4 + length + 8 - (length + 4) % 8
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        position += 8
+
+
+def _store_key(kind, key, field):
+    return '{}\x00{}\x00{}'.format(kind, key, field)
+
+
+def read_store(filename):
+    """
+    The values written into a store file.
+
+    :param filename: The store file
+    :type filename: str
+    :rtype: generator
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if len(data) < 8:
+        return
+    used = _HEADER.unpack_from(data, 0)[0]
+    for key, value, position in _read_entries(data, min(used, len(data))):
+        yield key, value
+
+
+def window_fields(items, generation, slots=WINDOW_SLOTS):
+    """
+    The values of a store file without the histogram buckets older than the window.
+
+    Bucket fields are written as `b<slot>:<index>` along with the generation of each slot as `g<slot>`, the buckets of
+    the slots in the last `slots` generations are returned as `b<index>`.
+
+    :param items: The keys and values of a store
+    :type items: iterable
+    :param generation: The current generation
+    :type generation: int
+    :param slots: The number of generations in the window
+    :type slots: int
+    :rtype: list
+    """
+    items = list(items)
+    current = set()
+    for store_key, value in items:
+        kind, key, field = store_key.split('\x00')
+        if field[:1] == 'g' and generation - slots < value <= generation:
+            current.add((kind, key, field[1:]))
+    fields = []
+    for store_key, value in items:
+        kind, key, field = store_key.split('\x00')
+        if field[:1] == 'b':
+            slot, index = field[1:].split(':')
+            if (kind, key, slot) in current:
+                fields.append((_store_key(kind, key, 'b' + index), value))
+        elif field[:1] != 'g':
+            fields.append((store_key, value))
+    return fields
+
+
+def merge_fields(items, merged=None):
+    """
+    Merge the values of store files by metric: counts, sums and buckets are added up, minimums and maximums kept.
+
+    :param items: The keys and values of the stores
+    :type items: iterable
+    :param merged: The fields merged so far, by (kind, metric key)
+    :type merged: dict | None
+    :rtype: dict
+    """
+    merged = {} if merged is None else merged
+    for store_key, value in items:
+        kind, key, field = store_key.split('\x00')
+        fields = merged.get((kind, key))
+        if fields is None:
+            fields = merged[(kind, key)] = {}
+        if field not in fields:
+            fields[field] = value
+        elif field == 'min':
+            fields[field] = min(fields[field], value)
+        elif field == 'max':
+            fields[field] = max(fields[field], value)
+        else:
+            fields[field] += value
+    return merged
+
+
+class BucketSnapshot(Snapshot):
+    """ Percentiles of a histogram computed from its bucket counts """
+
+    def __init__(self, buckets, count, minimum, maximum):
+        """
+        :param buckets: The sample counts by bucket index
+        :type buckets: dict
+        :param count: The number of samples
+        :type count: int | float
+        :param minimum: The smallest sample
+        :type minimum: float
+        :param maximum: The largest sample
+        :type maximum: float
+        """
+        self.values = []
+        self.count = count
+        self.minimum = minimum
+        self.maximum = maximum
+        self.buckets = sorted(buckets.items(), key=lambda item: -1e300 if item[0] == _ZERO_BUCKET else item[0])
+
+    def get_size(self):
+        return int(self.count)
+
+    def get_percentile(self, percentile):
+        if percentile < 0 or percentile > 1:
+            raise ValueError("{0} is not in [0..1]".format(percentile))
+        if not self.count:
+            return 0
+        rank = percentile * self.count
+        seen = 0
+        for index, count in self.buckets:
+            seen += count
+            if seen >= rank and count:
+                return min(max(bucket_value(index), self.minimum), self.maximum)
+        return self.maximum
+
+
+class HistogramValues(object):
+    """ The statistics of a histogram or timer from its store fields """
+
+    def __init__(self, fields=None):
+        self.update(fields or {})
+
+    def update(self, fields):
+        self.count = fields.get('count', 0)
+        self.sum = fields.get('sum', 0.0)
+        self.sumsq = fields.get('sumsq', 0.0)
+        self.min = fields.get('min', 0.0)
+        self.max = fields.get('max', 0.0)
+        self.buckets = dict((_parse_bucket(field[1:]), value) for field, value in fields.items()
+                            if field[:1] == 'b')
+
+    def get_count(self):
+        return self.count
+
+    def get_sum(self):
+        return self.sum
+
+    def get_max(self):
+        return self.max if self.count else 0
+
+    def get_min(self):
+        return self.min if self.count else 0
+
+    def get_mean(self):
+        return self.sum / self.count if self.count else 0
+
+    def get_var(self):
+        if self.count <= 1:
+            return 0
+        return max(self.sumsq - self.sum * self.sum / self.count, 0.0) / (self.count - 1)
+
+    def get_stddev(self):
+        return math.sqrt(self.get_var())
+
+    def get_snapshot(self):
+        # the buckets only hold the samples of the window, the other statistics cover all samples
+        return BucketSnapshot(self.buckets, sum(self.buckets.values()), self.get_min(), self.get_max())
+
+
+def _parse_bucket(index):
+    return index if index == _ZERO_BUCKET else int(index)
+
+
+class MeterRates(object):
+    """ The rates of a meter, from the increase of its count between reads """
+
+    def __init__(self, clock=time):
+        self.clock = clock
+        self.count = 0
+        self.start_time = clock.time()
+        self.m1rate = ExpWeightedMovingAvg(period=1, clock=clock)
+        self.m5rate = ExpWeightedMovingAvg(period=5, clock=clock)
+        self.m15rate = ExpWeightedMovingAvg(period=15, clock=clock)
+
+    def update(self, count):
+        delta = count - self.count
+        self.count = count
+        if delta > 0:
+            self.m1rate.add(delta)
+            self.m5rate.add(delta)
+            self.m15rate.add(delta)
+
+    def get_count(self):
+        return self.count
+
+    def get_one_minute_rate(self):
+        return self.m1rate.get_rate()
+
+    def get_five_minute_rate(self):
+        return self.m5rate.get_rate()
+
+    def get_fifteen_minute_rate(self):
+        return self.m15rate.get_rate()
+
+    def get_mean_rate(self):
+        elapsed = self.clock.time() - self.start_time
+        if self.count == 0 or elapsed <= 0:
+            return 0
+        return self.count / elapsed
+
+
+class AggregatedCounter(object):
+
+    def __init__(self, clock=time):
+        self.count = 0
+
+    def update(self, fields):
+        self.count = fields.get('count', 0)
+
+    def get_count(self):
+        return self.count
+
+
+class AggregatedMeter(MeterRates):
+
+    def update(self, fields):
+        super(AggregatedMeter, self).update(fields.get('count', 0))
+
+
+class AggregatedHistogram(HistogramValues):
+
+    def __init__(self, clock=time):
+        super(AggregatedHistogram, self).__init__()
+
+
+class AggregatedTimer(HistogramValues):
+
+    def __init__(self, clock=time):
+        self.rates = MeterRates(clock)
+        super(AggregatedTimer, self).__init__()
+
+    def update(self, fields):
+        super(AggregatedTimer, self).update(fields)
+        self.rates.update(self.count)
+
+    def get_mean_rate(self):
+        return self.rates.get_mean_rate()
+
+    def get_one_minute_rate(self):
+        return self.rates.get_one_minute_rate()
+
+    def get_five_minute_rate(self):
+        return self.rates.get_five_minute_rate()
+
+    def get_fifteen_minute_rate(self):
+        return self.rates.get_fifteen_minute_rate()
+
+
+class SharedCounter(object):
+    """ Counter of a worker process, written into the shared store """
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = _store_key(COUNTER, key, 'count')
+
+    def inc(self, val=1):
+        self.registry._add(self.key, val)
+
+    def dec(self, val=1):
+        self.registry._add(self.key, -val)
+
+    def get_count(self):
+        return self.registry._read(self.key) or 0
+
+    def clear(self):
+        self.registry._write(self.key, 0.0)
+
+
+class SharedMeter(object):
+    """ Meter of a worker process, only its count is written into the shared store """
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = _store_key(METER, key, 'count')
+        self.rates = MeterRates(registry._clock)
+
+    def mark(self, value=1):
+        self.registry._add(self.key, value)
+
+    def get_count(self):
+        count = self.registry._read(self.key) or 0
+        self.rates.update(count)
+        return count
+
+    def get_mean_rate(self):
+        self.get_count()
+        return self.rates.get_mean_rate()
+
+    def get_one_minute_rate(self):
+        self.get_count()
+        return self.rates.get_one_minute_rate()
+
+    def get_five_minute_rate(self):
+        self.get_count()
+        return self.rates.get_five_minute_rate()
+
+    def get_fifteen_minute_rate(self):
+        self.get_count()
+        return self.rates.get_fifteen_minute_rate()
+
+    def clear(self):
+        self.registry._write(self.key, 0.0)
+        self.rates = MeterRates(self.registry._clock)
+
+
+class SharedHistogram(object):
+    """ Histogram of a worker process, the samples are counted into the buckets of the current window slot """
+    kind = HISTOGRAM
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.metric_key = key
+        prefix = _store_key(self.kind, key, '')
+        self._keys = (prefix + 'count', prefix + 'sum', prefix + 'sumsq', prefix + 'min', prefix + 'max')
+        # the generation key and bucket key prefix of each slot
+        self._slots = [('{}g{}'.format(prefix, slot), '{}b{}:'.format(prefix, slot)) for slot in range(WINDOW_SLOTS)]
+        self._bucket_keys = {}
+
+    def add(self, value):
+        generation = self.registry._generation()
+        slot = generation % WINDOW_SLOTS
+        index = bucket_index(value)
+        bucket_key = self._bucket_keys.get((slot, index))
+        if bucket_key is None:
+            bucket_key = self._bucket_keys[(slot, index)] = '{}{}'.format(self._slots[slot][1], index)
+        self.registry._add_sample(self._keys, self._slots[slot], generation, bucket_key, value)
+
+    def _values(self):
+        items = window_fields(self.registry._items(self.kind, self.metric_key), self.registry._generation())
+        fields = merge_fields(items).get((self.kind, self.metric_key), {})
+        return HistogramValues(fields)
+
+    def get_count(self):
+        return self.registry._read(self._keys[0]) or 0
+
+    def get_sum(self):
+        return self.registry._read(self._keys[1]) or 0.0
+
+    def get_max(self):
+        return self._values().get_max()
+
+    def get_min(self):
+        return self._values().get_min()
+
+    def get_mean(self):
+        return self._values().get_mean()
+
+    def get_stddev(self):
+        return self._values().get_stddev()
+
+    def get_var(self):
+        return self._values().get_var()
+
+    def get_snapshot(self):
+        return self._values().get_snapshot()
+
+    def clear(self):
+        for key, value in list(self.registry._items(self.kind, self.metric_key)):
+            self.registry._write(key, 0.0)
+
+
+class SharedTimer(SharedHistogram):
+    """ Timer of a worker process, the durations are counted into buckets of the shared store """
+    kind = TIMER
+    threshold = None
+
+    def __init__(self, registry, key):
+        super(SharedTimer, self).__init__(registry, key)
+        self.rates = MeterRates(registry._clock)
+
+    def _update(self, seconds):
+        if seconds >= 0:
+            self.add(seconds)
+
+    def time(self, *args, **kwargs):
+        from pyformance.meters.timer import TimerContext
+        return TimerContext(self, self.registry._clock, *args, **kwargs)
+
+    def _rates(self):
+        self.rates.update(self.get_count())
+        return self.rates
+
+    def get_mean_rate(self):
+        return self._rates().get_mean_rate()
+
+    def get_one_minute_rate(self):
+        return self._rates().get_one_minute_rate()
+
+    def get_five_minute_rate(self):
+        return self._rates().get_five_minute_rate()
+
+    def get_fifteen_minute_rate(self):
+        return self._rates().get_fifteen_minute_rate()
+
+
+class MultiprocessRegistry(MetricsRegistry):
+    """ Registry of a pre-forked worker process
+
+    Counters, meters, histograms and timers are written into a memory mapped file of the process in `directory`,
+    which is opened again after a fork. Gauges stay in the process. An `AggregatedRegistry` of the same directory
+    merges the metrics of all worker processes.
+
+    Histogram and timer samples are counted into the buckets of the current slot of a sliding `window`, a slot is
+    cleared when it is reused by a later generation.
+    """
+
+    def __init__(self, directory, clock=time, window=WINDOW):
+        """
+        :param directory: The directory shared by the worker processes
+        :type directory: str
+        :param window: The number of seconds covered by the histogram percentiles, the same for all processes
+        :type window: float
+        """
+        super(MultiprocessRegistry, self).__init__(clock)
+        self.directory = directory
+        self.window = window
+        self._pid = None
+        self._store = None
+        self._lock = threading.Lock()
+
+    def _get_store(self):
+        pid = os.getpid()
+        if pid != self._pid:
+            # a new process, ie. forked from the process which created the registry
+            self._lock = threading.Lock()
+            self._store = MmapDict(os.path.join(self.directory, _FILE_PATTERN.format(pid)))
+            self._pid = pid
+        return self._store
+
+    def _add(self, key, value):
+        store = self._get_store()
+        with self._lock:
+            store.add(key, value)
+
+    def _write(self, key, value):
+        store = self._get_store()
+        with self._lock:
+            store.write_value(key, value)
+
+    def _read(self, key):
+        return self._get_store().read_value(key)
+
+    def _generation(self):
+        return int(self._clock.time() // (float(self.window) / WINDOW_SLOTS))
+
+    def _add_sample(self, keys, slot_keys, generation, bucket_key, value):
+        store = self._get_store()
+        generation_key, slot_prefix = slot_keys
+        with self._lock:
+            if store.read_value(generation_key) != generation:
+                # the slot held the samples of an earlier generation
+                store.zero_group(slot_prefix)
+                store.write_value(generation_key, generation)
+            first = store.read_value(keys[0]) is None
+            store.add(keys[0], 1)
+            store.add(keys[1], value)
+            store.add(keys[2], value * value)
+            if first or value < store.read_value(keys[3]):
+                store.write_value(keys[3], value)
+            if first or value > store.read_value(keys[4]):
+                store.write_value(keys[4], value)
+            store.add(bucket_key, 1)
+
+    def _items(self, kind, key):
+        prefix = _store_key(kind, key, '')
+        store = self._get_store()
+        with self._lock:
+            return [(store_key, value) for store_key, value in store.items() if store_key.startswith(prefix)]
+
+    def counter(self, key):
+        if key not in self._counters:
+            self._counters[key] = SharedCounter(self, key)
+        return self._counters[key]
+
+    def histogram(self, key):
+        if key not in self._histograms:
+            self._histograms[key] = SharedHistogram(self, key)
+        return self._histograms[key]
+
+    def meter(self, key):
+        if key not in self._meters:
+            self._meters[key] = SharedMeter(self, key)
+        return self._meters[key]
+
+    def timer(self, key):
+        if key not in self._timers:
+            self._timers[key] = SharedTimer(self, key)
+        return self._timers[key]
+
+
+class AggregatedRegistry(MetricsRegistry):
+    """ Registry merging the metrics written by the worker processes into `directory`
+
+    The metrics are read again when they are dumped (or scraped by the OpenMetricsReporter). Histogram and timer
+    percentiles are computed from the merged bucket counts of all workers in the last `window` seconds, so they follow
+    recent samples like the exponentially decaying samples of pyformance, and the samples of dead workers leave them
+    after the window. Counts, sums, minimums and maximums cover all samples, of live and dead workers.
+    """
+
+    _kinds = {
+        COUNTER: ('_counters', AggregatedCounter),
+        METER: ('_meters', AggregatedMeter),
+        HISTOGRAM: ('_histograms', AggregatedHistogram),
+        TIMER: ('_timers', AggregatedTimer),
+    }
+
+    def __init__(self, directory, clock=time, window=WINDOW):
+        """
+        :param directory: The directory shared by the worker processes
+        :type directory: str
+        :param window: The number of seconds covered by the histogram percentiles, as given to the workers
+        :type window: float
+        """
+        super(AggregatedRegistry, self).__init__(clock)
+        self.directory = directory
+        self.window = window
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """ Read the metrics of all worker processes """
+        merged = {}
+        generation = int(self._clock.time() // (float(self.window) / WINDOW_SLOTS))
+        for filename in glob.glob(os.path.join(self.directory, _FILE_PATTERN.format('*'))):
+            try:
+                merge_fields(window_fields(read_store(filename), generation), merged)
+            except (IOError, OSError, struct.error, UnicodeDecodeError):  # pragma: no cover
+                # removed or being written
+                continue
+        with self._lock:
+            for (kind, key), fields in merged.items():
+                metrics, metric_class = self._kinds[kind]
+                metrics = getattr(self, metrics)
+                metric = metrics.get(key)
+                if not isinstance(metric, metric_class):
+                    metric = metrics[key] = metric_class(self._clock)
+                metric.update(fields)
+
+    def dump_metrics(self):
+        self.refresh()
+        return super(AggregatedRegistry, self).dump_metrics()
+
+
+class MultiprocessReporter(BaseMetricsReporter):
+    """ Metrics Reporter of pre-forked worker processes
+
+    Records the metrics into the store shared by the workers instead of sending them, a single reporter with an
+    `AggregatedRegistry` of the same directory sends the metrics of all workers.
+    """
+
+    def __init__(self, directory, *args, **kwargs):
+        """
+        :param directory: The directory shared by the worker processes
+        :type directory: str
+        """
+        kwargs['registry'] = MultiprocessRegistry(directory)
+        super(MultiprocessReporter, self).__init__(*args, **kwargs)
+
+    def start_reporter(self, reportingInterval=None):
+        """ The metrics are sent by the aggregating reporter """
+        pass
+
+    def send_metrics(self, *args, **kwargs):
+        """ The metrics are sent by the aggregating reporter """
+        pass
+
+
+def clear_directory(directory):
+    """
+    Remove the stores of previous worker processes, ie. before the server forks its workers.
+
+    :param directory: The directory shared by the worker processes
+    :type directory: str
+    """
+    for filename in glob.glob(os.path.join(directory, _FILE_PATTERN.format('*'))):
+        os.remove(filename)
+
+
+__all__ = ['MultiprocessRegistry', 'AggregatedRegistry', 'MultiprocessReporter', 'MmapDict', 'BucketSnapshot',
+           'clear_directory', 'bucket_index', 'bucket_value', 'window_fields', 'WINDOW', 'WINDOW_SLOTS']
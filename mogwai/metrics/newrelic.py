@@ -28,6 +28,8 @@ class NewRelicReporter(BaseMetricsReporter):
         :type registry: list[ MetricsRegistry | RegexRegistry ] | MetricsRegistry | RegexRegistry
         :param reportingInterval: The interval (number of seconds) on which to report the collected metrics.
         :type reportingInterval: float | long | int
+        :param scheduler: Runs `send_metrics` every reportingInterval, a daemon thread by default
+        :type scheduler: mogwai.metrics.scheduler.BaseScheduler | basestring | None
         """
         self.agent = newrelic.agent
         self.agent.initialize(config_file, environment=environment)
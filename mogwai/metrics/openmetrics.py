@@ -0,0 +1,196 @@
+from __future__ import unicode_literals
+import logging
+import re
+import threading
+
+from mogwai.metrics.base import BaseMetricsReporter
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = str('application/openmetrics-text; version=1.0.0; charset=utf-8')
+
+_invalid_name_re = re.compile(r'[^a-zA-Z0-9_:]')
+
+
+def metric_name(key, prefix=''):
+    """
+    Translate a pyformance metric key (ie. `vertices.person.friends.timer`) into a valid OpenMetrics metric name.
+
+    :param key: The metric key
+    :type key: basestring
+    :param prefix: Prepended to the key, ie. the reporter metric prefix
+    :type prefix: basestring
+    :rtype: str
+    """
+    name = _invalid_name_re.sub('_', '{}_{}'.format(prefix, key) if prefix else key)
+    if name[:1].isdigit():
+        name = '_' + name
+    return name
+
+
+def _format_value(value):
+    return repr(float(value)) if value is not None else 'NaN'
+
+
+def _format_count(value):
+    # pyformance keeps some counts as floats
+    return '{:d}'.format(int(value))
+
+
+class OpenMetricsReporter(BaseMetricsReporter):
+    """ OpenMetrics (Prometheus) Metrics Reporter class
+
+    Serves the registries in the OpenMetrics text format when scraped, instead of pushing them on an interval. Use the
+    reporter as a WSGI application (`reporter.wsgi_app`) or give it a port to serve `/metrics` from a background
+    thread once started.
+
+    Counters are exposed as counters, meters as counters of their count, gauges as gauges and histograms and timers
+    as summaries (timers in seconds). The name and header of every metric are computed once, the quantiles of a
+    summary are only recomputed when its count changed since the previous scrape.
+    """
+
+    def __init__(self, host='127.0.0.1', port=None, path='/metrics', quantiles=(0.5, 0.95, 0.99), *args, **kwargs):
+        """ Create a Metrics Reporter
+
+        :param host: The address the HTTP endpoint listens on
+        :type host: basestring
+        :param port: The port of the HTTP endpoint, None to only use the WSGI application, 0 for any free port
+        :type port: int | None
+        :param path: The path the metrics are served from
+        :type path: basestring
+        :param quantiles: The quantiles exposed for histograms and timers
+        :type quantiles: tuple(float)
+        :param metric_prefix: The prefix on the collected metrics.
+        :type metric_prefix: basestring | None
+        :param registry: The pyformance registry
+        :type registry: list[ MetricsRegistry | RegexRegistry ] | MetricsRegistry | RegexRegistry
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.quantiles = tuple(quantiles)
+        self.server = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # (kind, key) -> (name, header), and (kind, key) -> (metric, count, lines) of the summaries
+        self._families = {}
+        self._summaries = {}
+        super(OpenMetricsReporter, self).__init__(*args, **kwargs)
+
+    def start_reporter(self, reportingInterval=None):
+        """ Serve the metrics over HTTP from a background thread, when a port is configured """
+        if self.port is None or self.server is not None:
+            return
+        from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.server = make_server(self.host, self.port, self.wsgi_app, handler_class=QuietHandler)
+        self.port = self.server.server_port
+        self._thread = threading.Thread(target=self.server.serve_forever, name='mogwai-openmetrics')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop serving the metrics over HTTP """
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+        self.server = None
+        self._thread = None
+
+    def send_metrics(self, *args, **kwargs):
+        """ Metrics are pulled by scraping, nothing is sent """
+        pass
+
+    def _family(self, kind, key, metric_type, suffix=''):
+        family = self._families.get((kind, key))
+        if family is None:
+            name = metric_name(key, self.metric_prefix) + suffix
+            family = (name, '# TYPE {} {}\n'.format(name, metric_type))
+            self._families[(kind, key)] = family
+        return family
+
+    def _summary_lines(self, kind, key, name, metric):
+        count = metric.get_count()
+        cached = self._summaries.get((kind, key))
+        if cached is not None and cached[0] is metric and cached[1] == count:
+            return cached[2]
+        snapshot = metric.get_snapshot()
+        lines = ''.join(['{}{{quantile="{}"}} {}\n'.format(name, q, _format_value(snapshot.get_percentile(q)))
+                         for q in self.quantiles])
+        lines += '{}_count {}\n{}_sum {}\n'.format(name, _format_count(count), name, _format_value(metric.get_sum()))
+        self._summaries[(kind, key)] = (metric, count, lines)
+        return lines
+
+    def iter_metrics(self):
+        """ Yield the exposition of every metric family of the registries, ending with the EOF marker
+
+        A family is only exposed once when several registries contain the same key.
+
+        :rtype: generator
+        """
+        seen = set()
+        for registry in self.registry:
+            # ie. the AggregatedRegistry of pre-forked workers
+            refresh = getattr(registry, 'refresh', None)
+            if refresh is not None:
+                refresh()
+            for key, counter in list(registry._counters.items()):
+                name, header = self._family('counter', key, 'counter')
+                if name not in seen:
+                    seen.add(name)
+                    yield '{}{}_total {}\n'.format(header, name, _format_count(counter.get_count()))
+            for key, meter in list(registry._meters.items()):
+                name, header = self._family('meter', key, 'counter')
+                if name not in seen:
+                    seen.add(name)
+                    yield '{}{}_total {}\n'.format(header, name, _format_count(meter.get_count()))
+            for key, gauge in list(registry._gauges.items()):
+                name, header = self._family('gauge', key, 'gauge')
+                if name not in seen:
+                    seen.add(name)
+                    yield '{}{} {}\n'.format(header, name, _format_value(gauge.get_value()))
+            for key, histogram in list(registry._histograms.items()):
+                name, header = self._family('histogram', key, 'summary')
+                if name not in seen:
+                    seen.add(name)
+                    yield header + self._summary_lines('histogram', key, name, histogram)
+            for key, timer in list(registry._timers.items()):
+                name, header = self._family('timer', key, 'summary', '_seconds')
+                if name not in seen:
+                    seen.add(name)
+                    yield header + self._summary_lines('timer', key, name, timer)
+        yield '# EOF\n'
+
+    def render(self):
+        """ The metrics of all registries in the OpenMetrics text format
+
+        :rtype: str
+        """
+        with self._lock:
+            return ''.join(self.iter_metrics())
+
+    def wsgi_app(self, environ, start_response):
+        """ WSGI application serving the metrics from the configured path """
+        if environ.get('PATH_INFO', '/') not in (self.path, self.path + '/'):
+            start_response(str('404 Not Found'), [(str('Content-Type'), str('text/plain'))])
+            return [b'Not Found\n']
+        try:
+            body = self.render().encode('utf-8')
+        except Exception:
+            logger.exception("Failed to render the metrics")
+            start_response(str('500 Internal Server Error'), [(str('Content-Type'), str('text/plain'))])
+            return [b'Internal Server Error\n']
+        start_response(str('200 OK'), [(str('Content-Type'), CONTENT_TYPE),
+                                       (str('Content-Length'), str(len(body)))])
+        return [body]
+
+    __call__ = wsgi_app
+
+
+__all__ = ['OpenMetricsReporter', 'metric_name', 'CONTENT_TYPE']
@@ -0,0 +1,238 @@
+from __future__ import unicode_literals
+from contextlib import contextmanager
+import re
+import socket
+import threading
+import time
+import weakref
+
+_invalid_key_re = re.compile(r'[^a-zA-Z0-9_-]')
+
+# instrumented subclass of each pool class
+_instrumented_classes = {}
+
+# the live telemetry of the pools reporting under the same key, per metric manager
+_live_telemetry = weakref.WeakKeyDictionary()
+_live_telemetry_lock = threading.Lock()
+
+
+def _is_timeout(exc):
+    """ Whether an exception raised while acquiring a connection is a timeout (socket, gevent, eventlet or queue) """
+    name = type(exc).__name__
+    return isinstance(exc, socket.timeout) or 'timeout' in name.lower() or name == 'Empty'
+
+
+class PoolTelemetry(object):
+    """
+    Counters of a connection pool, reported to the MetricManager under `mogwai.pool.<pool name>.<host>_<port>`:
+
+    * `acquire_wait.hist`: the seconds waited for a connection
+    * `in_use` and `idle` gauges
+    * `created`, `closed` and `soft_closed` connection counters
+    * `acquire_errors` and `acquire_timeouts` counters
+
+    Pools with the same name, host and port (ie. one per worker thread) share the key, the gauges report the sum of
+    the live pools.
+    """
+
+    def __init__(self, pool_name, host, port, pool_size, metric_manager):
+        """
+        :param pool_name: The name of the pool, ie. `default` or `session`
+        :type pool_name: str
+        :param host: The host the pool connects to
+        :type host: str
+        :param port: The port the pool connects to
+        :type port: int
+        :param pool_size: The maximum number of connections
+        :type pool_size: int
+        :param metric_manager: The metric manager to report to
+        :type metric_manager: mogwai.metrics.manager.MetricManager
+        """
+        self.pool_name = pool_name
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.metric_manager = metric_manager
+        self.prefix = "mogwai.pool.{}.{}_{}".format(_invalid_key_re.sub('_', pool_name or 'default'),
+                                                    _invalid_key_re.sub('_', host or 'unknown'), port)
+        self.created = 0
+        self.closed = 0
+        self.soft_closed = 0
+        self.acquired = 0
+        self.acquire_errors = 0
+        self.acquire_timeouts = 0
+        self.in_use = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self._lock = threading.Lock()
+        self._wait_key = self.prefix + '.acquire_wait.hist'
+
+        self._register_gauges()
+
+    def _register_gauges(self):
+        with _live_telemetry_lock:
+            keys = _live_telemetry.setdefault(self.metric_manager, {})
+            live = keys.get(self.prefix)
+            if live is None:
+                live = keys[self.prefix] = weakref.WeakSet()
+                self.metric_manager.register_gauge(self.prefix + '.in_use',
+                                                   lambda: sum(telemetry.in_use for telemetry in list(live)))
+                self.metric_manager.register_gauge(self.prefix + '.idle',
+                                                   lambda: sum(telemetry.idle for telemetry in list(live)))
+            live.add(self)
+
+    @property
+    def idle(self):
+        """ The open connections which are not in use, derived from the counters """
+        return max(self.created - self.closed - self.soft_closed - self.in_use, 0)
+
+    def _inc(self, name):
+        for counter in self.metric_manager.resolve('counter', self.prefix + '.' + name):
+            counter.inc()
+
+    def on_acquired(self, wait_time):
+        with self._lock:
+            self.acquired += 1
+            self.in_use += 1
+            self.wait_time_total += wait_time
+            if wait_time > self.wait_time_max:
+                self.wait_time_max = wait_time
+        for histogram in self.metric_manager.resolve('histogram', self._wait_key):
+            histogram.add(wait_time)
+
+    def on_acquire_failed(self, exc):
+        timeout = _is_timeout(exc)
+        with self._lock:
+            self.acquire_errors += 1
+            if timeout:
+                self.acquire_timeouts += 1
+        self._inc('acquire_errors')
+        if timeout:
+            self._inc('acquire_timeouts')
+
+    def on_released(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def on_created(self):
+        with self._lock:
+            self.created += 1
+        self._inc('created')
+
+    def on_closed(self, soft=False, count=1):
+        if count <= 0:
+            return
+        with self._lock:
+            if soft:
+                self.soft_closed += count
+            else:
+                self.closed += count
+        for counter in self.metric_manager.resolve('counter', self.prefix + ('.soft_closed' if soft else '.closed')):
+            counter.inc(count)
+
+    def snapshot(self):
+        """
+        The current counters of the pool.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'pool': self.pool_name,
+                'host': self.host,
+                'port': self.port,
+                'size': self.pool_size,
+                'in_use': self.in_use,
+                'idle': self.idle,
+                'created': self.created,
+                'closed': self.closed,
+                'soft_closed': self.soft_closed,
+                'acquired': self.acquired,
+                'acquire_errors': self.acquire_errors,
+                'acquire_timeouts': self.acquire_timeouts,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max,
+                'wait_time_mean': self.wait_time_total / self.acquired if self.acquired else 0.0,
+            }
+
+
+class InstrumentedPoolMixin(object):
+    """
+    Records the telemetry of a RexPro connection pool, mixed into the pool class by `instrument_pool_class`.
+
+    The pool takes two more keyword arguments: `pool_name` (tagging its metrics) and `metric_manager` (defaults to
+    `mogwai.connection.metric_manager`).
+    """
+
+    def __init__(self, *args, **kwargs):
+        pool_name = kwargs.pop('pool_name', 'default')
+        metric_manager = kwargs.pop('metric_manager', None)
+        if metric_manager is None:
+            from mogwai import connection
+            metric_manager = connection.metric_manager
+        # before the pool is set up, pools may open connections right away
+        self.telemetry = PoolTelemetry(pool_name, kwargs.get('host'), kwargs.get('port'), kwargs.get('pool_size'),
+                                       metric_manager)
+        super(InstrumentedPoolMixin, self).__init__(*args, **kwargs)
+
+    def stats(self):
+        """
+        Snapshot of the pool telemetry: connections in use, idle, created and closed, acquire wait times and errors.
+
+        :rtype: dict
+        """
+        return self.telemetry.snapshot()
+
+    @contextmanager
+    def connection(self, *args, **kwargs):
+        telemetry = self.telemetry
+        start_time = time.time()
+        acquired = False
+        try:
+            with super(InstrumentedPoolMixin, self).connection(*args, **kwargs) as conn:
+                telemetry.on_acquired(time.time() - start_time)
+                acquired = True
+                try:
+                    yield conn
+                finally:
+                    telemetry.on_released()
+        except Exception as e:
+            if not acquired:
+                telemetry.on_acquire_failed(e)
+            raise
+
+    def create_connection(self, *args, **kwargs):
+        conn = super(InstrumentedPoolMixin, self).create_connection(*args, **kwargs)
+        self.telemetry.on_created()
+        return conn
+
+    def close_connection(self, conn, soft=False, **kwargs):
+        result = super(InstrumentedPoolMixin, self).close_connection(conn, soft=soft, **kwargs)
+        self.telemetry.on_closed(soft=soft)
+        return result
+
+    def close_all(self, *args, **kwargs):
+        idle = self.telemetry.idle
+        result = super(InstrumentedPoolMixin, self).close_all(*args, **kwargs)
+        self.telemetry.on_closed(count=idle)
+        return result
+
+
+def instrument_pool_class(pool_class):
+    """
+    The subclass of a RexPro connection pool class recording its telemetry, created once per pool class.
+
+    :param pool_class: The connection pool class
+    :type pool_class: type
+    :rtype: type
+    """
+    if issubclass(pool_class, InstrumentedPoolMixin):
+        return pool_class
+    klass = _instrumented_classes.get(pool_class)
+    if klass is None:
+        klass = type(str('Instrumented{}'.format(pool_class.__name__)), (InstrumentedPoolMixin, pool_class), {})
+        _instrumented_classes[pool_class] = klass
+    return klass
+
+
+__all__ = ['PoolTelemetry', 'InstrumentedPoolMixin', 'instrument_pool_class']
@@ -0,0 +1,257 @@
+from __future__ import unicode_literals
+import logging
+import threading
+
+from mogwai._compat import string_types, queue
+from mogwai.exceptions import MogwaiMetricsException
+
+logger = logging.getLogger(__name__)
+
+
+class BaseScheduler(object):
+    """ Runs the flush of a Metric Reporter on an interval, off the threads running queries
+
+    A tick requests a flush, which runs in the background worker of the scheduler. At most `max_pending` flushes wait
+    for a slow metrics sink, the ticks past that are dropped (and counted) instead of queueing up. Each flush sends
+    the aggregated metrics of all registries in one batch, and an exception raised by the sink is logged without
+    stopping the scheduler.
+    """
+
+    def __init__(self, max_pending=1):
+        """
+        :param max_pending: The number of flushes which may wait for the running flush
+        :type max_pending: int
+        """
+        self.max_pending = max_pending
+        self.callback = None
+        self.interval = None
+        self.running = False
+        self.flushes = 0
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self, callback, interval):
+        """ Start calling `callback` every `interval` seconds
+
+        :param callback: The flush, ie. the `send_metrics` method of the reporter
+        :type callback: C{func}
+        :param interval: The number of seconds between flushes
+        :type interval: float | long | int
+        """
+        if self.running:
+            return
+        self.callback = callback
+        self.interval = interval
+        self.running = True
+        self._pending = 0
+        try:
+            self._start()
+        except Exception:
+            self.running = False
+            raise
+
+    def stop(self):
+        """ Stop flushing, a running flush is not interrupted """
+        if not self.running:
+            return
+        self.running = False
+        self._stop()
+
+    def _start(self):  # pragma: no cover
+        raise NotImplementedError
+
+    def _stop(self):  # pragma: no cover
+        raise NotImplementedError
+
+    def _acquire_slot(self):
+        """ Reserve a place for a flush, False when `max_pending` flushes already wait
+
+        :rtype: bool
+        """
+        with self._lock:
+            # the running flush and the waiting ones
+            if self._pending > self.max_pending:
+                self.dropped += 1
+                logger.debug("Metrics flush dropped, %d flushes pending", self._pending)
+                return False
+            self._pending += 1
+            return True
+
+    def _flush(self):
+        """ Run the flush in a reserved place """
+        try:
+            self.callback()
+        except Exception:
+            logger.exception("Metrics flush failed")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.flushes += 1
+
+
+class ThreadScheduler(BaseScheduler):
+    """ Flushes from a daemon thread """
+
+    def _start(self):
+        self._stopped = threading.Event()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._loop, name='mogwai-metrics')
+        self._worker.daemon = True
+        self._worker.start()
+        self._ticker = threading.Thread(target=self._tick_loop, name='mogwai-metrics-ticker')
+        self._ticker.daemon = True
+        self._ticker.start()
+
+    def _stop(self):
+        self._stopped.set()
+        self._queue.put(None)
+
+    def _tick_loop(self):
+        stopped = self._stopped
+        while not stopped.wait(self.interval):
+            if self._acquire_slot():
+                self._queue.put(True)
+
+    def _loop(self):
+        while self._queue.get() is not None and self.running:
+            self._flush()
+
+
+class GeventScheduler(BaseScheduler):
+    """ Flushes from a gevent greenlet, use with monkey patched sockets so a slow sink yields to the other greenlets """
+
+    def _start(self):
+        import gevent
+        from gevent.queue import Queue
+        self._queue = Queue()
+        self._ticker = gevent.spawn(self._tick_loop)
+        self._worker = gevent.spawn(self._loop)
+
+    def _stop(self):
+        import gevent
+        gevent.kill(self._ticker)
+        self._queue.put(None)
+
+    def _tick_loop(self):
+        import gevent
+        while True:
+            gevent.sleep(self.interval)
+            if self._acquire_slot():
+                self._queue.put(True)
+
+    def _loop(self):
+        while self._queue.get() is not None and self.running:
+            self._flush()
+
+
+class AsyncioScheduler(BaseScheduler):
+    """ Ticks on an asyncio event loop, the flushes run in an executor so they never block the loop """
+
+    def __init__(self, loop=None, executor=None, *args, **kwargs):
+        """
+        :param loop: The event loop, the running event loop (of the thread calling `start`) by default
+        :type loop: asyncio.AbstractEventLoop
+        :param executor: The executor running the flushes, the default executor of the loop by default
+        :type executor: concurrent.futures.Executor
+        """
+        self.loop = loop
+        self.executor = executor
+        self._handle = None
+        super(AsyncioScheduler, self).__init__(*args, **kwargs)
+
+    def _start(self):
+        if self.loop is None:
+            self.loop = self._get_running_loop()
+            if self.loop is None:
+                raise MogwaiMetricsException("AsyncioScheduler needs a loop: pass loop=... or start the reporter "
+                                             "from a coroutine running on the event loop")
+        self.loop.call_soon_threadsafe(self._schedule)
+
+    @staticmethod
+    def _get_running_loop():
+        """ The event loop running in this thread, None when there is none
+
+        :rtype: asyncio.AbstractEventLoop | None
+        """
+        import asyncio
+        get_running_loop = getattr(asyncio, 'get_running_loop', None)
+        if get_running_loop is not None:
+            try:
+                return get_running_loop()
+            except RuntimeError:
+                return None
+        # Pythons before 3.7: the event loop of the thread, if it runs
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            return None
+        return loop if loop.is_running() else None
+
+    def _stop(self):
+        self.loop.call_soon_threadsafe(self._cancel)
+
+    def _schedule(self):
+        if self.running:
+            self._handle = self.loop.call_later(self.interval, self._tick)
+
+    def _cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _tick(self):
+        self._schedule()
+        if self._acquire_slot():
+            self.loop.run_in_executor(self.executor, self._flush)
+
+
+class TwistedScheduler(BaseScheduler):
+    """ Ticks with a LoopingCall of the running Twisted reactor, the flushes run in the reactor thread pool """
+
+    def _start(self):
+        from twisted.internet import task
+        self._task = task.LoopingCall(self._tick)
+        self._task.start(self.interval)
+
+    def _stop(self):
+        if self._task.running:
+            self._task.stop()
+
+    def _tick(self):
+        from twisted.internet import threads
+        if self._acquire_slot():
+            threads.deferToThread(self._flush)
+
+
+SCHEDULERS = {
+    'thread': ThreadScheduler,
+    'gevent': GeventScheduler,
+    'asyncio': AsyncioScheduler,
+    'twisted': TwistedScheduler,
+}
+
+
+def get_scheduler(scheduler=None):
+    """ The scheduler of a Metric Reporter
+
+    :param scheduler: A scheduler, the name of a scheduler backend (thread, gevent, asyncio or twisted) or None for a
+        daemon thread
+    :type scheduler: BaseScheduler | basestring | None
+    :rtype: BaseScheduler
+    """
+    if scheduler is None:
+        return ThreadScheduler()
+    if isinstance(scheduler, string_types):
+        try:
+            return SCHEDULERS[scheduler]()
+        except KeyError:
+            raise MogwaiMetricsException("Unknown metrics scheduler {}, expected one of {}".format(
+                scheduler, ', '.join(sorted(SCHEDULERS))))
+    if not isinstance(scheduler, BaseScheduler):
+        raise MogwaiMetricsException("{} Not derived from Mogwai BaseScheduler".format(scheduler))
+    return scheduler
+
+
+__all__ = ['BaseScheduler', 'ThreadScheduler', 'GeventScheduler', 'AsyncioScheduler', 'TwistedScheduler',
+           'get_scheduler']
@@ -0,0 +1,172 @@
+from __future__ import unicode_literals
+import logging
+import re
+import threading
+import time
+from itertools import islice
+
+from mogwai._compat import string_types, iteritems
+
+logger = logging.getLogger(__name__)
+
+# parameter names whose values are never logged
+DEFAULT_REDACT = r'pass|secret|token|auth|credential'
+
+_whitespace_re = re.compile(r'\s+')
+_literal_re = re.compile(r'\'(?:[^\'\\]|\\.)*\'|"(?:[^"\\]|\\.)*"|\b\d+(?:\.\d+)?\b')
+
+
+def fingerprint_script(script, max_length=200):
+    """
+    Normalise a gremlin script into a fingerprint shared by the calls differing only in literals and whitespace.
+
+    :param script: The gremlin script
+    :type script: str
+    :param max_length: The fingerprint is truncated to this many characters
+    :type max_length: int
+    :rtype: str
+    """
+    if not script:
+        return ''
+    fingerprint = _whitespace_re.sub(' ', _literal_re.sub('?', script)).strip()
+    return fingerprint[:max_length]
+
+
+def _param_size(value):
+    """ The number of items (or characters) of a parameter value, None for values without a length """
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class SlowQueryLog(object):
+    """
+    Logs the calls (queries and gremlin methods) slower than a threshold, as a trace listener of the MetricManager.
+
+    Each logged call includes its fingerprint (the gremlin method or normalised script), the time spent in each
+    phase, the host, the size of every parameter and a sample of the parameter values, with the values of parameters
+    and of nested keys matching `redact` replaced. At most `max_per_second` calls are logged per second (with bursts
+    up to `burst`), the number of slow calls suppressed since is included in the next logged one.
+
+    Register it with `connection.setup(slow_query_log=SlowQueryLog(threshold=0.5))`, or with
+    `connection.metric_manager.add_trace_listener`. The log is written to the `mogwai.metrics.slow_query` logger at
+    WARNING level, the record is also attached to the log record as `slow_query` for structured handlers.
+    """
+
+    def __init__(self, threshold=1.0, max_per_second=1.0, burst=10, sample_params=5, max_value_length=64,
+                 redact=DEFAULT_REDACT, log=None, clock=time.time):
+        """
+        :param threshold: The number of seconds above which a call is slow
+        :type threshold: float
+        :param max_per_second: The rate at which slow calls are logged
+        :type max_per_second: float
+        :param burst: The number of slow calls which can be logged at once
+        :type burst: int
+        :param sample_params: The number of parameter values to include
+        :type sample_params: int
+        :param max_value_length: Parameter values are truncated to this many characters
+        :type max_value_length: int
+        :param redact: Regular expression matching the names of the parameters whose values are never logged
+        :type redact: str | None
+        :param log: The logger to use, defaults to the module logger
+        :type log: logging.Logger
+        """
+        self.threshold = threshold
+        self.max_per_second = float(max_per_second)
+        self.burst = burst
+        self.sample_params = sample_params
+        self.max_value_length = max_value_length
+        self.redact = re.compile(redact, re.IGNORECASE) if redact else None
+        self.log = log or logger
+        self.clock = clock
+        self.suppressed = 0
+        self._tokens = float(burst)
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def __call__(self, trace):
+        """
+        Log the trace if it is slow and the rate limit allows it.
+
+        :param trace: The completed trace
+        :type trace: mogwai.metrics.manager.QueryTrace
+        """
+        if trace.elapsed is None or trace.elapsed < self.threshold:
+            return
+        suppressed = self._acquire()
+        if suppressed is None:
+            return
+        record = self.build_record(trace)
+        record['suppressed'] = suppressed
+        self.log.warning("Slow query (%.3fs) %s on %s:%s, params %s%s", record['elapsed'], record['fingerprint'],
+                         record['host'], record['port'], record['params'],
+                         " ({} more slow queries not logged)".format(suppressed) if suppressed else '',
+                         extra={'slow_query': record})
+
+    def _acquire(self):
+        """
+        Take a token from the rate limiting bucket.
+
+        :returns: The number of slow calls suppressed since the last logged one, None when this one is suppressed
+        :rtype: int | None
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self.max_per_second)
+            self._last_refill = now
+            if self._tokens < 1:
+                self.suppressed += 1
+                return None
+            self._tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+    def build_record(self, trace):
+        """
+        Describe a call, without the parameter values which should not be logged.
+
+        :param trace: The completed trace
+        :type trace: mogwai.metrics.manager.QueryTrace
+        :rtype: dict
+        """
+        params = trace.params or {}
+        sample = {}
+        for name in sorted(params)[:self.sample_params]:
+            sample[name] = self._sample_value(name, params[name])
+        return {
+            'fingerprint': trace.context or fingerprint_script(trace.script),
+            'context': trace.context,
+            'elapsed': trace.elapsed,
+            'phases': dict(trace.phases),
+            'payloads': dict(trace.payloads),
+            'host': trace.host,
+            'port': trace.port,
+            'param_sizes': dict((name, _param_size(value)) for name, value in iteritems(params)),
+            'params': sample,
+        }
+
+    def _redacted(self, name):
+        return self.redact is not None and isinstance(name, string_types) and self.redact.search(name) is not None
+
+    def _redact(self, value):
+        """ Redact the values under matching keys of nested dicts, ie. the properties in the `attrs` of a save """
+        # the sample is truncated to max_value_length characters, every item takes at least one of them
+        limit = self.max_value_length
+        if isinstance(value, dict):
+            return dict((k, '<redacted>' if self._redacted(k) else self._redact(v))
+                        for k, v in islice(iteritems(value), limit))
+        if isinstance(value, (list, tuple)):
+            return [self._redact(v) for v in islice(value, limit)]
+        return value
+
+    def _sample_value(self, name, value):
+        if self._redacted(name):
+            return '<redacted>'
+        value = repr(self._redact(value))
+        if len(value) > self.max_value_length:
+            value = value[:self.max_value_length] + '...'
+        return value
+
+
+__all__ = ['SlowQueryLog', 'fingerprint_script', 'DEFAULT_REDACT']
@@ -0,0 +1,246 @@
+from __future__ import unicode_literals
+from functools import wraps
+import logging
+import sys
+import threading
+
+from mogwai._compat import array_types
+
+logger = logging.getLogger(__name__)
+
+# the installed tracer and the active span of each thread (or greenlet)
+_tracer = None
+_local = threading.local()
+
+
+class BaseTracer(object):
+    """
+    Adapter between mogwai and a tracer (OpenTelemetry, OpenTracing, Zipkin...), installed with `set_tracer`.
+
+    mogwai opens nested spans for model operations, gremlin method calls and queries. The adapter starts and finishes
+    the spans of its tracer, for example with OpenTelemetry::
+
+        class OpenTelemetryTracer(BaseTracer):
+
+            def __init__(self, tracer):
+                self.tracer = tracer
+
+            def start_span(self, name, parent=None, attributes=None):
+                context = trace.set_span_in_context(parent) if parent is not None else None
+                return self.tracer.start_span(name, context=context, attributes=attributes)
+
+            def set_attribute(self, span, key, value):
+                span.set_attribute(key, value)
+
+            def finish_span(self, span, exc=None):
+                if exc is not None:
+                    span.record_exception(exc)
+                span.end()
+    """
+
+    def start_span(self, name, parent=None, attributes=None):
+        """
+        Start a span.
+
+        :param name: The span name, ie. `mogwai.vertex.save`
+        :type name: str
+        :param parent: The span of the enclosing mogwai operation, None to use the active span of the tracer
+        :param attributes: The attributes known when the span starts
+        :type attributes: dict | None
+        :returns: The span of the tracer
+        """
+        raise NotImplementedError
+
+    def set_attribute(self, span, key, value):
+        """
+        Set an attribute of a started span, ie. the result count.
+
+        :param span: The span returned by start_span
+        :param key: The attribute name
+        :type key: str
+        :param value: The attribute value
+        """
+        pass
+
+    def finish_span(self, span, exc=None):
+        """
+        Finish a span.
+
+        :param span: The span returned by start_span
+        :param exc: The exception raised by the operation, if any
+        :type exc: Exception | None
+        """
+        pass
+
+
+class _NoopSpan(object):
+    """ The span returned when no tracer is installed """
+    __slots__ = ()
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span(object):
+    """ A span of the installed tracer, active on the current thread (or greenlet) between enter and exit """
+    __slots__ = ('tracer', 'name', 'attributes', 'native', 'parent')
+    recording = True
+
+    def __init__(self, tracer, name, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.native = None
+        self.parent = None
+
+    def __enter__(self):
+        local = _local
+        parent = self.parent = getattr(local, 'span', None)
+        try:
+            self.native = self.tracer.start_span(self.name, parent.native if parent is not None else None,
+                                                 self.attributes)
+        except Exception:
+            logger.exception("Tracer %r failed to start a span", self.tracer)
+        local.span = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.span = self.parent
+        if self.native is not None:
+            try:
+                self.tracer.finish_span(self.native, exc_value)
+            except Exception:
+                logger.exception("Tracer %r failed to finish a span", self.tracer)
+        return False
+
+    def set_attribute(self, key, value):
+        """
+        :param key: The attribute name
+        :type key: str
+        :param value: The attribute value
+        """
+        if self.native is not None:
+            try:
+                self.tracer.set_attribute(self.native, key, value)
+            except Exception:
+                logger.exception("Tracer %r failed to set a span attribute", self.tracer)
+
+    def set_attributes(self, attributes):
+        """
+        :param attributes: The attribute names and values
+        :type attributes: dict
+        """
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+
+def _new_local(concurrency=None):
+    """
+    Storage of the active span, local to greenlets when gevent or eventlet are used without patching threading.
+
+    :param concurrency: The connection concurrency (sync, gevent or eventlet), detected when None
+    :type concurrency: str | None
+    """
+    if concurrency in (None, 'gevent') and 'gevent' in sys.modules:
+        from gevent import monkey
+        if not monkey.is_module_patched('threading'):
+            from gevent.local import local
+            return local()
+    if concurrency in (None, 'eventlet') and 'eventlet' in sys.modules:
+        from eventlet import patcher
+        if not patcher.is_monkey_patched('thread'):
+            from eventlet.corolocal import local
+            return local()
+    return threading.local()
+
+
+def set_tracer(tracer, concurrency=None):
+    """
+    Install the tracer spans are reported to, None to stop tracing.
+
+    :param tracer: The tracer adapter
+    :type tracer: BaseTracer | None
+    :param concurrency: The connection concurrency (sync, gevent or eventlet), detected when None
+    :type concurrency: str | None
+    """
+    global _tracer, _local
+    if tracer is not None and not isinstance(tracer, BaseTracer):
+        raise TypeError("{!r} is not derived from mogwai BaseTracer".format(tracer))
+    _local = _new_local(concurrency)
+    _tracer = tracer
+
+
+def get_tracer():
+    """
+    :rtype: BaseTracer | None
+    """
+    return _tracer
+
+
+def span(name, attributes=None):
+    """
+    A span to use as a context manager, which does nothing when no tracer is installed.
+
+    :param name: The span name
+    :type name: str
+    :param attributes: The attributes known when the span starts
+    :type attributes: dict | None
+    :rtype: Span
+    """
+    tracer = _tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return Span(tracer, name, attributes)
+
+
+def current_span():
+    """
+    The innermost active span of the current thread (or greenlet).
+
+    :rtype: Span
+    """
+    if _tracer is None:
+        return NOOP_SPAN
+    return getattr(_local, 'span', None) or NOOP_SPAN
+
+
+def traced(name, attributes=None):
+    """
+    Decorator running the function in a span, adding the result count when it returns a list or tuple.
+
+    Without a tracer the function is called directly.
+
+    :param name: The span name
+    :type name: str
+    :param attributes: Returns the span attributes of the call arguments
+    :type attributes: callable | None
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with Span(tracer, name, attributes(*args, **kwargs) if attributes is not None else None) as s:
+                result = fn(*args, **kwargs)
+                if isinstance(result, array_types):
+                    s.set_attribute('result_count', len(result))
+                return result
+        return wrapper
+    return decorator
+
+
+__all__ = ['BaseTracer', 'Span', 'NOOP_SPAN', 'set_tracer', 'get_tracer', 'span', 'current_span', 'traced']
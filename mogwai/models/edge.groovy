@@ -1,5 +1,5 @@
 
-def _save_edge(id, outV, inV, label, attrs, exclusive) {
+def _save_edge(id, outV, inV, label, attrs, exclusive, ack, fields) {
 	/**
 	 * Saves an edge between two vertices
 	 *
@@ -8,6 +8,8 @@ def _save_edge(id, outV, inV, label, attrs, exclusive) {
 	 * :param outV: edge outv id
 	 * :param attrs: map of parameters to set on the edge
 	 * :param exclusive: if true, this will check for an existing edge of the same label and modify it, instead of creating another edge
+	 * :param ack: if true, only the edge id and the requested fields are returned instead of the edge
+	 * :param fields: list of properties to return with the acknowledgement
 	 */
 	try{
 	    def e
@@ -29,6 +31,9 @@ def _save_edge(id, outV, inV, label, attrs, exclusive) {
             }
 		}
 		g.stopTransaction(SUCCESS)
+		if (ack) {
+			return [id: e.id, values: fields ? fields.collectEntries{[it, e.getProperty(it)]} : null]
+		}
 		return g.getEdge(e.id)
 	} catch (err) {
 		g.stopTransaction(FAILURE)
@@ -54,8 +59,14 @@ def _delete_edge(id) {
      }
 }
 
-def _get_edges_between(out_v, in_v, label, page_num, per_page) {
+def _get_edges_between(out_v, in_v, label, page_num, per_page, cursor) {
     try {
+        if (cursor != null) {
+            // keyset pagination, see _keyset_page in element.groovy
+            def target = g.v(in_v)
+            def query = g.v(out_v).query().direction(Direction.OUT).labels(label)
+            return _keyset_page(query, cursor, { it.getVertex(Direction.IN).id == target.id }, 0, per_page)
+        }
         def results = g.v(out_v).outE(label).as('e').inV().retain([g.v(in_v)]).back('e')
         if (page_num != null && per_page != null) {
             def start = (page_num - 1) * per_page
@@ -2,11 +2,21 @@ import logging
 from mogwai._compat import array_types, integer_types, float_types, string_types, add_metaclass
 from mogwai import connection
 from mogwai.exceptions import ElementDefinitionException, MogwaiQueryError, ValidationError
-from mogwai.gremlin import GremlinMethod
+from mogwai.gremlin import GremlinMethod, GremlinValue
+from mogwai.metrics.tracing import traced
 from .element import Element, ElementMetaClass, edge_types
+from . import serialization
+from .pagination import decode_cursor, to_page
 
 logger = logging.getLogger(__name__)
 
+# get_between without cursor pagination, None requests the first page
+_NO_CURSOR = object()
+
+
+def _span_attributes(edge, *args, **kwargs):
+    return {'label': edge.get_label()}
+
 
 class EdgeMetaClass(ElementMetaClass):
     """Metaclass for edges."""
@@ -17,13 +27,16 @@ class EdgeMetaClass(ElementMetaClass):
 
         klass = super(EdgeMetaClass, mcs).__new__(mcs, name, bases, body)
 
+        # computed once, get_label is used by every save, query and deserialization
+        klass._label_name = klass._type_name(klass.label)
+
         if not klass.__abstract__:
-            label = klass.get_label()
+            label = klass._label_name
             if label in edge_types and str(edge_types[label]) != str(klass):
                 # Catch imports from other modules, don't reload module into vertex types, only load once
                 logger.debug(ElementDefinitionException("%s is already registered as a edge: \n\tmcs: %s\n\tname: %s\n\tbases: %s\n\tbody: %s" % (label, mcs, name, bases, body)))
             else:
-                edge_types[klass.get_label()] = klass
+                edge_types[label] = klass
         return klass
 
 
@@ -42,10 +55,11 @@ class Edge(Element):
 
     gremlin_path = 'edge.groovy'
 
-    _save_edge = GremlinMethod()
+    _save_edge = GremlinMethod(defaults={'ack': False, 'fields': None})
     _delete_edge = GremlinMethod()
-    _get_edges_between = GremlinMethod(classmethod=True)
+    _get_edges_between = GremlinMethod(classmethod=True, helpers=[('element.groovy', '_keyset_page')])
     _find_edge_by_value = GremlinMethod(classmethod=True)
+    _aggregate = GremlinValue(classmethod=True, path='element.groovy')
 
 
     FACTORY_CLASS = None
@@ -75,18 +89,14 @@ class Edge(Element):
                                                        getattr(self, '_values', {}))
 
     def __getstate__(self):
-        state = {u'_id': self.id,
-                 u'_type': u'edge',
-                 u'_outV': str(self.outV().id),
-                 u'_inV': str(self.inV().id),
-                 u'_label': self.get_label(),
-                 u'_properties': self.as_save_params()}
-        return state
+        return serialization.get_state(self)
 
     def __setstate__(self, state):
-        data = self.translate_db_fields(state)
-        self.__init__(state['_outV'], state['_inV'], **data)
-        return self
+        if isinstance(state, dict):  # pickled by an older version
+            data = self.translate_db_fields(state)
+            self.__init__(state['_outV'], state['_inV'], **data)
+            return self
+        return serialization.set_state(self, state)
 
     @classmethod
     def find_by_value(cls, field, value, as_dict=False):
@@ -121,6 +131,7 @@ class Edge(Element):
         return results
 
     @classmethod
+    @traced('mogwai.edge.all', _span_attributes)
     def all(cls, ids, as_dict=False, *args, **kwargs):
         """
         Load all edges with the given edge_ids from the graph. By default this will return a list of edges but if
@@ -156,6 +167,10 @@ class Edge(Element):
 
         return objects
 
+    @classmethod
+    def _aggregate_elements(cls, where, group_by, count, sum_key, min_key, max_key):
+        return cls._aggregate(False, cls.get_label(), where, group_by, count, sum_key, min_key, max_key)
+
     @classmethod
     def get_label(cls):
         """
@@ -164,13 +179,17 @@ class Edge(Element):
         :rtype: str
 
         """
-        return cls._type_name(cls.label)
+        # the class six.add_metaclass creates first never went through the metaclass that sets the name
+        return cls.__dict__.get('_label_name') or cls._type_name(cls.label)
 
     @classmethod
-    def get_between(cls, outV, inV, page_num=None, per_page=None):
+    def get_between(cls, outV, inV, page_num=None, per_page=None, cursor=_NO_CURSOR, sort_key=None):
         """
         Return all the edges with a given label between two vertices.
 
+        Pass a `cursor` (None for the first page) to use cursor based pagination instead of page numbers, a Page is
+        returned whose `cursor` fetches the following page.
+
         :param outV: The vertex the edge comes out of.
         :type outV: Vertex
         :param inV: The vertex the edge goes into.
@@ -179,14 +198,32 @@ class Edge(Element):
         :type page_num: int
         :param per_page: The number of results per page
         :type per_page: int
-        :rtype: list
+        :param cursor: The continuation token of the previous page, None for the first page
+        :type cursor: str | None
+        :param sort_key: The indexed edge property to order cursor paginated results by
+        :type sort_key: str | None
+        :rtype: list | mogwai.models.pagination.Page
 
         """
+        if cursor is not _NO_CURSOR:
+            if not per_page:
+                raise MogwaiQueryError('cursor pagination requires a page size')
+            result = cls._get_edges_between(out_v=outV,
+                                            in_v=inV,
+                                            label=cls.get_label(),
+                                            page_num=None,
+                                            per_page=per_page,
+                                            cursor=decode_cursor(cursor, sort_key))
+            return to_page(result, sort_key, per_page)
+        if sort_key is not None:
+            raise MogwaiQueryError('sort_key requires cursor pagination, pass cursor=None for the first page')
+
         return cls._get_edges_between(out_v=outV,
                                       in_v=inV,
                                       label=cls.get_label(),
                                       page_num=page_num,
-                                      per_page=per_page)
+                                      per_page=per_page,
+                                      cursor=None)
 
     def validate(self):
         """
@@ -199,15 +236,38 @@ class Edge(Element):
                 raise ValidationError('out vertex must be set before saving new edges')
         super(Edge, self).validate()
 
+    @traced('mogwai.edge.save', _span_attributes)
     def save(self, *args, **kwargs):
         """
         Save this edge to the graph database.
+
+        With `ack=True` (or `__save_ack__` set on the model) the server only acknowledges the save with the edge id
+        instead of returning the whole edge, and this edge is updated in place and returned.
+
+        :param ack: Only acknowledge the save, defaults to the model's `__save_ack__`
+        :type ack: bool
+        :param fields: Names of properties computed on the server to read back with the acknowledgement
+        :type fields: list[str]
+        :rtype: Edge
         """
+        ack = kwargs.pop('ack', self.__save_ack__)
+        fields = kwargs.pop('fields', None)
         super(Edge, self).save()
+        params = self.as_save_params()
+        if ack:
+            result = self._save_edge(self._outV,
+                                     self._inV,
+                                     self.get_label(),
+                                     params,
+                                     exclusive=self.__exclusive__,
+                                     ack=True,
+                                     fields=self._get_ack_fields(fields),
+                                     **kwargs)
+            return self._acknowledge_save(result, params)
         return self._save_edge(self._outV,
                                self._inV,
                                self.get_label(),
-                               self.as_save_params(),
+                               params,
                                exclusive=self.__exclusive__,
                                **kwargs)
 
@@ -228,6 +288,7 @@ class Edge(Element):
             return {}
 
     @classmethod
+    @traced('mogwai.edge.get', _span_attributes)
     def get(cls, id, *args, **kwargs):
         """
         Look up edge by titan assigned ID. Raises a DoesNotExist exception if a edge with the given edge id was not
@@ -0,0 +1,117 @@
+def _aggregate(vertices, element_type, where, group_by, count, sum_key, min_key, max_key) {
+    /**
+     * aggregates the vertices or edges of a type on the server
+     *
+     * counting alone uses groupCount, sums, minimums and maximums are reduced in a single pass
+     *
+     * :param vertices: aggregate vertices (true) or edges (false)
+     * :param element_type: the vertex element type or the edge label to aggregate
+     * :param where: list of [key, value, compare] predicates the elements must match
+     * :param group_by: the property to group by (optional)
+     * :param count: count the elements in each group
+     * :param sum_key: the property to sum (optional)
+     * :param min_key: the property to get the minimum of (optional)
+     * :param max_key: the property to get the maximum of (optional)
+     * :returns: map of group value (null without group_by) to the aggregates
+     */
+    def compare = [EQUAL: T.eq, NOT_EQUAL: T.neq, GREATER_THAN: T.gt, GREATER_THAN_EQUAL: T.gte,
+                   LESS_THAN: T.lt, LESS_THAN_EQUAL: T.lte]
+    def pipe = vertices ? g.V('element_type', element_type) : g.E('label', element_type)
+    for (p in where) {
+        pipe = pipe.has(p[0], compare[p[2]], p[1])
+    }
+    def group = { group_by == null ? null : it.getProperty(group_by) }
+
+    if (sum_key == null && min_key == null && max_key == null) {
+        return pipe.groupCount(group).cap.next()
+    }
+
+    def results = [:]
+    pipe.sideEffect{
+        def key = group(it)
+        def agg = results[key]
+        if (agg == null) {
+            agg = [:]
+            if (count) {
+                agg.count = 0L
+            }
+            results[key] = agg
+        }
+        if (count) {
+            agg.count += 1
+        }
+        if (sum_key != null) {
+            def value = it.getProperty(sum_key)
+            if (value != null) {
+                agg.sum = agg.sum == null ? value : agg.sum + value
+            }
+        }
+        if (min_key != null) {
+            def value = it.getProperty(min_key)
+            if (value != null && (agg.min == null || value < agg.min)) {
+                agg.min = value
+            }
+        }
+        if (max_key != null) {
+            def value = it.getProperty(max_key)
+            if (value != null && (agg.max == null || value > agg.max)) {
+                agg.max = value
+            }
+        }
+    }.iterate()
+    return results
+}
+
+def _keyset_page(query, cursor, accept, start, end) {
+    /**
+     * reads one page of the edges of a vertex query for keyset pagination
+     *
+     * the page holds the edges strictly after the cursor in (sort key value, edge id) order, so it resumes correctly
+     * when the last seen edge was deleted or changed. value >= cursor.value is served from the vertex-centric index
+     * on the sort key, without a sort key every edge of the query is read and ordered by id
+     *
+     * :param query: the vertex query of the edges to page through
+     * :param cursor: keyset pagination position (sort `key`, last seen `value` and edge `id`)
+     * :param accept: closure the edges must match (optional), applied before the range
+     * :param start: the number of edges to skip
+     * :param end: the number of edges up to the end of the page
+     * :returns: map of the page `elements` (edges) and the position of the `last` one
+     */
+    def key = cursor.key
+    if (key != null && cursor.value != null) {
+        query = query.has(key, cursor.value, Query.Compare.GREATER_THAN_EQUAL)
+    }
+    def sortValue = { e -> key == null ? null : e.getProperty(key) }
+    def edgeId = { e -> e.id instanceof Number ? e.id : e.id.toString() }
+    def lastId = cursor.id == null ? null : cursor.id.toString()
+    if (lastId != null && lastId.isLong()) {
+        lastId = lastId.toLong()
+    }
+
+    def results = query.edges()._()
+    if (cursor.id != null) {
+        results = results.filter{
+            def c = sortValue(it) <=> cursor.value
+            c > 0 || (c == 0 && (edgeId(it) <=> lastId) > 0)
+        }
+    }
+    if (accept != null) {
+        results = results.filter(accept)
+    }
+
+    // the index orders by the sort key only: take the ties of the last edge as well, then order by (value, id)
+    def page = []
+    for (e in results) {
+        if (page.size() >= end && key != null && sortValue(e) != sortValue(page.last())) {
+            break
+        }
+        page << e
+    }
+    page.sort{ a, b -> (sortValue(a) <=> sortValue(b)) ?: (edgeId(a) <=> edgeId(b)) }
+    page = page.size() > start ? page[start..<Math.min(end, page.size())] : []
+    def last = page ? page.last() : null
+    return [
+        elements: page,
+        last: last == null ? null : [value: sortValue(last), id: last.id.toString()]
+    ]
+}
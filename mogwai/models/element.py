@@ -2,11 +2,11 @@ from __future__ import unicode_literals
 from collections import OrderedDict
 import re
 
-from mogwai._compat import string_types, print_, add_metaclass
+from mogwai._compat import string_types, print_, add_metaclass, intern_string
 from mogwai.tools import import_string
 from mogwai import properties
 from mogwai.exceptions import MogwaiException, SaveStrategyException, \
-    ModelException, ElementDefinitionException
+    ModelException, ElementDefinitionException, MogwaiQueryError
 from mogwai.gremlin import BaseGremlinMethod
 from mogwai import connection
 
@@ -19,10 +19,12 @@ import logging
 import warnings
 logger = logging.getLogger(__name__)
 
-#dict of node and edge types for rehydrating results
+#dict of node and edge types for rehydrating results, keyed by the interned type names
 vertex_types = {}
 edge_types = {}
 
+_camelcase = re.compile(r'([a-z])([A-Z])')
+
 
 class BaseElement(object):
     """
@@ -32,6 +34,9 @@ class BaseElement(object):
     #__enum_id_only__ = True
     FACTORY_CLASS = None
 
+    # if set to True, saves only return the element id (and any requested fields) instead of the whole element
+    __save_ack__ = False
+
     class DoesNotExist(MogwaiException):
         """
         Object not found in database
@@ -123,12 +128,9 @@ class BaseElement(object):
         if manual_name:
             pf_name = manual_name.lower()
         else:
-            camelcase = re.compile(r'([a-z])([A-Z])')
-            ccase = lambda s: camelcase.sub(lambda v: '{}_{}'.format(v.group(1), v.group(2).lower()), s)
-
-            pf_name += ccase(cls.__name__)
+            pf_name += _camelcase.sub(lambda v: '{}_{}'.format(v.group(1), v.group(2).lower()), cls.__name__)
             pf_name = pf_name.lower()
-        return pf_name.lstrip('_')
+        return intern_string(pf_name.lstrip('_'))
 
     def validate_field(self, field_name, val):
         """
@@ -238,6 +240,91 @@ class BaseElement(object):
 
         return dst_data
 
+    @staticmethod
+    def _get_predicates(has):
+        """
+        Translate property predicates into [key, value, compare] lists for the groovy functions.
+
+        :param has: A dict of property names and values that must be equal, or a list of (key, value, compare) tuples
+        :type has: dict | list | None
+        :rtype: list | None
+
+        """
+        if not has:
+            return None
+        if isinstance(has, dict):
+            return [[key, value, EQUAL] for key, value in has.items()]
+        predicates = []
+        for predicate in has:
+            if len(predicate) == 2:
+                predicates.append([predicate[0], predicate[1], EQUAL])
+            else:
+                predicates.append(list(predicate))
+        return predicates
+
+    @classmethod
+    def _aggregate_elements(cls, where, group_by, count, sum_key, min_key, max_key):
+        """
+        Base method for aggregating the elements of this type on the server.
+
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def aggregate(cls, group_by=None, count=True, sum=None, min=None, max=None, where=None):
+        """
+        Aggregate the elements of this type on the server, only the (small) aggregated map is returned.
+
+        Counting alone compiles to a Gremlin groupCount step, the other aggregates are reduced in a single pass.
+
+        :param group_by: The property to group the elements by (optional)
+        :type group_by: str | None
+        :param count: Count the elements (in each group)
+        :type count: bool
+        :param sum: The property to sum (optional)
+        :type sum: str | None
+        :param min: The property to get the minimum of (optional)
+        :type min: str | None
+        :param max: The property to get the maximum of (optional)
+        :type max: str | None
+        :param where: Predicates the elements must match, a dict of equalities or (key, value, compare) tuples
+        :type where: dict | list | None
+        :returns: The aggregates (count, sum, min, max), keyed by group value if `group_by` is given
+        :rtype: dict
+
+        """
+        if not (count or sum or min or max):
+            raise MogwaiQueryError('aggregate requires count or at least one of sum, min and max')
+
+        field = lambda key: cls.get_property_by_name(key) if key is not None else None
+
+        def to_database(key, value):
+            prop = cls._properties.get(key)
+            return prop.to_database(value) if prop is not None else value
+
+        where = [[field(p[0]), to_database(p[0], p[1]), p[2]] for p in cls._get_predicates(where) or []]
+        results = cls._aggregate_elements(where, field(group_by), bool(count), field(sum), field(min), field(max))
+        results = results or {}
+
+        if count and not (sum or min or max):
+            # groupCount result
+            results = {key: {'count': value} for key, value in results.items()}
+        else:
+            props = [(name, cls._properties.get(key)) for name, key in (('sum', sum), ('min', min), ('max', max))
+                     if key is not None]
+            for aggregates in results.values():
+                for name, prop in props:
+                    if prop is not None and aggregates.get(name) is not None:
+                        aggregates[name] = prop.to_python(aggregates[name])
+
+        if group_by is None:
+            return results.get(None, {'count': 0} if count else {})
+
+        prop = cls._properties.get(group_by)
+        if prop is not None:
+            results = {prop.to_python(key) if key is not None else None: value for key, value in results.items()}
+        return results
+
     @classmethod
     def create(cls, *args, **kwargs):
         """Create a new element with the given information."""
@@ -258,6 +345,43 @@ class BaseElement(object):
         self.pre_save()
         return self
 
+    def _get_ack_fields(self, fields):
+        """
+        Translate the names of the properties to read back after an acknowledged save into database field names.
+
+        :param fields: The property names, None for no properties
+        :type fields: list[str] | None
+        :rtype: list[str] | None
+        """
+        if not fields:
+            return None
+        return [self.get_property_by_name(name) for name in fields]
+
+    def _acknowledge_save(self, result, params):
+        """
+        Update this element from the `[id: ..., values: ...]` acknowledgement returned by an acknowledged save.
+
+        Properties which were written are marked as unchanged, server computed values are read back into the element.
+
+        :param result: The acknowledgement returned by the server
+        :type result: dict
+        :param params: The database field names to values which were saved
+        :type params: dict
+        :rtype: Element
+        """
+        self._id = result['id']
+        values = result.get('values') or {}
+        for name, prop in self._properties.items():
+            db_field = prop.db_field_name or name
+            if db_field in values:
+                value = values[db_field]
+                setattr(self, name, prop.to_python(value) if value is not None else None)
+            elif db_field not in params:
+                continue
+            vm = self._values[name]
+            vm.previous_value = vm.value
+        return self
+
     def pre_update(self, **values):
         """ Override this to perform pre-update validation """
         pass
@@ -494,6 +618,7 @@ class ElementMetaClass(type):
         def wrap_method(method):
             def method_wrapper(self, *args, **kwargs):
                 return method(self, *args, **kwargs)
+            method_wrapper.map = method.map
             return method_wrapper
 
         for k, v in body.items():
@@ -528,23 +653,53 @@ class Element(BaseElement):
         """ Deserializes rexpro response into vertex or edge objects """
 
         dtype = data.get('_type')
-        data_id = data.get('_id')
         properties = data.get('_properties')
         if dtype == 'vertex':
             vertex_type = properties['element_type']
-            if vertex_type not in vertex_types:
+            klass = vertex_types.get(vertex_type)
+            if klass is None:
                 raise ElementDefinitionException('Vertex "%s" not defined' % vertex_type)
 
-            translated_data = vertex_types[vertex_type].translate_db_fields(data)
-            return vertex_types[vertex_type](**translated_data)
-
         elif dtype == 'edge':
             edge_type = data.get('_label') or properties['_label']
-            if edge_type not in edge_types:
+            klass = edge_types.get(edge_type)
+            if klass is None:
                 raise ElementDefinitionException('Edge "%s" not defined' % edge_type)
 
-            translated_data = edge_types[edge_type].translate_db_fields(data)
-            return edge_types[edge_type](data['_outV'], data['_inV'], **translated_data)
-
         else:
             raise TypeError("Can't deserialize '%s'" % dtype)
+
+        return klass._get_factory()(data)
+
+    @classmethod
+    def _get_factory(cls):
+        """
+        Returns the function building instances of this class from rexpro responses, created once per class.
+
+        Equivalent to instantiating the class with `translate_db_fields`, the renamed fields are looked up once.
+
+        :rtype: callable
+        """
+        factory = cls.__dict__.get('_element_factory')
+        if factory is None:
+            renames = [(prop.db_field_name, name) for name, prop in cls._properties.items()
+                       if prop.db_field_name != name]
+            # models overriding translate_db_fields keep using it
+            custom_translation = cls.translate_db_fields.__func__ is not BaseElement.translate_db_fields.__func__
+
+            def factory(data):
+                if custom_translation:
+                    values = cls.translate_db_fields(data)
+                else:
+                    values = dict(data.get('_properties') or {})
+                    if data.get('_id', None):
+                        values['_id'] = data['_id']
+                    for db_field_name, name in renames:
+                        if db_field_name in values:
+                            values[name] = values.pop(db_field_name)
+                if data.get('_type') == 'edge':
+                    return cls(data['_outV'], data['_inV'], **values)
+                return cls(**values)
+
+            cls._element_factory = factory
+        return factory
@@ -33,19 +33,39 @@ class PaginatedVertex(Vertex):
             'limit': kwargs.get('per_page'),
             'offset': to_offset(kwargs.get('page_num'), kwargs.get('per_page')),
             'types': kwargs.get('types'),
+            'has': kwargs.get('has'),
         }
 
     __abstract__ = True
 
+    def _paginated_traversal(self, operation, labels, kwargs):
+        """
+        Dispatches to cursor based pagination when a `cursor` keyword is given, page number pagination otherwise.
+
+        Pass ``cursor=None`` to fetch the first page, then the `cursor` of the returned page for each following one.
+        """
+        if 'cursor' in kwargs:
+            return self._keyset_traversal(operation,
+                                          labels,
+                                          kwargs.get('per_page'),
+                                          cursor=kwargs.get('cursor'),
+                                          sort_key=kwargs.get('sort_key'),
+                                          types=kwargs.get('types'),
+                                          has=kwargs.get('has'))
+        return getattr(super(PaginatedVertex, self), operation)(*labels, **self._transform_kwargs(kwargs))
+
     def outV(self, *labels, **kwargs):
         """
         :param labels: pass in the labels to follow in as positional arguments
         :param page_num: the page number to return
         :param per_page: the number of objects to return per page
         :param types: the element types this method is allowed to return
-        :rtype: vertex.Vertex
+        :param has: predicates on the traversed edge properties
+        :param cursor: the continuation token of the previous page (None for the first page) for cursor pagination
+        :param sort_key: the indexed edge property to order cursor paginated results by
+        :rtype: list[vertex.Vertex] | pagination.Page
         """
-        return super(PaginatedVertex, self).outV(*labels, **self._transform_kwargs(kwargs))
+        return self._paginated_traversal('outV', labels, kwargs)
 
     def outE(self, *labels, **kwargs):
         """
@@ -53,9 +73,12 @@ class PaginatedVertex(Vertex):
         :param page_num: the page number to return
         :param per_page: the number of objects to return per page
         :param types: the element types this method is allowed to return
-        :rtype: edge.Edge
+        :param has: predicates on the traversed edge properties
+        :param cursor: the continuation token of the previous page (None for the first page) for cursor pagination
+        :param sort_key: the indexed edge property to order cursor paginated results by
+        :rtype: list[edge.Edge] | pagination.Page
         """
-        return super(PaginatedVertex, self).outE(*labels, **self._transform_kwargs(kwargs))
+        return self._paginated_traversal('outE', labels, kwargs)
 
     def inV(self, *labels, **kwargs):
         """
@@ -63,9 +86,12 @@ class PaginatedVertex(Vertex):
         :param page_num: the page number to return
         :param per_page: the number of objects to return per page
         :param types: the element types this method is allowed to return
-        :rtype: vertex.Vertex
+        :param has: predicates on the traversed edge properties
+        :param cursor: the continuation token of the previous page (None for the first page) for cursor pagination
+        :param sort_key: the indexed edge property to order cursor paginated results by
+        :rtype: list[vertex.Vertex] | pagination.Page
         """
-        return super(PaginatedVertex, self).inV(*labels, **self._transform_kwargs(kwargs))
+        return self._paginated_traversal('inV', labels, kwargs)
 
     def inE(self, *labels, **kwargs):
         """
@@ -73,9 +99,12 @@ class PaginatedVertex(Vertex):
         :param page_num: the page number to return
         :param per_page: the number of objects to return per page
         :param types: the element types this method is allowed to return
-        :rtype: edge.Edge
+        :param has: predicates on the traversed edge properties
+        :param cursor: the continuation token of the previous page (None for the first page) for cursor pagination
+        :param sort_key: the indexed edge property to order cursor paginated results by
+        :rtype: list[edge.Edge] | pagination.Page
         """
-        return super(PaginatedVertex, self).inE(*labels, **self._transform_kwargs(kwargs))
+        return self._paginated_traversal('inE', labels, kwargs)
 
     def bothV(self, *labels, **kwargs):
         """
@@ -83,9 +112,12 @@ class PaginatedVertex(Vertex):
         :param page_num: the page number to return
         :param per_page: the number of objects to return per page
         :param types: the element types this method is allowed to return
-        :rtype: list[vertex.Vertex]
+        :param has: predicates on the traversed edge properties
+        :param cursor: the continuation token of the previous page (None for the first page) for cursor pagination
+        :param sort_key: the indexed edge property to order cursor paginated results by
+        :rtype: list[vertex.Vertex] | pagination.Page
         """
-        return super(PaginatedVertex, self).bothV(*labels, **self._transform_kwargs(kwargs))
+        return self._paginated_traversal('bothV', labels, kwargs)
 
     def bothE(self, *labels, **kwargs):
         """
@@ -93,6 +125,9 @@ class PaginatedVertex(Vertex):
         :param page_num: the page number to return
         :param per_page: the number of objects to return per page
         :param types: the element types this method is allowed to return
-        :rtype: list[edge.Edge]
+        :param has: predicates on the traversed edge properties
+        :param cursor: the continuation token of the previous page (None for the first page) for cursor pagination
+        :param sort_key: the indexed edge property to order cursor paginated results by
+        :rtype: list[edge.Edge] | pagination.Page
         """
-        return super(PaginatedVertex, self).bothE(*labels, **self._transform_kwargs(kwargs))
\ No newline at end of file
+        return self._paginated_traversal('bothE', labels, kwargs)
\ No newline at end of file
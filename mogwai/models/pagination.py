@@ -0,0 +1,79 @@
+from __future__ import unicode_literals
+import base64
+import binascii
+import json
+
+from mogwai.exceptions import MogwaiQueryError
+
+
+class Page(list):
+    """
+    A page of results from a keyset (cursor based) paginated query.
+
+    Behaves like a normal list of results, the opaque token to request the following page with is available as
+    `cursor`. The cursor is None when there are no more results.
+    """
+
+    def __init__(self, results=(), cursor=None):
+        super(Page, self).__init__(results)
+        self.cursor = cursor
+
+    def __repr__(self):
+        return "{}({}, cursor={!r})".format(self.__class__.__name__, super(Page, self).__repr__(), self.cursor)
+
+
+def encode_cursor(key, value, element_id):
+    """
+    Encode the position of the last seen element as an opaque continuation token.
+
+    :param key: The sort key the results are ordered by, if any
+    :type key: str | None
+    :param value: The value of the sort key on the last seen element
+    :type value: mixed
+    :param element_id: The id of the last seen edge
+    :type element_id: str | int | long
+    :rtype: str
+    """
+    data = json.dumps([key, value, element_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort_key=None):
+    """
+    Decode a continuation token into the map expected by the keyset pagination groovy functions.
+
+    :param cursor: The continuation token, None for the first page
+    :type cursor: str | None
+    :param sort_key: The sort key the results are ordered by, if any
+    :type sort_key: str | None
+    :rtype: dict
+    """
+    if cursor is None:
+        return {'key': sort_key, 'value': None, 'id': None}
+    try:
+        key, value, element_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (TypeError, ValueError, AttributeError, binascii.Error):
+        raise MogwaiQueryError("Invalid pagination cursor: {!r}".format(cursor))
+    if key != sort_key:
+        raise MogwaiQueryError("Pagination cursor was created for sort key {!r}, not {!r}".format(key, sort_key))
+    return {'key': key, 'value': value, 'id': element_id}
+
+
+def to_page(result, sort_key, per_page):
+    """
+    Build a Page from the raw `[elements: ..., last: ...]` map returned by a keyset paginated groovy function.
+
+    :param result: The deserialized result map
+    :type result: dict
+    :param sort_key: The sort key the results are ordered by, if any
+    :type sort_key: str | None
+    :param per_page: The requested page size
+    :type per_page: int
+    :rtype: Page
+    """
+    elements = result.get('elements') or []
+    last = result.get('last')
+    cursor = None
+    if last is not None and len(elements) >= per_page:
+        cursor = encode_cursor(sort_key, last.get('value'), last.get('id'))
+    return Page(elements, cursor)
@@ -1,16 +1,34 @@
 from __future__ import unicode_literals
 import logging
+import os
 
 from mogwai._compat import float_types, print_
 from mogwai import connection
 from mogwai.exceptions import MogwaiQueryError
+from mogwai.gremlin.groovy import get_function
 from .element import Element, EQUAL, NOT_EQUAL, GREATER_THAN, GREATER_THAN_EQUAL, LESS_THAN, LESS_THAN_EQUAL,\
     OUT, IN, BOTH
+from .pagination import decode_cursor, to_page
 import copy
 from mogwai.properties.base import GraphProperty
 
 logger = logging.getLogger(__name__)
 
+# keyset pagination, see _keyset_page in element.groovy
+KEYSET_SCRIPT = """{keyset_page}
+def v = g.v(id)
+def other = {{ e -> e.getVertex(Direction.OUT).id == v.id ? e.getVertex(Direction.IN) : e.getVertex(Direction.OUT) }}
+def page = _keyset_page({partial}, cursor, null, 0, limit)
+if ({vertices}) {{
+    page.elements = page.elements.collect{{other(it)}}
+}}
+page"""
+
+
+def _get_keyset_page():
+    """ The definition of the _keyset_page groovy function """
+    return get_function(os.path.join(os.path.dirname(__file__), 'element.groovy'), '_keyset_page').defn
+
 
 class Query(object):
     """
@@ -19,6 +37,7 @@ class Query(object):
     This method seems more flexible, and consistent w/ the rest of Gremlin.
     """
     _limit = None
+    _cursor = None
 
     def __init__(self, vertex):
         self._vertex = vertex
@@ -28,6 +47,21 @@ class Query(object):
         self._direction = []
         self._vars = {}
 
+    def after(self, cursor=None, sort_key=None):
+        """
+        Use cursor based pagination: `edges` and `vertices` return a Page of at most `limit` results following the
+        position encoded in `cursor`. Pass the `cursor` of the returned page to fetch the next one.
+
+        :param cursor: The continuation token of the previous page, None for the first page
+        :type cursor: str | None
+        :param sort_key: The indexed edge property to order the results by
+        :type sort_key: str | None
+        :rtype: Query
+        """
+        q = copy.copy(self)
+        q._cursor = decode_cursor(cursor, sort_key)
+        return q
+
     def count(self, *args, **kwargs):
         """
         :returns: number of matching vertices
@@ -48,10 +82,26 @@ class Query(object):
 
     def edges(self, *args, **kwargs):
         """
-        :rtype: list[edge.Edge]
+        :rtype: list[edge.Edge] | mogwai.models.pagination.Page
         """
         return self._execute('edges', **kwargs)
 
+    def group_count(self, key, edges=False, **kwargs):
+        """
+        Count the matching vertices (or edges) per value of a property, on the server.
+
+        :param key: The property to group by
+        :type key: str
+        :param edges: Group the matching edges instead of the adjacent vertices
+        :type edges: bool
+        :returns: number of matching elements per property value
+        :rtype: dict
+        """
+        tmp = "{}.{}()._().groupCount{{it.getProperty(gkey)}}.cap.next()".format(
+            self._get_partial(), 'edges' if edges else 'vertices')
+        self._vars.update({"id": self._vertex._id, "limit": self._limit, "gkey": key})
+        return connection.execute_query(tmp, self._vars, **kwargs) or {}
+
     def has(self, key, value, compare=EQUAL):
         """
         :param key: key to lookup
@@ -116,7 +166,8 @@ class Query(object):
         return self._execute('vertices', **kwargs)
 
     def _get_partial(self):
-        limit = ".limit(limit)" if self._limit else ""
+        # with a cursor the limit is applied after the keyset predicate
+        limit = ".limit(limit)" if self._limit and self._cursor is None else ""
         dir = ".direction({})".format(self._direction) if self._direction else ""
 
         # do labels
@@ -165,7 +216,20 @@ class Query(object):
 
         return "g.v(id).query(){}{}{}{}{}".format(labels, limit, dir, has, intervals)
 
+    def _execute_page(self, func, **kwargs):
+        if not self._limit:
+            raise MogwaiQueryError("Cursor pagination requires a limit")
+        tmp = KEYSET_SCRIPT.format(keyset_page=_get_keyset_page(), partial=self._get_partial(),
+                                   vertices='true' if func == 'vertices' else 'false')
+        self._vars.update({"id": self._vertex._id, "limit": self._limit, "cursor": self._cursor})
+        result = connection.execute_query(tmp, self._vars, **kwargs)
+
+        result['elements'] = [Element.deserialize(r) for r in result.get('elements') or []]
+        return to_page(result, self._cursor['key'], self._limit)
+
     def _execute(self, func, deserialize=True, *args, **kwargs):
+        if self._cursor is not None and func in ('edges', 'vertices'):
+            return self._execute_page(func, **kwargs)
         tmp = "{}.{}()".format(self._get_partial(), func)
         self._vars.update({"id": self._vertex._id, "limit": self._limit})
         results = connection.execute_query(tmp, self._vars, **kwargs)
@@ -0,0 +1,126 @@
+from __future__ import unicode_literals
+import msgpack
+
+from mogwai._compat import string_types, integer_types
+from mogwai.exceptions import MogwaiException, ElementDefinitionException
+from .element import vertex_types, edge_types
+
+# bump whenever the layout below changes, older payloads are rejected rather than misread
+SERIALIZATION_VERSION = 1
+
+VERTEX = 0
+EDGE = 1
+
+# [version, kind, element type or label, id, out vertex id, in vertex id, values, previous values, manual values]
+_FIELD_COUNT = 9
+
+_unpack_kwargs = None
+
+
+def _unpack(data):
+    """ Unpack msgpack data with unicode strings and non string map keys, across msgpack versions """
+    global _unpack_kwargs
+    if _unpack_kwargs is None:
+        probe = msgpack.packb({1: 'a'}, use_bin_type=True)
+        for kwargs in ({'raw': False, 'strict_map_key': False}, {'raw': False}, {'encoding': 'utf-8'}):
+            try:
+                msgpack.unpackb(probe, **kwargs)
+            except TypeError:
+                continue
+            _unpack_kwargs = kwargs
+            break
+    return msgpack.unpackb(data, **_unpack_kwargs)
+
+
+def _vertex_id(vertex):
+    """ The id of an edge endpoint without loading it, endpoints may be vertices or ids """
+    if vertex is None or isinstance(vertex, string_types + integer_types):
+        return vertex
+    return vertex._id
+
+
+def get_state(element):
+    """
+    Build the compact state of an element: its id, property values, the previous values of the changed properties
+    and its manual values. Never issues queries, edge endpoints are stored as ids.
+
+    :param element: The vertex or edge
+    :type element: mogwai.models.Vertex | mogwai.models.Edge
+    :rtype: list
+    """
+    from mogwai.models.edge import Edge
+
+    values = {}
+    previous = {}
+    for name, prop in element._properties.items():
+        vm = element._values[name]
+        value = vm.value
+        if value is not None:
+            values[name] = prop.to_database(value)
+        if vm.previous_value != value:
+            previous[name] = prop.to_database(vm.previous_value) if vm.previous_value is not None else None
+    manual = {k: vm.value for k, vm in element._manual_values.items()}
+
+    if isinstance(element, Edge):
+        return [SERIALIZATION_VERSION, EDGE, element.get_label(), element._id,
+                _vertex_id(element._outV), _vertex_id(element._inV), values, previous, manual]
+    return [SERIALIZATION_VERSION, VERTEX, element.get_element_type(), element._id,
+            None, None, values, previous, manual]
+
+
+def set_state(element, state):
+    """
+    Restore an element in place from the state built by `get_state`.
+
+    :param element: The (uninitialized) vertex or edge
+    :type element: mogwai.models.Vertex | mogwai.models.Edge
+    :param state: The compact state
+    :type state: list
+    :rtype: mogwai.models.Vertex | mogwai.models.Edge
+    """
+    if len(state) != _FIELD_COUNT or state[0] != SERIALIZATION_VERSION:
+        raise MogwaiException("Unsupported element serialization version: {!r}".format(state[0] if state else None))
+    _, kind, _, element_id, out_v, in_v, values, previous, manual = state
+
+    kwargs = dict(manual)
+    kwargs.update(values)
+    kwargs['_id'] = element_id
+    if kind == EDGE:
+        element.__init__(out_v, in_v, **kwargs)
+    else:
+        element.__init__(**kwargs)
+    for name, value in previous.items():
+        prop = element._properties.get(name)
+        if prop is not None:
+            element._values[name].previous_value = prop.to_python(value) if value is not None else None
+    return element
+
+
+def dumps(element):
+    """
+    Serialize a vertex or edge into compact, versioned msgpack bytes, suitable for memcached, shared memory caches
+    or sending to other processes. Never issues queries.
+
+    :param element: The vertex or edge
+    :type element: mogwai.models.Vertex | mogwai.models.Edge
+    :rtype: bytes
+    """
+    return msgpack.packb(get_state(element), use_bin_type=True)
+
+
+def loads(data):
+    """
+    Deserialize bytes created by `dumps` into a vertex or edge of the model class registered for its type.
+
+    :param data: The serialized element
+    :type data: bytes
+    :rtype: mogwai.models.Vertex | mogwai.models.Edge
+    """
+    state = _unpack(data)
+    if not isinstance(state, list) or len(state) != _FIELD_COUNT:
+        raise MogwaiException("Invalid serialized element")
+    kind, type_name = state[1], state[2]
+    klass = (edge_types if kind == EDGE else vertex_types).get(type_name)
+    if klass is None:
+        raise ElementDefinitionException('{} "{}" not defined'.format('Edge' if kind == EDGE else 'Vertex', type_name))
+    return set_state(klass.__new__(klass), state)
@@ -1,10 +1,12 @@
 
-def _save_vertex(id, attrs) {
+def _save_vertex(id, attrs, ack, fields) {
     /**
      * Saves a vertex
      *
      * :param id: vertex id, if null, a new vertex is created
      * :param attrs: map of parameters to set on the vertex
+     * :param ack: if true, only the vertex id and the requested fields are returned instead of the vertex
+     * :param fields: list of properties to return with the acknowledgement
      */
     try {
         def v = id == null ? g.addVertex() : g.v(id)
@@ -17,6 +19,9 @@ def _save_vertex(id, attrs) {
             }
         }
         g.stopTransaction(SUCCESS)
+        if (ack) {
+            return [id: v.id, values: fields ? fields.collectEntries{[it, v.getProperty(it)]} : null]
+        }
         return g.getVertex(v.id)
     } catch (err) {
         g.stopTransaction(FAILURE)
@@ -73,49 +78,193 @@ def _create_relationship(id, in_direction, edge_label, edge_attrs, vertex_attrs)
     }
 }
 
-def _traversal(id, operation, labels, start, end, element_types) {
+def _traversal(id, operation, labels, start, end, element_types, predicates, cursor) {
     /**
      * performs vertex/edge traversals with optional edge labels and pagination
+     *
+     * labels and edge property predicates are evaluated by the vertex-centric query, the element type filter is
+     * applied before the range so pages are never short
+     *
      * :param id: vertex id to start from
      * :param operation: the traversal operation
-     * :param label: the edge label to filter on
-     * :param page_num: the page number to start on (pagination begins at 1)
-     * :param per_page: number of objects to return per page
-     * :param element_types: list of allowed element types for results
+     * :param label: the edge labels to filter on
+     * :param start: the offset to start returning results at
+     * :param end: the offset to stop returning results at (exclusive)
+     * :param element_types: list of allowed vertex element types for vertex results
+     * :param predicates: list of [key, value, compare] predicates on the traversed edges
+     * :param cursor: keyset pagination position (sort `key`, last seen `value` and edge `id`), or null for offsets
      */
-    def results = g.v(id)
-    def label_args = labels == null ? [] : labels
+    def v = g.v(id)
+    def direction
     switch (operation) {
         case "inV":
-            results = results.in(*label_args)
+        case "inE":
+            direction = Direction.IN
             break
         case "outV":
-            results = results.out(*label_args)
+        case "outE":
+            direction = Direction.OUT
             break
+        case "bothV":
+        case "bothE":
+            direction = Direction.BOTH
+            break
+        default:
+            throw NamingException()
+    }
+    def vertices = operation.endsWith("V")
+
+    def query = v.query().direction(direction)
+    if (labels) {
+        query = query.labels(*labels)
+    }
+    if (predicates != null) {
+        for (p in predicates) {
+            query = query.has(p[0], p[1], Query.Compare.valueOf(p[2]))
+        }
+    }
+
+    if (cursor == null) {
+        def results
+        if (vertices) {
+            results = query.vertices()._()
+            if (element_types != null) {
+                results = element_types.size() == 1 ? results.has('element_type', element_types[0]) : results.has('element_type', T.in, element_types)
+            }
+        } else {
+            if (end != null) {
+                query = query.limit(end)
+            }
+            results = query.edges()._()
+        }
+        if (start != null && end != null) {
+            results = results[start..<end]
+        } else if (start != null) {
+            results = results.range(start, -1)
+        }
+        return results
+    }
+
+    // keyset pagination, see _keyset_page in element.groovy
+    def other = { e -> e.getVertex(Direction.OUT).id == v.id ? e.getVertex(Direction.IN) : e.getVertex(Direction.OUT) }
+    def accept = vertices && element_types != null ? { other(it).getProperty('element_type') in element_types } : null
+    def page = _keyset_page(query, cursor, accept, start, end)
+    if (vertices) {
+        page.elements = page.elements.collect{other(it)}
+    }
+    return page
+}
+
+def _prefetch_traversal(ids, operation, labels, element_types, per_vertex) {
+    /**
+     * performs the same traversal from many vertices in a single request
+     *
+     * :param ids: the vertex ids to start from
+     * :param operation: the traversal operation
+     * :param labels: the edge labels to filter on
+     * :param element_types: list of allowed vertex element types for vertex results
+     * :param per_vertex: maximum number of results per vertex (optional)
+     * :returns: map of vertex id to the list of results
+     */
+    def direction
+    switch (operation) {
+        case "inV":
         case "inE":
-            results = results.inE(*label_args)
+            direction = Direction.IN
             break
+        case "outV":
         case "outE":
-            results = results.outE(*label_args)
-            break
-        case "bothE":
-            results = results.bothE(*label_args)
+            direction = Direction.OUT
             break
         case "bothV":
-            results = results.both(*label_args)
+        case "bothE":
+            direction = Direction.BOTH
             break
         default:
             throw NamingException()
     }
-    if (start != null && end != null) {
-        results = results[start..<end]
+    def vertices = operation.endsWith("V")
+
+    def results = [:]
+    for (id in ids) {
+        def query = g.v(id).query().direction(direction)
+        if (labels) {
+            query = query.labels(*labels)
+        }
+        def pipe
+        if (vertices) {
+            pipe = query.vertices()._()
+            if (element_types != null) {
+                pipe = element_types.size() == 1 ? pipe.has('element_type', element_types[0]) : pipe.has('element_type', T.in, element_types)
+            }
+        } else {
+            if (per_vertex != null) {
+                query = query.limit(per_vertex)
+            }
+            pipe = query.edges()._()
+        }
+        if (per_vertex != null) {
+            pipe = pipe[0..<per_vertex]
+        }
+        results[id.toString()] = pipe.toList()
     }
-    if (element_types != null) {
-        results = results.filter{it.element_type in element_types}
+    return results
+}
+
+def _degree(id, direction, labels) {
+    /**
+     * counts the edges of a vertex without loading them
+     *
+     * :param id: vertex id
+     * :param direction: the edge direction (IN, OUT or BOTH)
+     * :param labels: the edge labels to count (optional)
+     */
+    def query = g.v(id).query().direction(Direction.valueOf(direction))
+    if (labels) {
+        query = query.labels(*labels)
+    }
+    return query.count()
+}
+
+def _degrees(ids, direction, labels) {
+    /**
+     * counts the edges of many vertices without loading them
+     *
+     * :param ids: vertex ids
+     * :param direction: the edge direction (IN, OUT or BOTH)
+     * :param labels: the edge labels to count (optional)
+     * :returns: map of vertex id to edge count
+     */
+    def results = [:]
+    for (id in ids) {
+        def query = g.v(id).query().direction(Direction.valueOf(direction))
+        if (labels) {
+            query = query.labels(*labels)
+        }
+        results[id.toString()] = query.count()
     }
     return results
 }
 
+def _has_edge(id, direction, labels, other) {
+    /**
+     * checks for an edge without loading it, stops at the first match
+     *
+     * :param id: vertex id
+     * :param direction: the edge direction (IN, OUT or BOTH)
+     * :param labels: the edge labels to look for (optional)
+     * :param other: id of the vertex on the other end of the edge (optional)
+     */
+    def query = g.v(id).query().direction(Direction.valueOf(direction))
+    if (labels) {
+        query = query.labels(*labels)
+    }
+    if (other == null) {
+        return query.limit(1).count() > 0
+    }
+    return query.vertices()._().retain([g.v(other)]).hasNext()
+}
+
 def _delete_related(id, operation, labels) {
     try{
         /**
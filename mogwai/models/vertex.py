@@ -5,12 +5,24 @@ import logging
 from mogwai._compat import array_types, string_types, add_metaclass, integer_types, float_types
 from mogwai import connection
 from mogwai.exceptions import MogwaiException, ElementDefinitionException, MogwaiQueryError
-from mogwai.gremlin import GremlinMethod
+from mogwai.gremlin import GremlinMethod, GremlinValue
+from mogwai.constants import IN, OUT, BOTH
+from mogwai.metrics.tracing import traced
 from .element import Element, ElementMetaClass, vertex_types
+from . import serialization
+from .pagination import Page, decode_cursor, to_page
 
 logger = logging.getLogger(__name__)
 
 
+def _span_attributes(vertex, *args, **kwargs):
+    return {'element_type': vertex.get_element_type()}
+
+
+def _traversal_span_attributes(vertex, operation, *args, **kwargs):
+    return {'element_type': vertex.get_element_type(), 'operation': operation}
+
+
 class VertexMetaClass(ElementMetaClass):
     """Metaclass for vertices."""
 
@@ -21,8 +33,11 @@ class VertexMetaClass(ElementMetaClass):
 
         klass = super(VertexMetaClass, mcs).__new__(mcs, name, bases, body)
 
+        # computed once, get_element_type is used by every save, query and deserialization
+        klass._element_type_name = klass._type_name(klass.element_type)
+
         if not klass.__abstract__:
-            element_type = klass.get_element_type()
+            element_type = klass._element_type_name
             if element_type in vertex_types and str(vertex_types[element_type]) != str(klass):
                 logger.debug(ElementDefinitionException("%s is already registered as a vertex: \n\tmcs: %s\n\tname: %s\n\tbases: %s\n\tbody: %s" % (element_type, mcs, name, bases, body)))
             else:
@@ -89,10 +104,15 @@ class Vertex(Element):
 
     gremlin_path = 'vertex.groovy'
 
-    _save_vertex = GremlinMethod()
+    _save_vertex = GremlinMethod(defaults={'ack': False, 'fields': None})
     _delete_vertex = GremlinMethod()
-    _traversal = GremlinMethod()
+    _traversal = GremlinMethod(helpers=[('element.groovy', '_keyset_page')])
     _delete_related = GremlinMethod()
+    _prefetch_traversal = GremlinMethod(classmethod=True)
+    _degree = GremlinValue()
+    _degrees = GremlinValue(classmethod=True)
+    _has_edge = GremlinValue()
+    _aggregate = GremlinValue(classmethod=True, path='element.groovy')
     _find_vertex_by_value = GremlinMethod(classmethod=True)
 
     element_type = None
@@ -106,15 +126,13 @@ class Vertex(Element):
                                                               getattr(self, '_values', {}))
 
     def __getstate__(self):
-        state = {'_id': self.id, '_type': 'vertex'}
-        properties = self.as_save_params()
-        properties['element_type'] = self.get_element_type()
-        state['_properties'] = properties
-        return state
+        return serialization.get_state(self)
 
     def __setstate__(self, state):
-        self.__init__(**self.translate_db_fields(state))
-        return self
+        if isinstance(state, dict):  # pickled by an older version
+            self.__init__(**self.translate_db_fields(state))
+            return self
+        return serialization.set_state(self, state)
 
     @classmethod
     def find_by_value(cls, field, value, as_dict=False):
@@ -148,6 +166,10 @@ class Vertex(Element):
 
         return results
 
+    @classmethod
+    def _aggregate_elements(cls, where, group_by, count, sum_key, min_key, max_key):
+        return cls._aggregate(True, cls.get_element_type(), where, group_by, count, sum_key, min_key, max_key)
+
     @classmethod
     def get_element_type(cls):
         """
@@ -156,9 +178,11 @@ class Vertex(Element):
         @returns: str
 
         """
-        return cls._type_name(cls.element_type)
+        # the class six.add_metaclass creates first never went through the metaclass that sets the name
+        return cls.__dict__.get('_element_type_name') or cls._type_name(cls.element_type)
 
     @classmethod
+    @traced('mogwai.vertex.all', _span_attributes)
     def all(cls, ids=[], as_dict=False, match_length=True, *args, **kwargs):
         """
         Load all vertices with the given ids from the graph. By default this will return a list of vertices but if
@@ -213,6 +237,7 @@ class Vertex(Element):
         return reloaded_values
 
     @classmethod
+    @traced('mogwai.vertex.get', _span_attributes)
     def get(cls, id, *args, **kwargs):
         """
         Look up vertex by its ID. Raises a DoesNotExist exception if a vertex with the given vid was not found.
@@ -239,14 +264,29 @@ class Vertex(Element):
             logger.exception(e)
             raise cls.DoesNotExist
 
+    @traced('mogwai.vertex.save', _span_attributes)
     def save(self, *args, **kwargs):
         """
         Save the current vertex using the configured save strategy, the default save strategy is to re-save all
         fields every time the object is saved.
+
+        With `ack=True` (or `__save_ack__` set on the model) the server only acknowledges the save with the vertex id
+        instead of returning the whole vertex, and this vertex is updated in place and returned.
+
+        :param ack: Only acknowledge the save, defaults to the model's `__save_ack__`
+        :type ack: bool
+        :param fields: Names of properties computed on the server to read back with the acknowledgement
+        :type fields: list[str]
+        :rtype: Vertex
         """
+        ack = kwargs.pop('ack', self.__save_ack__)
+        fields = kwargs.pop('fields', None)
         super(Vertex, self).save()
         params = self.as_save_params()
         params['element_type'] = self.get_element_type()
+        if ack:
+            result = self._save_vertex(params, True, self._get_ack_fields(fields), **kwargs)
+            return self._acknowledge_save(result, params)
         result = self._save_vertex(params, **kwargs)
         self._id = result._id
         for k, v in self._values.items():
@@ -261,25 +301,14 @@ class Vertex(Element):
             return self
         self._delete_vertex()
 
-    def _simple_traversal(self,
-                          operation,
-                          labels,
-                          limit=None,
-                          offset=None,
-                          types=None):
+    @staticmethod
+    def _get_label_strings(labels):
         """
-        Perform simple graph database traversals with ubiquitous pagination.
+        Translate edge classes, instances or strings into edge label strings.
 
-        :param operation: The operation to be performed
-        :type operation: str
         :param labels: The edge labels to be used
         :type labels: list of Edges or strings
-        :param start: The starting offset
-        :type start: int
-        :param max_results: The maximum number of results to return
-        :type max_results: int
-        :param types: The list of allowed result elements
-        :type types: list
+        :rtype: list[str]
 
         """
         from mogwai.models.edge import Edge
@@ -295,6 +324,19 @@ class Vertex(Element):
             else:
                 raise MogwaiException('traversal labels must be edge classes, instances, or strings')
             label_strings.append(label_string)
+        return label_strings
+
+    @staticmethod
+    def _get_allowed_types(types):
+        """
+        Translate a list of Vertex and Edge classes into their element types and labels.
+
+        :param types: The list of allowed result elements
+        :type types: list | None
+        :rtype: list[str] | None
+
+        """
+        from mogwai.models.edge import Edge
 
         allowed_elts = None
         if types is not None:
@@ -304,18 +346,157 @@ class Vertex(Element):
                     allowed_elts += [e.get_element_type()]
                 elif issubclass(e, Edge):
                     allowed_elts += [e.get_label()]
+        return allowed_elts
 
-        if limit is not None and offset is not None:
-            start = offset
-            end = offset + limit
+    @classmethod
+    def _get_traversal_filters(cls, operation, labels, types):
+        """
+        Resolve the edge labels and element types for a traversal.
+
+        For edge traversals the element types are edge labels, so they are merged into the label step where the
+        vertex-centric query evaluates them instead of filtering the results afterwards.
+
+        :param operation: The operation to be performed
+        :type operation: str
+        :param labels: The edge labels to be used
+        :type labels: list of Edges or strings
+        :param types: The list of allowed result elements
+        :type types: list | None
+        :returns: The label strings and allowed element types, or None if no element can match
+        :rtype: tuple(list[str], list[str] | None) | None
+
+        """
+        label_strings = cls._get_label_strings(labels)
+        allowed_elts = cls._get_allowed_types(types)
+
+        if allowed_elts is not None and operation.endswith('E'):
+            if label_strings:
+                label_strings = [label for label in label_strings if label in allowed_elts]
+            else:
+                label_strings = allowed_elts
+            if not label_strings:
+                return None
+            allowed_elts = None
+
+        return label_strings, allowed_elts
+
+    @traced('mogwai.vertex.traversal', _traversal_span_attributes)
+    def _simple_traversal(self,
+                          operation,
+                          labels,
+                          limit=None,
+                          offset=None,
+                          types=None,
+                          has=None):
+        """
+        Perform simple graph database traversals with ubiquitous pagination.
+
+        :param operation: The operation to be performed
+        :type operation: str
+        :param labels: The edge labels to be used
+        :type labels: list of Edges or strings
+        :param start: The starting offset
+        :type start: int
+        :param max_results: The maximum number of results to return
+        :type max_results: int
+        :param types: The list of allowed result elements
+        :type types: list
+        :param has: Predicates on the traversed edge properties
+        :type has: dict | list
+
+        """
+        filters = self._get_traversal_filters(operation, labels, types)
+        if filters is None:
+            return []
+        label_strings, allowed_elts = filters
+
+        if limit is not None:
+            start = offset or 0
+            end = start + limit
         else:
-            start = end = None
+            start = offset or None
+            end = None
 
         return self._traversal(operation,
                                label_strings,
                                start,
                                end,
-                               allowed_elts)
+                               allowed_elts,
+                               self._get_predicates(has),
+                               None)
+
+    @traced('mogwai.vertex.traversal', _traversal_span_attributes)
+    def _keyset_traversal(self, operation, labels, per_page, cursor=None, sort_key=None, types=None, has=None):
+        """
+        Perform a graph traversal returning one page of results, resuming after the position encoded in `cursor`.
+
+        Results are ordered by (`sort_key` value, edge id) and a page holds the edges strictly after the cursor, so
+        they don't shift when elements are added to or removed from earlier pages. When `sort_key` is an edge property
+        backed by a vertex-centric index, every page costs the same as the first one; without a sort key every page
+        reads all the adjacent edges.
+
+        :param operation: The operation to be performed
+        :type operation: str
+        :param labels: The edge labels to be used
+        :type labels: list of Edges or strings
+        :param per_page: The maximum number of results to return
+        :type per_page: int
+        :param cursor: The continuation token of the previous page, None for the first page
+        :type cursor: str | None
+        :param sort_key: The edge property the results are ordered by (optional)
+        :type sort_key: str | None
+        :param types: The list of allowed result elements
+        :type types: list
+        :param has: Predicates on the traversed edge properties
+        :type has: dict | list
+        :rtype: mogwai.models.pagination.Page
+
+        """
+        if not per_page:
+            raise MogwaiQueryError('cursor pagination requires a page size')
+
+        position = decode_cursor(cursor, sort_key)
+        filters = self._get_traversal_filters(operation, labels, types)
+        if filters is None:
+            return Page()
+        label_strings, allowed_elts = filters
+
+        result = self._traversal(operation,
+                                 label_strings,
+                                 0,
+                                 per_page,
+                                 allowed_elts,
+                                 self._get_predicates(has),
+                                 position)
+        return to_page(result, sort_key, per_page)
+
+    @classmethod
+    def _prefetch(cls, vertices, operation, labels, limit=None, types=None):
+        """
+        Perform the same traversal from many vertices in a single round trip.
+
+        :param vertices: The vertices to start from
+        :type vertices: list[mogwai.models.Vertex]
+        :param operation: The operation to be performed
+        :type operation: str
+        :param labels: The edge labels to be used
+        :type labels: list of Edges or strings
+        :param limit: The maximum number of results per vertex
+        :type limit: int | None
+        :param types: The list of allowed result elements
+        :type types: list
+        :returns: The results of the traversal keyed by the id of the vertex it started from
+        :rtype: dict
+
+        """
+        ids = [v._id for v in vertices]
+        filters = cls._get_traversal_filters(operation, labels, types)
+        if filters is None or not ids:
+            return {vid: [] for vid in ids}
+        label_strings, allowed_elts = filters
+
+        results = cls._prefetch_traversal(ids, operation, label_strings, allowed_elts, limit)
+        return {vid: results.get(str(vid)) or [] for vid in ids}
 
     def _simple_deletion(self, operation, labels):
         """
@@ -327,19 +508,7 @@ class Vertex(Element):
         :type labels: str or Edge
 
         """
-        from mogwai.models.edge import Edge
-
-        label_strings = []
-        for label in labels:
-            if inspect.isclass(label) and issubclass(label, Edge):
-                label_string = label.get_label()
-            elif isinstance(label, Edge):
-                label_string = label.get_label()
-            elif isinstance(label, string_types):
-                label_string = label
-            else:
-                raise MogwaiException('traversal labels must be edge classes, instances, or strings')
-            label_strings.append(label_string)
+        label_strings = self._get_label_strings(labels)
 
         return self._delete_related(operation, label_strings)
 
@@ -355,6 +524,8 @@ class Vertex(Element):
         :type offset: int or None
         :param types: A list of allowed element types
         :type types: list
+        :param has: Predicates on the traversed edge properties, a dict of equalities or (key, value, compare) tuples
+        :type has: dict | list
 
         """
         return self._simple_traversal('outV', labels, **kwargs)
@@ -371,6 +542,8 @@ class Vertex(Element):
         :type offset: int or None
         :param types: A list of allowed element types
         :type types: list
+        :param has: Predicates on the traversed edge properties, a dict of equalities or (key, value, compare) tuples
+        :type has: dict | list
 
         """
         return self._simple_traversal('inV', labels, **kwargs)
@@ -387,6 +560,8 @@ class Vertex(Element):
         :type offset: int or None
         :param types: A list of allowed element types
         :type types: list
+        :param has: Predicates on the traversed edge properties, a dict of equalities or (key, value, compare) tuples
+        :type has: dict | list
 
         """
         return self._simple_traversal('outE', labels, **kwargs)
@@ -403,6 +578,8 @@ class Vertex(Element):
         :type offset: int or None
         :param types: A list of allowed element types
         :type types: list
+        :param has: Predicates on the traversed edge properties, a dict of equalities or (key, value, compare) tuples
+        :type has: dict | list
 
         """
         return self._simple_traversal('inE', labels, **kwargs)
@@ -419,6 +596,8 @@ class Vertex(Element):
         :type offset: int or None
         :param types: A list of allowed element types
         :type types: list
+        :param has: Predicates on the traversed edge properties, a dict of equalities or (key, value, compare) tuples
+        :type has: dict | list
 
         """
         return self._simple_traversal('bothE', labels, **kwargs)
@@ -435,10 +614,71 @@ class Vertex(Element):
         :type offset: int or None
         :param types: A list of allowed element types
         :type types: list
+        :param has: Predicates on the traversed edge properties, a dict of equalities or (key, value, compare) tuples
+        :type has: dict | list
 
         """
         return self._simple_traversal('bothV', labels, **kwargs)
 
+    def degree(self, direction=BOTH, *labels):
+        """
+        Return the number of edges of this vertex, counted on the server without loading them.
+
+        :param direction: The edge direction (IN, OUT or BOTH)
+        :type direction: str
+        :param labels: The edge labels to count, all edges if none are given
+        :type labels: str or BaseEdge
+        :rtype: int
+
+        """
+        if direction not in (IN, OUT, BOTH):
+            raise MogwaiQueryError('direction must be one of (%s, %s, %s)' % (IN, OUT, BOTH))
+        return self._degree(direction, self._get_label_strings(labels))
+
+    @classmethod
+    def degrees(cls, vertices, direction=BOTH, *labels):
+        """
+        Return the number of edges of each of the given vertices in a single round trip.
+
+        :param vertices: The vertices to count the edges of
+        :type vertices: list[mogwai.models.Vertex]
+        :param direction: The edge direction (IN, OUT or BOTH)
+        :type direction: str
+        :param labels: The edge labels to count, all edges if none are given
+        :type labels: str or BaseEdge
+        :returns: The edge counts keyed by vertex id
+        :rtype: dict
+
+        """
+        if direction not in (IN, OUT, BOTH):
+            raise MogwaiQueryError('direction must be one of (%s, %s, %s)' % (IN, OUT, BOTH))
+        ids = [v._id for v in vertices]
+        if not ids:
+            return {}
+        results = cls._degrees(ids, direction, cls._get_label_strings(labels))
+        return {vid: results.get(str(vid), 0) for vid in ids}
+
+    def has_edge(self, label=None, other=None, direction=OUT):
+        """
+        Check whether this vertex has an edge with the given label, optionally to a specific vertex.
+
+        The check runs on the server and stops at the first matching edge.
+
+        :param label: The edge label to look for, any label if None
+        :type label: str or BaseEdge or None
+        :param other: The vertex on the other end of the edge (optional)
+        :type other: mogwai.models.Vertex | None
+        :param direction: The edge direction (IN, OUT or BOTH)
+        :type direction: str
+        :rtype: bool
+
+        """
+        if direction not in (IN, OUT, BOTH):
+            raise MogwaiQueryError('direction must be one of (%s, %s, %s)' % (IN, OUT, BOTH))
+        labels = self._get_label_strings([label] if label is not None else [])
+        other_id = other._id if isinstance(other, Vertex) else other
+        return bool(self._has_edge(direction, labels, other_id))
+
     def delete_outE(self, *labels):
         """Delete all outgoing edges with the given label."""
         self._simple_deletion('outE', labels)
@@ -86,11 +86,26 @@ class Relationship(object):
                                   category=SyntaxWarning)
             return tuple(final_classes)
 
+    @staticmethod
+    def _resolve_classes(classes):
+        """ Resolve lazily imported model classes
+
+        :param classes: Tuple of model classes or LazyImportClass references
+        :type classes: tuple
+        :rtype: list
+        """
+        return [kls.klass if isinstance(kls, LazyImportClass) else kls for kls in classes]
+
+    def _edge_labels(self):
+        return [e.get_label() for e in self._resolve_classes(self.edge_classes)]
+
     @requires_vertex
     def vertices(self, limit=None, offset=None, callback=None):
         """ Query and return all Vertices attached to the current Vertex
 
-        TODO: fix this, the instance method isn't properly setup
+        The declared vertex classes are used as a type filter, which is evaluated on the server together with the
+        pagination.
+
         :param limit: Limit the number of returned results
         :type limit: int | long
         :param offset: Query offset of the number of paginated results
@@ -99,22 +114,17 @@ class Relationship(object):
         :type callback: method
         :rtype: List[mogwai.models.Vertex] | Object
         """
-        allowed_elts = []
-        allowed_vlts = []
-        for e in self.edge_classes:
-            allowed_elts += [e.get_label()]
-        for v in self.vertex_classes:
-            allowed_vlts += [v.get_element_type()]
-
-        if limit is not None and offset is not None:
-            start = offset
-            end = offset + limit
-        else:
-            start = end = None
+        from mogwai.models import Vertex
 
         operation = self.direction.lower() + 'V'
 
-        result = getattr(self.top_level_vertex, operation)(*allowed_elts)
+        # bypass overridden traversal methods (ie. PaginatedVertex), they don't share the limit/offset signature
+        result = Vertex._simple_traversal(self.top_level_vertex,
+                                          operation,
+                                          self._edge_labels(),
+                                          limit=limit,
+                                          offset=offset,
+                                          types=self._resolve_classes(self.vertex_classes))
         if callback:
             return callback(result)
         elif self.vertex_callback:
@@ -126,7 +136,6 @@ class Relationship(object):
     def edges(self, limit=None, offset=None, callback=None):
         """ Query and return all Edges attached to the current Vertex
 
-        TODO: fix this, the instance method isn't properly setup
         :param limit: Limit the number of returned results
         :type limit: int | long
         :param offset: Query offset of the number of paginated results
@@ -135,19 +144,15 @@ class Relationship(object):
         :type callback: method
         :rtype: List[mogwai.models.Edge] | Object
         """
-        allowed_elts = []
-        for e in self.edge_classes:
-            allowed_elts += [e.get_label()]
-
-        if limit is not None and offset is not None:
-            start = offset
-            end = offset + limit
-        else:
-            start = end = None
+        from mogwai.models import Vertex
 
         operation = self.direction.lower() + 'E'
 
-        result = getattr(self.top_level_vertex, operation)(*allowed_elts)
+        result = Vertex._simple_traversal(self.top_level_vertex,
+                                          operation,
+                                          self._edge_labels(),
+                                          limit=limit,
+                                          offset=offset)
         if callback:
             return callback(result)
         elif self.edge_callback:
@@ -155,6 +160,59 @@ class Relationship(object):
         else:
             return result
 
+    def prefetch(self, vertices, limit=None, edges=False, callback=None):
+        """ Load this relationship for many vertices in a single round trip
+
+        The relationship doesn't need to be bound to a vertex, ie. `people[0].friends.prefetch(people)` or
+        `Person._relationships['friends'].prefetch(people)` both work.
+
+        :param vertices: The vertices owning the relationship
+        :type vertices: List[mogwai.models.Vertex]
+        :param limit: (Optional) Maximum number of results per vertex
+        :type limit: int | long
+        :param edges: Return the related Edges instead of the Vertices
+        :type edges: bool
+        :param callback: (Optional) Callback function to handle the results of each vertex
+        :type callback: method
+        :returns: The related elements keyed by the id of their owner vertex
+        :rtype: dict
+        """
+        from mogwai.models import Vertex
+
+        if edges:
+            operation = self.direction.lower() + 'E'
+            types = None
+            callback = callback or self.edge_callback
+        else:
+            operation = self.direction.lower() + 'V'
+            types = self._resolve_classes(self.vertex_classes)
+            callback = callback or self.vertex_callback
+
+        vertex_class = vertices[0].__class__ if vertices else Vertex
+        results = vertex_class._prefetch(vertices, operation, self._edge_labels(), limit=limit, types=types)
+        if callback:
+            return {vid: callback(result) for vid, result in results.items()}
+        return results
+
+    @requires_vertex
+    def count(self, edge_types=None):
+        """ Count the Edges of this relationship on the server, without loading them
+
+        :param edge_types: List of Edge classes to count, defaults to all edge classes of the relationship
+        :type edge_types: List[mogwai.models.Edge] | None
+        :rtype: int
+        """
+        if edge_types:
+            if not isinstance(edge_types, array_types):
+                edge_types = (edge_types, )
+            for et in edge_types:
+                if not et in self.edge_classes:
+                    raise MogwaiRelationshipException("Not a recognized edge label type, invalid schema")
+        else:
+            edge_types = self.edge_classes
+        from mogwai.models.query import Query
+        return Query(self.top_level_vertex).labels(*self._resolve_classes(edge_types)).direction(self.direction).count()
+
     def allowed(self, edge_type, vertex_type):
         """ Check whether or not the allowed Edge and Vertex type are compatible with the schema defined
 
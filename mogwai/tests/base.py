@@ -1,4 +1,5 @@
 from __future__ import unicode_literals
+from contextlib import contextmanager
 from unittest import TestCase
 from nose.tools import nottest
 from mogwai.connection import setup, sync_spec
@@ -50,6 +51,29 @@ class TestEdgeModelDouble(Edge):
     test_val = Double(default=0.0)
 
 
+class FakeConnection(object):
+    """ RexPro connection returning a canned response to every query """
+    host = 'localhost'
+    port = 8184
+
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self, query, params, **kwargs):
+        return self.response
+
+
+class FakePool(object):
+    """ Connection pool handing out a FakeConnection, pass it to connection.execute_query as `pool` """
+
+    def __init__(self, response):
+        self.response = response
+
+    @contextmanager
+    def connection(self, transaction=True):
+        yield FakeConnection(self.response)
+
+
 @nottest
 def testcase_docstring_sub(*sub):
     """ If you wanted to lazy load something into a docstring on a test.
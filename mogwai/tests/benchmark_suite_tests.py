@@ -0,0 +1,40 @@
+from __future__ import unicode_literals
+import json
+import os
+import sys
+from nose.plugins.attrib import attr
+from nose.plugins.skip import SkipTest
+
+from mogwai import connection
+from mogwai.tests.base import BaseMogwaiTestCase
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'benchmarks')
+
+
+@attr('unit', 'benchmarks')
+class BenchmarkSuiteTestCase(BaseMogwaiTestCase):
+    """
+    Test that the benchmark suite still runs against the fake RexPro server
+    """
+
+    def setUp(self):
+        if not os.path.isdir(BENCHMARKS_DIR):  # pragma: no cover
+            raise SkipTest('the benchmarks are not installed')
+        sys.path.insert(0, BENCHMARKS_DIR)
+
+    def tearDown(self):
+        sys.path.remove(BENCHMARKS_DIR)
+
+    def test_suite_runs(self):
+        import suite
+
+        pool = connection._connection_pool
+        results = suite.run(number=1, repeat=1)
+
+        self.assertEqual(set(results['benchmarks']), set(name for name, setup in suite.BENCHMARKS))
+        for result in results['benchmarks'].values():
+            self.assertEqual(result['number'], 1)
+            self.assertGreater(result['ns_per_op'], 0)
+        json.dumps(results)
+        # the connection the tests were set up with is restored
+        self.assertIs(connection._connection_pool, pool)
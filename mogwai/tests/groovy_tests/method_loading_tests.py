@@ -8,6 +8,7 @@ from mogwai.exceptions import MogwaiGremlinException
 from mogwai.tests.base import BaseMogwaiTestCase
 
 from mogwai.models import Vertex
+from mogwai import connection
 from mogwai import properties
 from mogwai import gremlin
 
@@ -39,6 +40,174 @@ class TestMethodLoading(BaseMogwaiTestCase):
 
         v1.delete()
 
+    def test_map_runs_method_for_each_instance(self):
+        v1 = GroovyTestModel.create(text='first')
+        v2 = GroovyTestModel.create(text='second')
+
+        self.assertListEqual(GroovyTestModel.return_value.map([v1, v2], 5), [5, 5])
+        self.assertListEqual(GroovyTestModel.return_value.map([(v1, 1), (v2, 2)]), [1, 2])
+        self.assertListEqual(GroovyTestModel.cm_get_self.map([v1.id, v2.id]), [v1, v2])
+        self.assertListEqual(GroovyTestModel.return_value.map([]), [])
+
+        v1.delete()
+        v2.delete()
+
+
+@attr('unit', 'gremlin')
+class TestMethodMapping(BaseMogwaiTestCase):
+
+    def setUp(self):
+        self.queries = []
+        self.execute_query = connection.execute_query
+        connection.execute_query = lambda script, params, **kwargs: \
+            self.queries.append((script, params, kwargs)) or [row[-1] for row in params[gremlin.MAP_PARAMS]]
+
+    def tearDown(self):
+        connection.execute_query = self.execute_query
+
+    def test_single_query(self):
+        vertices = [GroovyTestModel(_id=i) for i in range(3)]
+        self.assertListEqual(GroovyTestModel.return_value.map(vertices, 7), [7, 7, 7])
+
+        self.assertEqual(len(self.queries), 1)
+        script, params, kwargs = self.queries[0]
+        self.assertListEqual(params[gremlin.MAP_PARAMS], [[0, 7], [1, 7], [2, 7]])
+        self.assertIn('def _mogwai_function = { eid, val ->', script)
+        self.assertTrue(script.endswith('_mogwai_params.collect{ _mogwai_function.call(it as Object[]) }'))
+        self.assertEqual(kwargs['context'], 'vertices.groovy_test_model.return_value.map')
+
+    def test_defaults_and_keywords(self):
+        vertices = [GroovyTestModel(_id=1), GroovyTestModel(_id=2)]
+        self.assertListEqual(GroovyTestModel.return_default.map(vertices), [5000, 5000])
+        self.assertListEqual(GroovyTestModel.return_value.map(vertices, val=3), [3, 3])
+
+
+@attr('unit', 'gremlin')
+class TestMethodPhaseTracing(BaseMogwaiTestCase):
+
+    def setUp(self):
+        self.traces = []
+        self.execute_query = connection.execute_query
+        connection.execute_query = lambda script, params, **kwargs: \
+            connection.metric_manager.record_phase('execute', 0) or params['val']
+        connection.metric_manager.add_trace_listener(self.traces.append)
+
+    def tearDown(self):
+        connection.execute_query = self.execute_query
+        connection.metric_manager.remove_trace_listener(self.traces.append)
+
+    def test_method_call_is_one_trace(self):
+        self.assertEqual(GroovyTestModel(_id=1).return_value(5), 5)
+
+        self.assertEqual(len(self.traces), 1)
+        trace = self.traces[0]
+        self.assertEqual(trace.context, 'vertices.groovy_test_model.return_value')
+        self.assertEqual(set(trace.phases), set(['execute', 'deserialize']))
+
+
+@attr('unit', 'gremlin')
+class TestMethodPreloading(BaseMogwaiTestCase):
+
+    def test_preload_sets_up_methods(self):
+        class PreloadTestModel(Vertex):
+            gremlin_path = 'groovy_test_model.groovy'
+            get_self = gremlin.GremlinMethod()
+            return_value = gremlin.GremlinValue()
+
+        self.assertEqual(gremlin.preload_gremlin_methods([PreloadTestModel]), 2)
+        self.assertTrue(PreloadTestModel._gremlin_methods['get_self'].is_setup)
+        self.assertListEqual(PreloadTestModel._gremlin_methods['return_value'].arg_list, ['eid', 'val'])
+
+        # already set up methods are skipped
+        self.assertEqual(gremlin.preload_gremlin_methods([PreloadTestModel]), 0)
+
+    def test_precomputed_call_state(self):
+        method = GroovyTestModel._gremlin_methods['return_default']
+        method._setup()
+        self.assertTrue(method.script.endswith(method.function_body))
+        self.assertTrue(method.script.startswith(method.import_string))
+        self.assertDictEqual(method._arg_positions, {'eid': 0, 'val': 1})
+        self.assertDictEqual(method._static_defaults, {})
+        self.assertListEqual([k for k, v in method._callable_defaults], ['val'])
+
+        class SubGroovyTestModel(GroovyTestModel):
+            pass
+
+        # inherited methods report metrics under the calling model
+        self.assertEqual(method._get_metric_context(GroovyTestModel), 'vertices.groovy_test_model.return_value')
+        self.assertEqual(method._get_metric_context(SubGroovyTestModel()),
+                         'vertices.sub_groovy_test_model.return_value')
+
+
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+@attr('unit', 'gremlin')
+class TestParamConversion(BaseMogwaiTestCase):
+
+    def setUp(self):
+        self.method = GroovyTestModel._gremlin_methods['return_value']
+
+    def test_primitive_arrays(self):
+        ids = tuple(range(1000))
+        self.assertListEqual(self.method.transform_params_to_database({'ids': ids})['ids'], list(ids))
+
+    def test_nested_conversion(self):
+        now = datetime.datetime.now(tz=utc)
+        uu = uuid4()
+        v = GroovyTestModel(_id=10)
+        params = {'values': [1, now, {'uuid': uu}, v], 'none': None}
+        self.assertDictEqual(self.method.transform_params_to_database(params),
+                             {'values': [1, properties.DateTime().to_database(now),
+                                         {'uuid': properties.UUID().to_database(uu)}, 10],
+                              'none': None})
+
+    def test_registered_converter(self):
+        gremlin.register_param_converter(Point, lambda p: [p.x, p.y])
+        self.addCleanup(gremlin.unregister_param_converter, Point)
+        self.assertListEqual(self.method.transform_params_to_database([Point(1, 2), Point(3, 4)]), [[1, 2], [3, 4]])
+
+    def test_unregistered_converter(self):
+        gremlin.register_param_converter(Point, lambda p: [p.x, p.y])
+        self.assertListEqual(self.method.transform_params_to_database([Point(1, 2)]), [[1, 2]])
+        gremlin.unregister_param_converter(Point)
+        point = Point(3, 4)
+        # the resolved converter is forgotten as well
+        self.assertListEqual(self.method.transform_params_to_database([point]), [point])
+
+
+@attr('unit', 'gremlin')
+class TestResultDeserialization(BaseMogwaiTestCase):
+
+    def test_scalars_are_untouched(self):
+        values = [1, 'a', 2.5, None]
+        self.assertIs(gremlin.deserialize_result(values), values)
+        self.assertEqual(gremlin.deserialize_result('a'), 'a')
+
+    def test_nested_elements(self):
+        vertex = {'_id': 5, '_type': 'vertex', '_properties': {'element_type': 'groovy_test_model', 'text': 'abc'}}
+        result = gremlin.deserialize_result({'path': [(1, vertex)], 'count': 1})
+        self.assertEqual(result['count'], 1)
+        self.assertEqual(result['path'][0][0], 1)
+        self.assertIsInstance(result['path'][0][1], GroovyTestModel)
+        self.assertEqual(result['path'][0][1].id, 5)
+        self.assertEqual(result['path'][0][1].text, 'abc')
+
+    def test_deeply_nested_results(self):
+        result = nested = []
+        for i in range(5000):
+            inner = [i]
+            nested.append(inner)
+            nested = inner
+        self.assertIs(gremlin.deserialize_result(result), result)
+
+    def test_raw_option(self):
+        self.assertFalse(GroovyTestModel._gremlin_methods['get_self'].raw)
+        self.assertTrue(gremlin.GremlinMethod(raw=True).raw)
+
 
 @attr('unit', 'gremlin', 'gremlin2')
 class TestMethodArgumentHandling(BaseMogwaiTestCase):
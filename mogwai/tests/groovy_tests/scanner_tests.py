@@ -1,8 +1,11 @@
 from __future__ import unicode_literals
 from mogwai._compat import print_
 import os
+import shutil
+import tempfile
 from nose.plugins.attrib import attr
 from mogwai.tests.base import BaseMogwaiTestCase
+from mogwai.gremlin import groovy
 from mogwai.gremlin.groovy import parse, GroovyImportParser, GroovyFunctionParser,\
     GroovyImport, GroovyFunction, GroovyFileDef
 
@@ -68,4 +71,59 @@ class GroovyScannerTest(BaseMogwaiTestCase):
         self.assertEqual(result, None)
 
         result = GroovyFunctionParser.parse(1)
-        self.assertEqual(result, None)
\ No newline at end of file
+        self.assertEqual(result, None)
+
+
+@attr('unit', 'groovy')
+class GroovyDiskCacheTest(BaseMogwaiTestCase):
+    """
+    Test the on-disk cache of parsed Groovy files
+    """
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.source_dir = tempfile.mkdtemp()
+        self.original_cache_dir = groovy._disk_cache_dir
+        groovy.set_cache_dir(self.cache_dir)
+
+        self.groovy_file = os.path.join(self.source_dir, 'cached.groovy')
+        with open(self.groovy_file, 'w') as f:
+            f.write('import com.wellaware.test;\n\ndef get_value(value) {\n    return value\n}\n')
+
+    def tearDown(self):
+        groovy.set_cache_dir(self.original_cache_dir)
+        groovy._parsed_file_cache.pop(self.groovy_file, None)
+        shutil.rmtree(self.cache_dir)
+        shutil.rmtree(self.source_dir)
+
+    def test_cached_parse_results(self):
+        parsed = parse(self.groovy_file)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        # a fresh process only has the on-disk cache
+        groovy._parsed_file_cache.pop(self.groovy_file)
+        original_parse = GroovyFunctionParser.parse
+        GroovyFunctionParser.parse = classmethod(lambda cls, data: self.fail("cached file was parsed again"))
+        try:
+            cached = parse(self.groovy_file)
+        finally:
+            GroovyFunctionParser.parse = original_parse
+
+        self.assertEqual(cached, parsed)
+        self.assertIsInstance(cached.functions[0], GroovyFunction)
+        self.assertIsInstance(cached.imports[0], GroovyImport)
+
+    def test_changed_file_is_parsed_again(self):
+        parse(self.groovy_file)
+        groovy._parsed_file_cache.pop(self.groovy_file)
+
+        with open(self.groovy_file, 'w') as f:
+            f.write('def get_other_value(value) {\n    return value\n}\n')
+        os.utime(self.groovy_file, (0, 0))
+
+        self.assertEqual(parse(self.groovy_file).functions[0].name, 'get_other_value')
+
+    def test_disabled_cache(self):
+        groovy.set_cache_dir(None)
+        self.assertEqual(parse(self.groovy_file).functions[0].name, 'get_value')
+        self.assertListEqual(os.listdir(self.cache_dir), [])
@@ -3,6 +3,7 @@ import datetime
 from pytz import utc
 from uuid import uuid4
 from nose.plugins.attrib import attr
+from nose.plugins.skip import SkipTest
 
 from mogwai.exceptions import MogwaiGremlinException, MogwaiException
 from mogwai.tests.base import BaseMogwaiTestCase
@@ -114,7 +115,8 @@ class TestTableContainer(BaseMogwaiTestCase):
         ]
         t = Table(deepcopy(data))
 
-        self.assertListEqual(data, t._Table__gremlin_result)
+        self.assertListEqual(data, t.to_records())
+        self.assertListEqual([Row(row) for row in data], list(t))
 
         # test iterator
         self.assertListEqual(data, [r._Row__data for r in t])
@@ -130,3 +132,50 @@ class TestTableContainer(BaseMogwaiTestCase):
 
         self.assertEqual(t[0], t.next())
         self.assertEqual(t[1], t.next())
+
+    def test_gremlin_table_columns(self):
+        data = [
+            OrderedDict([('test', 1), ('a', 'b'), ('c', 3)]),
+            OrderedDict([('test', 2), ('a', 'd'), ('c', 5)])
+        ]
+        t = Table(deepcopy(data))
+
+        self.assertListEqual(t.columns, ['test', 'a', 'c'])
+        self.assertEqual(t.column('test'), (1, 2))
+        self.assertEqual(t.column('a'), ('b', 'd'))
+        with self.assertRaises(MogwaiException):
+            t.column('missing')
+
+        self.assertListEqual(t.to_records(), data)
+        self.assertEqual(t[-1], t[1])
+        self.assertListEqual([r.test for r in t[0:2]], [1, 2])
+        with self.assertRaises(IndexError):
+            t[2]
+
+    def test_gremlin_table_sparse_rows(self):
+        t = Table([{'a': 1}, {'b': 2}])
+
+        self.assertEqual(t.column('a'), (1, None))
+        self.assertEqual(t.column('b'), (None, 2))
+        self.assertDictEqual(t[0]._Row__data, {'a': 1})
+        self.assertDictEqual(t[1]._Row__data, {'b': 2})
+
+        with self.assertRaises(MogwaiException):
+            Table([1, 2])
+
+    def test_gremlin_table_arrays(self):
+        try:
+            import numpy
+        except ImportError:
+            raise SkipTest("numpy is not installed")
+
+        t = Table([{'a': 1, 'b': 2.5}, {'a': 2, 'b': 3.5}])
+        arrays = t.to_arrays()
+        self.assertListEqual(list(arrays.keys()), t.columns)
+        self.assertEqual(arrays['a'].dtype.kind, 'i')
+        self.assertListEqual(arrays['b'].tolist(), [2.5, 3.5])
+
+        records = t.to_numpy()
+        self.assertEqual(len(records), 2)
+        self.assertListEqual(records['a'].tolist(), [1, 2])
+        self.assertEqual(records[1]['b'], 3.5)
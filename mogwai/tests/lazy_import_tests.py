@@ -0,0 +1,34 @@
+from __future__ import unicode_literals
+import json
+import subprocess
+import sys
+from nose.plugins.attrib import attr
+from nose.plugins.skip import SkipTest
+from mogwai.tests.base import BaseMogwaiTestCase
+
+SCRIPT = """
+import json, sys
+import mogwai.models, mogwai.relationships, mogwai.properties
+print(json.dumps(sorted(m for m in ('twisted', 'factory', 'pyformance', 'pyparsing') if m in sys.modules)))
+"""
+
+
+@attr('unit', 'lazy_import')
+class TestLazyImports(BaseMogwaiTestCase):
+
+    def test_defining_models_skips_heavy_dependencies(self):
+        if sys.version_info < (3, 7):
+            raise SkipTest("module __getattr__ needs Python 3.7, older versions import eagerly")
+        # a fresh interpreter, the test run itself has imported everything
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT])
+        self.assertListEqual(json.loads(output.decode('utf-8').strip().splitlines()[-1]), [])
+
+    def test_lazy_attributes_load_on_first_use(self):
+        from mogwai import metrics, tools
+        from pyformance.registry import MetricsRegistry
+        from factory import base
+
+        self.assertIs(metrics.MetricsRegistry, MetricsRegistry)
+        self.assertTrue(issubclass(tools.Factory, base.Factory))
+        with self.assertRaises(AttributeError):
+            metrics.DoesNotExist
@@ -1,8 +1,10 @@
 from __future__ import unicode_literals
 from mogwai._compat import integer_types, PY2, get_method_self
 from nose.plugins.attrib import attr
-from mogwai.metrics.manager import MetricManager
-from mogwai.tests.base import BaseMogwaiTestCase
+import time
+from mogwai import connection
+from mogwai.metrics.manager import MetricManager, PHASE_ACQUIRE, PHASE_EXECUTE, PAYLOAD_REQUEST, PAYLOAD_RESPONSE
+from mogwai.tests.base import BaseMogwaiTestCase, FakePool
 from mogwai.metrics.base import BaseMetricsReporter, MetricsRegistry
 from mogwai.exceptions import MogwaiMetricsException
 
@@ -325,4 +327,127 @@ class MetricManagerTestCase(BaseMogwaiTestCase):
         # test context aware
         for counter in mm.counters('test'):
             from pyformance.meters.counter import Counter
-            self.assertIsInstance(counter, Counter)
\ No newline at end of file
+            self.assertIsInstance(counter, Counter)
+
+    def test_timers_are_cached(self):
+        mm = MetricManager()
+        mm.setup_reporters(BaseMetricsReporter())
+
+        @mm.time_calls
+        def somefunc(i):
+            return i
+
+        somefunc(1, context='test')
+        timers = mm._get_timers('somefunc.timer', 'test')
+        self.assertEqual(len(timers), 2)
+        somefunc(1, context='test')
+        self.assertIs(mm._get_timers('somefunc.timer', 'test'), timers)
+        self.assertEqual(timers[0].get_count(), 2)
+
+        # new reporters resolve new timers
+        mm.setup_reporters(BaseMetricsReporter())
+        self.assertIsNot(mm._get_timers('somefunc.timer', 'test'), timers)
+
+    def test_timer_decorator_without_reporters(self):
+        mm = MetricManager()
+
+        @mm.time_calls
+        def somefunc(i, **kwargs):
+            return kwargs
+
+        self.assertEqual(somefunc(1, context='test'), {})
+        self.assertEqual(mm._timer_cache, {})
+
+    def test_phase_tracing(self):
+        mm = MetricManager()
+        mr = BaseMetricsReporter()
+        mm.setup_reporters(mr)
+        traces = []
+        mm.add_trace_listener(traces.append)
+
+        @mm.time_calls
+        def somefunc(i):
+            self.assertTrue(mm.tracing())
+            mm.record_phase(PHASE_ACQUIRE, time.time())
+            mm.record_phase(PHASE_EXECUTE, time.time())
+            mm.record_phase(PHASE_EXECUTE, time.time())
+            return i
+
+        self.assertEqual(somefunc(1, context='test'), 1)
+        self.assertFalse(mm.tracing())
+
+        self.assertEqual(len(traces), 1)
+        trace = traces[0]
+        self.assertEqual(trace.context, 'test')
+        self.assertEqual(set(trace.phases), set([PHASE_ACQUIRE, PHASE_EXECUTE]))
+        self.assertGreaterEqual(trace.elapsed, sum(trace.phases.values()))
+
+        timestamp, metrics = mr.get_metrics()
+        self.assertEqual(metrics['test.execute.hist']['count'], 1)
+        self.assertEqual(metrics['mogwai.acquire.hist']['count'], 1)
+
+        mm.remove_trace_listener(traces.append)
+        somefunc(1, context='test')
+        self.assertEqual(len(traces), 1)
+
+    def test_payload_histograms(self):
+        mm = MetricManager()
+        mr = BaseMetricsReporter()
+        mm.setup_reporters(mr)
+
+        trace = mm.start_trace('test')
+        trace.add_payload(PAYLOAD_REQUEST, 100)
+        trace.add_payload(PAYLOAD_REQUEST, 20)
+        trace.add_payload(PAYLOAD_RESPONSE, 2000)
+        mm.finish_trace(trace)
+
+        timestamp, metrics = mr.get_metrics()
+        self.assertEqual(metrics['test.request_bytes.hist']['count'], 1)
+        self.assertEqual(metrics['test.request_bytes.hist']['max'], 120)
+        self.assertEqual(metrics['test.response_bytes.hist']['max'], 2000)
+        self.assertEqual(metrics['mogwai.response_bytes.hist']['count'], 1)
+
+    def test_execute_query_payload_sizes(self):
+        response = [{'_id': 1, '_properties': {'name': 'x' * 500}}]
+        pool = FakePool(response)
+        traces = []
+        connection.metric_manager.add_trace_listener(traces.append)
+        try:
+            # not measured by default
+            connection.execute_query('g.v(eid)', {'eid': 1}, pool=pool, context='test')
+            connection.metric_manager.payload_sample_rate = 1.0
+            connection.execute_query('g.v(eid)', {'eid': 1}, pool=pool, context='test')
+        finally:
+            connection.metric_manager.payload_sample_rate = 0.0
+            connection.metric_manager.remove_trace_listener(traces.append)
+
+        self.assertEqual(traces[0].payloads, {})
+        payloads = traces[1].payloads
+        self.assertEqual(payloads[PAYLOAD_REQUEST],
+                         connection.payload_size('g.v(eid)') + connection.payload_size({'eid': 1}))
+        self.assertEqual(payloads[PAYLOAD_RESPONSE], connection.payload_size(response))
+        self.assertGreater(payloads[PAYLOAD_RESPONSE], 500)
+
+    def test_nested_calls_share_the_outer_trace(self):
+        mm = MetricManager()
+        traces = []
+        mm.add_trace_listener(traces.append)
+
+        @mm.time_calls
+        def somefunc(i):
+            mm.record_phase(PHASE_EXECUTE, time.time())
+            return i
+
+        trace = mm.start_trace('outer')
+        somefunc(1, context='inner')
+        self.assertEqual(traces, [])
+        mm.finish_trace(trace)
+
+        self.assertEqual(traces, [trace])
+        self.assertEqual(trace.context, 'outer')
+        self.assertIn(PHASE_EXECUTE, trace.phases)
+
+    def test_no_trace_without_reporters_or_listeners(self):
+        mm = MetricManager()
+        self.assertIsNone(mm.start_trace('test'))
+        self.assertFalse(mm.tracing())
@@ -0,0 +1,159 @@
+from __future__ import unicode_literals
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+from nose.plugins.attrib import attr
+from mogwai.tests.base import BaseMogwaiTestCase
+from mogwai.metrics.manager import MetricManager
+from mogwai.metrics.openmetrics import OpenMetricsReporter
+from mogwai.metrics.multiprocess import MultiprocessRegistry, AggregatedRegistry, MmapDict, bucket_index, \
+    bucket_value, clear_directory, WINDOW
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+
+def record_samples(directory, offset):
+    registry = MultiprocessRegistry(directory)
+    registry.counter('requests').inc()
+    for i in range(1, 1001):
+        registry.timer('query').add(offset + i / 1000.0)
+
+
+@attr('unit', 'metrics')
+class MultiprocessMetricsTestCase(BaseMogwaiTestCase):
+    """
+    Test Multiprocess Metrics
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_buckets(self):
+        for _ in range(1000):
+            value = random.uniform(1e-6, 1e6)
+            self.assertAlmostEqual(bucket_value(bucket_index(value)) / value, 1, delta=0.021)
+        self.assertEqual(bucket_value(bucket_index(0)), 0)
+
+    def test_mmap_dict(self):
+        filename = os.path.join(self.directory, 'test.db')
+        store = MmapDict(filename)
+        store.write_value('a', 1.5)
+        store.add('a', 1)
+        # more entries than the initial size of the file
+        for i in range(5000):
+            store.add('key {}'.format(i), i)
+        self.assertEqual(store.read_value('a'), 2.5)
+        self.assertIsNone(store.read_value('b'))
+        store.close()
+
+        store = MmapDict(filename)
+        self.assertEqual(store.read_value('a'), 2.5)
+        self.assertEqual(store.read_value('key 4999'), 4999)
+        self.assertEqual(len(list(store.items())), 5001)
+
+        # groups are indexed again when the file is opened
+        store.write_value('b0:1', 3)
+        store.write_value('b1:1', 4)
+        store.close()
+        store = MmapDict(filename)
+        store.write_value('b0:2', 5)
+        store.zero_group('b0:')
+        self.assertEqual(store.read_value('b0:1'), 0)
+        self.assertEqual(store.read_value('b0:2'), 0)
+        self.assertEqual(store.read_value('b1:1'), 4)
+        self.assertEqual(store.read_value('a'), 2.5)
+
+    def test_local_metrics(self):
+        registry = MultiprocessRegistry(self.directory)
+        registry.counter('counter').inc(3)
+        registry.meter('meter').mark()
+        for value in (1, 2, 3, 4):
+            registry.histogram('hist').add(value)
+
+        metrics = registry.dump_metrics()
+        self.assertEqual(metrics['counter']['count'], 3)
+        self.assertEqual(metrics['meter']['count'], 1)
+        self.assertEqual(metrics['hist']['count'], 4)
+        self.assertEqual(metrics['hist']['min'], 1)
+        self.assertEqual(metrics['hist']['max'], 4)
+        self.assertEqual(metrics['hist']['avg'], 2.5)
+
+    def test_aggregated_percentiles(self):
+        processes = [multiprocessing.Process(target=record_samples, args=(self.directory, offset))
+                     for offset in (0, 1, 2)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+        metrics = AggregatedRegistry(self.directory).dump_metrics()
+        self.assertEqual(metrics['requests']['count'], 3)
+        timer = metrics['query']
+        self.assertEqual(timer['count'], 3000)
+        self.assertAlmostEqual(timer['min'], 0.001)
+        self.assertAlmostEqual(timer['max'], 3.0)
+        # the samples are spread evenly over 0..3 seconds
+        self.assertAlmostEqual(timer['50_percentile'], 1.5, delta=1.5 * 0.03)
+        self.assertAlmostEqual(timer['99_percentile'], 2.97, delta=2.97 * 0.03)
+
+        clear_directory(self.directory)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_percentiles_cover_the_window(self):
+        clock = FakeClock()
+        registry = MultiprocessRegistry(self.directory, clock=clock)
+        aggregated = AggregatedRegistry(self.directory, clock=clock)
+        for _ in range(100):
+            registry.timer('query').add(0.01)
+
+        clock.now += WINDOW / 2.0
+        for _ in range(100):
+            registry.timer('query').add(1.0)
+        timer = aggregated.dump_metrics()['query']
+        self.assertEqual(timer['count'], 200)
+        self.assertAlmostEqual(timer['99_percentile'], 1.0, delta=0.03)
+        self.assertAlmostEqual(timer['50_percentile'], 0.01, delta=0.0003)
+
+        # the early samples left the window, they still count
+        clock.now += WINDOW * 0.6
+        timer = aggregated.dump_metrics()['query']
+        self.assertEqual(timer['count'], 200)
+        self.assertAlmostEqual(timer['50_percentile'], 1.0, delta=0.03)
+        self.assertAlmostEqual(registry.timer('query').get_snapshot().get_median(), 1.0, delta=0.03)
+
+        # a slot reused by a later generation starts empty
+        clock.now += WINDOW
+        registry.timer('query').add(0.5)
+        timer = aggregated.dump_metrics()['query']
+        self.assertEqual(timer['count'], 201)
+        self.assertAlmostEqual(timer['50_percentile'], 0.5, delta=0.015)
+        self.assertAlmostEqual(timer['max'], 1.0)
+
+    def test_metric_manager(self):
+        mm = MetricManager()
+        mm.setup_multiprocess(self.directory)
+
+        @mm.time_calls
+        def somefunc(i):
+            return i
+
+        somefunc(1, context='test')
+        somefunc(2, context='test')
+
+        reporter = OpenMetricsReporter(registry=AggregatedRegistry(self.directory))
+        lines = reporter.render().splitlines()
+        self.assertIn('test_timer_seconds_count 2', lines)
+        mm.stop()
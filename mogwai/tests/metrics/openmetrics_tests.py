@@ -0,0 +1,95 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from mogwai._compat import urllib
+from mogwai.tests.base import BaseMogwaiTestCase
+from mogwai.metrics.base import MetricsRegistry
+from mogwai.metrics.graphite import HostedGraphiteReporter
+from mogwai.metrics.openmetrics import OpenMetricsReporter, metric_name, CONTENT_TYPE
+
+
+@attr('unit', 'metrics')
+class OpenMetricsReporterTestCase(BaseMogwaiTestCase):
+    """
+    Test OpenMetrics Reporter
+    """
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.reporter = OpenMetricsReporter(registry=self.registry, metric_prefix='mogwai')
+
+    def tearDown(self):
+        self.reporter.stop()
+
+    def test_metric_name(self):
+        self.assertEqual(metric_name('vertices.person.friends.timer'), 'vertices_person_friends_timer')
+        self.assertEqual(metric_name('error', 'app'), 'app_error')
+        self.assertEqual(metric_name('1.timer'), '_1_timer')
+
+    def test_render(self):
+        self.registry.counter('mogwai.error').inc()
+        self.registry.meter('test.meter').mark()
+        self.registry.gauge('test.gauge').set_value(3)
+        self.registry.timer('test.timer')._update(0.5)
+        self.registry.histogram('test.hist').add(2)
+
+        lines = self.reporter.render().splitlines()
+        self.assertIn('# TYPE mogwai_mogwai_error counter', lines)
+        self.assertIn('mogwai_mogwai_error_total 1', lines)
+        self.assertIn('mogwai_test_meter_total 1', lines)
+        self.assertIn('mogwai_test_gauge 3.0', lines)
+        self.assertIn('# TYPE mogwai_test_timer_seconds summary', lines)
+        self.assertIn('mogwai_test_timer_seconds{quantile="0.5"} 0.5', lines)
+        self.assertIn('mogwai_test_timer_seconds_count 1', lines)
+        self.assertIn('mogwai_test_hist_sum 2.0', lines)
+        self.assertEqual(lines[-1], '# EOF')
+
+    def test_summaries_are_cached_until_updated(self):
+        timer = self.registry.timer('test.timer')
+        timer._update(0.5)
+        self.reporter.render()
+        cached = self.reporter._summaries[('timer', 'test.timer')]
+
+        self.reporter.render()
+        self.assertIs(self.reporter._summaries[('timer', 'test.timer')], cached)
+
+        timer._update(1.5)
+        self.assertIn('mogwai_test_timer_seconds_count 2', self.reporter.render().splitlines())
+        self.assertIsNot(self.reporter._summaries[('timer', 'test.timer')], cached)
+
+    def test_wsgi_app(self):
+        self.registry.counter('test').inc()
+        responses = []
+        start_response = lambda status, headers: responses.append((status, dict(headers)))
+
+        body = b''.join(self.reporter.wsgi_app({'PATH_INFO': '/metrics'}, start_response))
+        self.assertEqual(responses[-1][0], '200 OK')
+        self.assertEqual(responses[-1][1]['Content-Type'], CONTENT_TYPE)
+        self.assertIn(b'mogwai_test_total 1', body)
+
+        self.reporter.wsgi_app({'PATH_INFO': '/other'}, start_response)
+        self.assertEqual(responses[-1][0], '404 Not Found')
+
+    def test_http_endpoint(self):
+        self.registry.counter('test').inc()
+        reporter = OpenMetricsReporter(registry=self.registry, port=0)
+        reporter.start()
+        try:
+            body = urllib.request.urlopen('http://127.0.0.1:{}/metrics'.format(reporter.port)).read()
+            self.assertIn(b'test_total 1', body)
+        finally:
+            reporter.stop()
+        self.assertIsNone(reporter.server)
+
+
+@attr('unit', 'metrics')
+class HostedGraphiteReporterTestCase(BaseMogwaiTestCase):
+
+    def test_get_metrics_includes_every_metric(self):
+        registry = MetricsRegistry()
+        registry.counter('first').inc()
+        registry.counter('second').inc()
+        reporter = HostedGraphiteReporter('api key', registry=registry)
+
+        lines = reporter.get_metrics(timestamp=1).splitlines()
+        self.assertIn('_first.count 1 1', lines)
+        self.assertIn('_second.count 1 1', lines)
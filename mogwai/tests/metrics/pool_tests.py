@@ -0,0 +1,130 @@
+from __future__ import unicode_literals
+from contextlib import contextmanager
+import gc
+import socket
+from nose.plugins.attrib import attr
+from mogwai.tests.base import BaseMogwaiTestCase
+from mogwai.metrics.base import BaseMetricsReporter
+from mogwai.metrics.manager import MetricManager
+from mogwai.metrics.pool import instrument_pool_class
+
+
+class SimplePool(object):
+    """ Minimal pool with the interface of the RexPro connection pools """
+
+    def __init__(self, host, port, pool_size=10, fail_with=None, **kwargs):
+        self.pool_size = pool_size
+        self.fail_with = fail_with
+        self.idle = []
+
+    def create_connection(self):
+        return object()
+
+    @contextmanager
+    def connection(self, transaction=True):
+        if self.fail_with is not None:
+            raise self.fail_with
+        conn = self.idle.pop() if self.idle else self.create_connection()
+        try:
+            yield conn
+        finally:
+            self.idle.append(conn)
+
+    def close_connection(self, conn, soft=False):
+        if conn in self.idle:
+            self.idle.remove(conn)
+
+    def close_all(self, force_commit=False):
+        self.idle = []
+
+
+@attr('unit', 'metrics')
+class PoolTelemetryTestCase(BaseMogwaiTestCase):
+    """
+    Test Connection Pool Telemetry
+    """
+
+    def setUp(self):
+        self.mm = MetricManager()
+        self.reporter = BaseMetricsReporter()
+        self.mm.setup_reporters(self.reporter)
+        self.pool_class = instrument_pool_class(SimplePool)
+
+    def make_pool(self, **kwargs):
+        return self.pool_class(host='10.0.0.1', port=8184, pool_size=2, pool_name='test', metric_manager=self.mm,
+                               **kwargs)
+
+    def test_instrumented_class_is_cached(self):
+        self.assertIs(instrument_pool_class(SimplePool), self.pool_class)
+        self.assertIs(instrument_pool_class(self.pool_class), self.pool_class)
+        self.assertTrue(issubclass(self.pool_class, SimplePool))
+
+    def test_stats(self):
+        pool = self.make_pool()
+        with pool.connection() as conn:
+            stats = pool.stats()
+            self.assertEqual(stats['in_use'], 1)
+            self.assertEqual(stats['idle'], 0)
+        with pool.connection() as conn:
+            pool.close_connection(conn, soft=True)
+
+        stats = pool.stats()
+        self.assertEqual(stats['pool'], 'test')
+        self.assertEqual(stats['host'], '10.0.0.1')
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['acquired'], 2)
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['soft_closed'], 1)
+        self.assertEqual(stats['in_use'], 0)
+        self.assertGreaterEqual(stats['wait_time_max'], 0)
+
+        pool.close_all()
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_metrics(self):
+        pool = self.make_pool()
+        with pool.connection():
+            timestamp, metrics = self.reporter.get_metrics()
+            self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.in_use']['value'], 1)
+
+        timestamp, metrics = self.reporter.get_metrics()
+        self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.acquire_wait.hist']['count'], 1)
+        self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.created']['count'], 1)
+        self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.in_use']['value'], 0)
+        self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.idle']['value'], 1)
+
+    def test_pools_sharing_a_key(self):
+        pool, other = self.make_pool(), self.make_pool()
+        with pool.connection():
+            with other.connection():
+                timestamp, metrics = self.reporter.get_metrics()
+                self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.in_use']['value'], 2)
+        timestamp, metrics = self.reporter.get_metrics()
+        self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.idle']['value'], 2)
+        self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.created']['count'], 2)
+
+        # pools which are gone no longer count
+        del other
+        gc.collect()
+        timestamp, metrics = self.reporter.get_metrics()
+        self.assertEqual(metrics['mogwai.pool.test.10_0_0_1_8184.idle']['value'], 1)
+
+    def test_acquire_timeouts(self):
+        pool = self.make_pool(fail_with=socket.timeout())
+        with self.assertRaises(socket.timeout):
+            with pool.connection():
+                pass
+
+        stats = pool.stats()
+        self.assertEqual(stats['acquire_errors'], 1)
+        self.assertEqual(stats['acquire_timeouts'], 1)
+        self.assertEqual(stats['acquired'], 0)
+
+    def test_errors_while_in_use_are_not_acquire_errors(self):
+        pool = self.make_pool()
+        with self.assertRaises(ValueError):
+            with pool.connection():
+                raise ValueError()
+        stats = pool.stats()
+        self.assertEqual(stats['acquire_errors'], 0)
+        self.assertEqual(stats['in_use'], 0)
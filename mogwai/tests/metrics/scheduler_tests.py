@@ -0,0 +1,122 @@
+from __future__ import unicode_literals
+import threading
+import time
+from nose.plugins.attrib import attr
+from mogwai.tests.base import BaseMogwaiTestCase
+from mogwai.metrics.base import BaseMetricsReporter
+from mogwai.metrics.scheduler import get_scheduler, ThreadScheduler, AsyncioScheduler, TwistedScheduler
+from mogwai.exceptions import MogwaiMetricsException
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+@attr('unit', 'metrics')
+class SchedulerTestCase(BaseMogwaiTestCase):
+    """
+    Test Metric Reporter Schedulers
+    """
+
+    def test_get_scheduler(self):
+        self.assertIsInstance(get_scheduler(), ThreadScheduler)
+        self.assertIsInstance(get_scheduler('twisted'), TwistedScheduler)
+        scheduler = ThreadScheduler()
+        self.assertIs(get_scheduler(scheduler), scheduler)
+        with self.assertRaises(MogwaiMetricsException):
+            get_scheduler('cron')
+        with self.assertRaises(MogwaiMetricsException):
+            get_scheduler(object())
+
+    def test_thread_scheduler(self):
+        flushed = []
+        mr = BaseMetricsReporter(reportingInterval=0.01)
+        mr.send_metrics = lambda: flushed.append(True)
+        mr.start()
+        try:
+            self.assertTrue(mr.task.running)
+            self.assertTrue(wait_for(lambda: len(flushed) >= 2))
+        finally:
+            mr.stop()
+        self.assertFalse(mr.task.running)
+
+    def test_slow_sink_is_bounded(self):
+        release = threading.Event()
+        scheduler = ThreadScheduler(max_pending=1)
+        scheduler.start(release.wait, 0.005)
+        try:
+            self.assertTrue(wait_for(lambda: scheduler.dropped >= 3))
+            self.assertEqual(scheduler._pending, 2)
+            self.assertEqual(scheduler.flushes, 0)
+        finally:
+            scheduler.stop()
+            release.set()
+        self.assertTrue(wait_for(lambda: scheduler.flushes >= 1))
+
+    def test_failing_flushes_continue(self):
+        calls = []
+
+        def fail():
+            calls.append(True)
+            raise ValueError()
+
+        scheduler = ThreadScheduler()
+        scheduler.start(fail, 0.005)
+        try:
+            self.assertTrue(wait_for(lambda: len(calls) >= 2))
+        finally:
+            scheduler.stop()
+
+    def test_asyncio_scheduler(self):
+        try:
+            import asyncio
+        except ImportError:  # pragma: no cover
+            return
+        loop = asyncio.new_event_loop()
+        flushed = []
+        scheduler = AsyncioScheduler(loop=loop)
+        scheduler.start(lambda: flushed.append(threading.current_thread()), 0.01)
+        try:
+            loop.run_until_complete(asyncio.sleep(0.1))
+        finally:
+            scheduler.stop()
+            loop.run_until_complete(asyncio.sleep(0.01))
+            loop.close()
+        self.assertGreaterEqual(len(flushed), 2)
+        # flushes run in the executor, not on the loop
+        self.assertNotIn(threading.current_thread(), flushed)
+
+    def test_asyncio_scheduler_loop(self):
+        try:
+            import asyncio
+        except ImportError:  # pragma: no cover
+            return
+        # no running loop to fall back to
+        scheduler = AsyncioScheduler()
+        with self.assertRaises(MogwaiMetricsException):
+            scheduler.start(lambda: None, 0.01)
+        self.assertFalse(scheduler.running)
+
+        # Pythons before 3.7 fall back to the event loop of the thread
+        get_running_loop = asyncio.__dict__.pop('get_running_loop', None)
+        try:
+            with self.assertRaises(MogwaiMetricsException):
+                AsyncioScheduler().start(lambda: None, 0.01)
+        finally:
+            if get_running_loop is not None:
+                asyncio.get_running_loop = get_running_loop
+
+        # started from a callback of the running loop
+        loop = asyncio.new_event_loop()
+        loop.call_soon(scheduler.start, lambda: None, 0.01)
+        try:
+            loop.run_until_complete(asyncio.sleep(0.01))
+            self.assertTrue(scheduler.running)
+            self.assertIs(scheduler.loop, loop)
+        finally:
+            scheduler.stop()
+            loop.run_until_complete(asyncio.sleep(0.01))
+            loop.close()
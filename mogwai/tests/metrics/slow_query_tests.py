@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+import logging
+from nose.plugins.attrib import attr
+from mogwai.tests.base import BaseMogwaiTestCase
+from mogwai.metrics.manager import MetricManager, QueryTrace
+from mogwai.metrics.slow_query import SlowQueryLog, fingerprint_script
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_trace(elapsed, context=None, script=None, params=None):
+    trace = QueryTrace(context, 0.0)
+    trace.elapsed = elapsed
+    trace.script = script
+    trace.params = params
+    trace.host = 'localhost'
+    trace.port = 8184
+    return trace
+
+
+@attr('unit', 'metrics')
+class SlowQueryLogTestCase(BaseMogwaiTestCase):
+    """
+    Test Slow Query Log
+    """
+
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.log = logging.getLogger('mogwai.tests.slow_query')
+        self.log.addHandler(self.handler)
+        self.log.propagate = False
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.log.removeHandler(self.handler)
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint_script("g.v(12).has('name', \"bob\")\n  .count()"), "g.v(?).has(?, ?) .count()")
+        self.assertEqual(fingerprint_script('x' * 300, max_length=10), 'x' * 10)
+        self.assertEqual(fingerprint_script(None), '')
+
+    def test_threshold(self):
+        slow_log = SlowQueryLog(threshold=0.5, log=self.log, clock=self.clock)
+        slow_log(make_trace(0.1, script='g.v(id)'))
+        self.assertEqual(self.handler.records, [])
+
+        slow_log(make_trace(0.7, script='g.v(id)', params={'id': 12}))
+        self.assertEqual(len(self.handler.records), 1)
+        record = self.handler.records[0].slow_query
+        self.assertEqual(record['fingerprint'], 'g.v(id)')
+        self.assertEqual(record['elapsed'], 0.7)
+        self.assertEqual(record['host'], 'localhost')
+        self.assertEqual(record['params'], {'id': '12'})
+        self.assertEqual(record['param_sizes'], {'id': None})
+
+    def test_method_context_is_the_fingerprint(self):
+        slow_log = SlowQueryLog(threshold=0, log=self.log, clock=self.clock)
+        slow_log(make_trace(1, context='vertices.person.friends', script='def friends(eid) {}'))
+        self.assertEqual(self.handler.records[0].slow_query['fingerprint'], 'vertices.person.friends')
+
+    def test_redaction_and_sampling(self):
+        slow_log = SlowQueryLog(threshold=0, sample_params=2, max_value_length=5, log=self.log, clock=self.clock)
+        slow_log(make_trace(1, script='q', params={'a_password': 'hunter2', 'b_ids': list(range(100)), 'c': 1}))
+        record = self.handler.records[0].slow_query
+        self.assertEqual(record['params'], {'a_password': '<redacted>', 'b_ids': '[0, 1...'})
+        self.assertEqual(record['param_sizes'], {'a_password': 7, 'b_ids': 100, 'c': None})
+
+    def test_nested_redaction(self):
+        slow_log = SlowQueryLog(threshold=0, max_value_length=200, log=self.log, clock=self.clock)
+        attrs = {'password': 'hunter2', 'name': 'x', 'tokens': [{'auth_token': 'abc'}]}
+        slow_log(make_trace(1, context='_save_vertex', params={'id': None, 'attrs': attrs}))
+        sample = self.handler.records[0].slow_query['params']['attrs']
+        self.assertNotIn('hunter2', sample)
+        self.assertNotIn('abc', sample)
+        self.assertIn("'password': '<redacted>'", sample)
+        self.assertIn("'name': 'x'", sample)
+        self.assertEqual(attrs['password'], 'hunter2')
+
+    def test_rate_limit(self):
+        slow_log = SlowQueryLog(threshold=0, max_per_second=1, burst=2, log=self.log, clock=self.clock)
+        for _ in range(5):
+            slow_log(make_trace(1, script='q'))
+        self.assertEqual(len(self.handler.records), 2)
+
+        self.clock.now += 1
+        slow_log(make_trace(1, script='q'))
+        self.assertEqual(len(self.handler.records), 3)
+        self.assertEqual(self.handler.records[-1].slow_query['suppressed'], 3)
+
+    def test_trace_listener(self):
+        mm = MetricManager()
+        mm.add_trace_listener(SlowQueryLog(threshold=0, log=self.log))
+
+        @mm.time_calls
+        def execute_query(query, params):
+            trace = mm.current_trace()
+            trace.script = query
+            trace.params = params
+            return 1
+
+        execute_query('g.v(id)', {'id': 1}, context='test')
+        self.assertEqual(len(self.handler.records), 1)
+        self.assertEqual(self.handler.records[0].slow_query['fingerprint'], 'test')
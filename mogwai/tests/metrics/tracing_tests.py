@@ -0,0 +1,131 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from mogwai import connection
+from mogwai.tests.base import BaseMogwaiTestCase, FakePool
+from mogwai.models import Vertex
+from mogwai.properties import Integer
+from mogwai.metrics import tracing
+
+
+class RecordingTracer(tracing.BaseTracer):
+
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, parent=None, attributes=None):
+        span = {'name': name, 'parent': parent['name'] if parent else None, 'attributes': dict(attributes or {}),
+                'finished': False, 'exc': None}
+        self.spans.append(span)
+        return span
+
+    def set_attribute(self, span, key, value):
+        span['attributes'][key] = value
+
+    def finish_span(self, span, exc=None):
+        span['finished'] = True
+        span['exc'] = exc
+
+
+class BrokenTracer(tracing.BaseTracer):
+
+    def start_span(self, name, parent=None, attributes=None):
+        raise RuntimeError('broken')
+
+
+class TracedVertex(Vertex):
+    age = Integer()
+
+
+@attr('unit', 'metrics')
+class TracingTestCase(BaseMogwaiTestCase):
+    """
+    Test Tracing Spans
+    """
+
+    def setUp(self):
+        self.tracer = RecordingTracer()
+
+    def tearDown(self):
+        tracing.set_tracer(None)
+
+    def test_noop_without_tracer(self):
+        self.assertIs(tracing.span('test'), tracing.NOOP_SPAN)
+        self.assertIs(tracing.current_span(), tracing.NOOP_SPAN)
+        self.assertFalse(tracing.current_span().recording)
+
+        @tracing.traced('test')
+        def somefunc(i):
+            return [i]
+
+        self.assertEqual(somefunc(1), [1])
+
+    def test_set_tracer(self):
+        with self.assertRaises(TypeError):
+            tracing.set_tracer(object())
+        tracing.set_tracer(self.tracer)
+        self.assertIs(tracing.get_tracer(), self.tracer)
+
+    def test_nested_spans(self):
+        tracing.set_tracer(self.tracer)
+
+        @tracing.traced('inner', lambda i: {'i': i})
+        def somefunc(i):
+            self.assertEqual(tracing.current_span().name, 'inner')
+            return [i, i]
+
+        with tracing.span('outer', {'type': 'test'}) as span:
+            self.assertIs(tracing.current_span(), span)
+            somefunc(1)
+        self.assertIs(tracing.current_span(), tracing.NOOP_SPAN)
+
+        outer, inner = self.tracer.spans
+        self.assertEqual(outer['attributes'], {'type': 'test'})
+        self.assertEqual(inner['parent'], 'outer')
+        self.assertEqual(inner['attributes'], {'i': 1, 'result_count': 2})
+        self.assertTrue(outer['finished'] and inner['finished'])
+
+    def test_exceptions_are_recorded(self):
+        tracing.set_tracer(self.tracer)
+        with self.assertRaises(ValueError):
+            with tracing.span('test'):
+                raise ValueError()
+        self.assertIsInstance(self.tracer.spans[0]['exc'], ValueError)
+
+    def test_broken_tracer(self):
+        tracing.set_tracer(BrokenTracer())
+        with tracing.span('test') as span:
+            span.set_attribute('key', 'value')
+            self.assertIs(tracing.current_span(), span)
+        self.assertIs(tracing.current_span(), tracing.NOOP_SPAN)
+
+    def test_execute_query_span(self):
+        response = [{'_id': 1}]
+
+        tracing.set_tracer(self.tracer)
+        connection.metric_manager.payload_sample_rate = 1.0
+        try:
+            with tracing.span('outer'):
+                connection.execute_query('g.v(eid)', {'eid': 1}, pool=FakePool(response))
+        finally:
+            connection.metric_manager.payload_sample_rate = 0.0
+
+        query = self.tracer.spans[1]
+        self.assertEqual(query['name'], 'mogwai.query')
+        self.assertEqual(query['parent'], 'outer')
+        self.assertEqual(query['attributes']['host'], 'localhost')
+        self.assertEqual(query['attributes']['result_count'], 1)
+        self.assertEqual(query['attributes']['response_bytes'], connection.payload_size(response))
+        self.assertGreater(query['attributes']['request_bytes'], 0)
+
+    def test_model_spans(self):
+        execute_query = connection.execute_query
+        connection.execute_query = lambda script, params={}, **kwargs: []
+        tracing.set_tracer(self.tracer)
+        try:
+            self.assertEqual(TracedVertex.all(), [])
+        finally:
+            connection.execute_query = execute_query
+
+        span = self.tracer.spans[0]
+        self.assertEqual(span['name'], 'mogwai.vertex.all')
+        self.assertEqual(span['attributes'], {'element_type': TracedVertex.get_element_type(), 'result_count': 0})
@@ -2,7 +2,7 @@ from __future__ import unicode_literals
 from nose.plugins.attrib import attr
 
 from mogwai.tests.base import BaseMogwaiTestCase, TestVertexModel, TestEdgeModel
-from mogwai.exceptions import ModelException, MogwaiException, ValidationError
+from mogwai.exceptions import ModelException, MogwaiException, MogwaiGremlinException, ValidationError
 from mogwai.models import Vertex, Edge
 from mogwai import properties
 
@@ -77,6 +77,57 @@ class TestManualTableNaming(BaseMogwaiTestCase):
         self.assertEqual(TestVertexModel.element_type, 'test_vertex_model')
         self.assertEqual(TestVertexModel.get_element_type(), 'test_vertex_model')
 
+    def test_names_are_computed_at_class_creation(self):
+        from mogwai.models.element import vertex_types, edge_types
+
+        class CamelCaseNamedVertex(Vertex):
+            pass
+
+        class CamelCaseNamedEdge(Edge):
+            label = 'Manual_Label'
+
+        self.assertEqual(CamelCaseNamedVertex._element_type_name, 'camel_case_named_vertex')
+        self.assertIs(CamelCaseNamedVertex.get_element_type(), CamelCaseNamedVertex._element_type_name)
+        self.assertIs(vertex_types['camel_case_named_vertex'], CamelCaseNamedVertex)
+        self.assertEqual(CamelCaseNamedEdge.get_label(), 'manual_label')
+        self.assertIs(edge_types['manual_label'], CamelCaseNamedEdge)
+
+        # subclasses get their own name
+        class SubCamelCaseNamedVertex(CamelCaseNamedVertex):
+            pass
+
+        self.assertEqual(SubCamelCaseNamedVertex.get_element_type(), 'sub_camel_case_named_vertex')
+
+    def test_builtin_gremlin_methods_setup(self):
+        """ The built in methods are configured against the class six.add_metaclass creates first """
+        from mogwai.gremlin import GremlinMethod
+
+        for wrapper, name, path in ((TestVertexModel._save_vertex, '_save_vertex', 'vertex.groovy'),
+                                    (TestVertexModel._traversal, '_traversal', 'vertex.groovy'),
+                                    (TestEdgeModel._save_edge, '_save_edge', 'edge.groovy')):
+            builtin = wrapper.map.__self__
+            method = GremlinMethod(helpers=builtin.helpers)
+            method.configure_method(builtin.parent_class, name, None)
+            method._setup()
+            self.assertEqual(method.path, path)
+            self.assertIn('def {}('.format(name), method.function_def)
+
+    def test_gremlin_method_helpers(self):
+        """ Helper functions of other groovy files are defined ahead of the function body """
+        from mogwai.gremlin import GremlinMethod, MAP_FUNCTION
+
+        method = GremlinMethod(helpers=[('element.groovy', '_keyset_page')])
+        method.configure_method(TestVertexModel._traversal.map.__self__.parent_class, '_traversal', None)
+        method._setup()
+        for script in (method.script, method.map_script):
+            self.assertLess(script.index('def _keyset_page('), script.index('_keyset_page(query, cursor'))
+        self.assertLess(method.map_script.index('def _keyset_page('), method.map_script.index(MAP_FUNCTION))
+
+        method = GremlinMethod(helpers=[('element.groovy', '_missing')])
+        method.configure_method(TestVertexModel._traversal.map.__self__.parent_class, '_traversal', None)
+        with self.assertRaises(MogwaiGremlinException):
+            method._setup()
+
 
 class BaseAbstractVertex(Vertex):
     __abstract__ = True
@@ -45,6 +45,24 @@ class TestEdgeIO(BaseMogwaiTestCase):
 
         e1.delete()
 
+    def test_acknowledged_save(self):
+        """
+        Tests that acknowledged saves update the edge in place instead of returning a new edge
+        """
+        e1 = TestEdgeModel(self.v1, self.v2, test_val=3)
+        self.assertIs(e1.save(ack=True), e1)
+        self.assertIsNotNone(e1.id)
+
+        e1.test_val = 20
+        e1.save(ack=True)
+
+        edges = self.v1.outE()
+        self.assertEqual(len(edges), 1)
+        self.assertEqual(edges[0].id, e1.id)
+        self.assertEqual(edges[0].test_val, 20)
+
+        e1.delete()
+
     def test_model_deleting_works_properly(self):
         """
         Tests that an instance's delete method deletes the instance
@@ -0,0 +1,85 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+
+from mogwai.exceptions import MogwaiQueryError
+from mogwai.tests.base import BaseMogwaiTestCase, TestEdgeModel
+from mogwai.models import Query
+from mogwai.models.query import KEYSET_SCRIPT, _get_keyset_page
+from mogwai.models.pagination import Page, encode_cursor, decode_cursor, to_page
+
+
+class MockVertex(object):
+    eid = 1
+
+
+@attr('unit', 'pagination')
+class CursorTest(BaseMogwaiTestCase):
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor('since', 1400000000, '4r-8-2f')
+        self.assertEqual(decode_cursor(cursor, 'since'), {'key': 'since', 'value': 1400000000, 'id': '4r-8-2f'})
+
+    def test_first_page_cursor(self):
+        self.assertEqual(decode_cursor(None), {'key': None, 'value': None, 'id': None})
+        self.assertEqual(decode_cursor(None, 'since'), {'key': 'since', 'value': None, 'id': None})
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(MogwaiQueryError):
+            decode_cursor('not a cursor')
+
+    def test_sort_key_mismatch(self):
+        with self.assertRaises(MogwaiQueryError):
+            decode_cursor(encode_cursor('since', 1, '1'), 'weight')
+
+    def test_to_page(self):
+        page = to_page({'elements': [1, 2], 'last': {'value': None, 'id': '12'}}, None, 2)
+        self.assertIsInstance(page, Page)
+        self.assertListEqual(page, [1, 2])
+        self.assertEqual(decode_cursor(page.cursor)['id'], '12')
+
+        # a short page is the last one
+        page = to_page({'elements': [1], 'last': {'value': None, 'id': '12'}}, None, 2)
+        self.assertIsNone(page.cursor)
+
+        page = to_page({'elements': [], 'last': None}, None, 2)
+        self.assertIsNone(page.cursor)
+
+
+@attr('unit', 'pagination', 'query_vertex')
+class QueryCursorTest(BaseMogwaiTestCase):
+    def setUp(self):
+        self.q = Query(MockVertex())
+
+    def test_limit_is_not_pushed_down(self):
+        result = self.q.limit(10).after()._get_partial()
+        self.assertEqual(result, "g.v(id).query()")
+
+    def test_sort_key(self):
+        # the sort key bound is pushed into the query by _keyset_page
+        result = self.q.limit(10).after(encode_cursor('since', 5, '1'), sort_key='since')._get_partial()
+        self.assertEqual(result, "g.v(id).query()")
+
+    def test_keyset_script(self):
+        script = KEYSET_SCRIPT.format(keyset_page=_get_keyset_page(), partial='g.v(id).query()', vertices='true')
+        self.assertTrue(script.startswith('def _keyset_page(query, cursor, accept, start, end) {'))
+        self.assertIn('_keyset_page(g.v(id).query(), cursor, null, 0, limit)', script)
+
+    def test_first_page_sort_key(self):
+        result = self.q.limit(10).after(sort_key='since')._get_partial()
+        self.assertEqual(result, "g.v(id).query()")
+
+
+@attr('unit', 'pagination')
+class EdgeCursorTest(BaseMogwaiTestCase):
+
+    def test_sort_key_requires_cursor(self):
+        with self.assertRaises(MogwaiQueryError):
+            TestEdgeModel.get_between(None, None, sort_key='since')
+
+    def test_cursor_requires_page_size(self):
+        with self.assertRaises(MogwaiQueryError):
+            TestEdgeModel.get_between(None, None, cursor=None)
+
+    def test_unknown_keywords_are_rejected(self):
+        with self.assertRaises(TypeError):
+            TestEdgeModel.get_between(None, None, per_page=10, sortkey='since')
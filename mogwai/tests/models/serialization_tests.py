@@ -0,0 +1,53 @@
+from __future__ import unicode_literals
+import pickle
+from nose.plugins.attrib import attr
+
+from mogwai.exceptions import MogwaiException, ElementDefinitionException
+from mogwai.models import serialization
+from mogwai.tests.base import BaseMogwaiTestCase, TestVertexModel, TestEdgeModel
+
+
+@attr('unit', 'serialization')
+class TestElementSerialization(BaseMogwaiTestCase):
+
+    def setUp(self):
+        super(TestElementSerialization, self).setUp()
+        self.vertex = TestVertexModel(_id=5, name='saved', test_val=1)
+        self.vertex.name = 'changed'
+
+    def test_vertex_round_trip(self):
+        for loaded in (serialization.loads(serialization.dumps(self.vertex)),
+                       pickle.loads(pickle.dumps(self.vertex, pickle.HIGHEST_PROTOCOL))):
+            self.assertIsInstance(loaded, TestVertexModel)
+            self.assertEqual(loaded.id, 5)
+            self.assertEqual(loaded.name, 'changed')
+            self.assertEqual(loaded.test_val, 1)
+            self.assertEqual(loaded._values['name'].previous_value, 'saved')
+            self.assertEqual(loaded._values['test_val'].previous_value, 1)
+
+    def test_edge_round_trip_keeps_endpoint_ids(self):
+        edge = TestEdgeModel(self.vertex, 7, _id='e1', test_val=3)
+        for loaded in (serialization.loads(serialization.dumps(edge)),
+                       pickle.loads(pickle.dumps(edge, pickle.HIGHEST_PROTOCOL))):
+            self.assertIsInstance(loaded, TestEdgeModel)
+            self.assertEqual(loaded.id, 'e1')
+            self.assertEqual(loaded._outV, 5)
+            self.assertEqual(loaded._inV, 7)
+            self.assertEqual(loaded.test_val, 3)
+
+    def test_manual_values_round_trip(self):
+        vertex = TestVertexModel(_id=5, extra='value')
+        loaded = serialization.loads(serialization.dumps(vertex))
+        self.assertEqual(loaded._manual_values['extra'].value, 'value')
+
+    def test_unsupported_version(self):
+        state = serialization.get_state(self.vertex)
+        state[0] = serialization.SERIALIZATION_VERSION + 1
+        with self.assertRaises(MogwaiException):
+            serialization.set_state(TestVertexModel.__new__(TestVertexModel), state)
+
+    def test_unknown_element_type(self):
+        state = serialization.get_state(self.vertex)
+        state[2] = 'not_a_vertex_type'
+        with self.assertRaises(ElementDefinitionException):
+            serialization.loads(serialization.msgpack.packb(state, use_bin_type=True))
@@ -31,6 +31,11 @@ class AliasedTestModel(Vertex):
     test_val = properties.Integer(db_field='how_many')
 
 
+class EventTestModel(Vertex):
+    happened = properties.DateTime()
+    amount = properties.Decimal()
+
+
 class OtherTestEdge(Edge):
     test_val = properties.Integer(default=1)
 
@@ -95,6 +100,40 @@ class TestVertexIO(BaseMogwaiTestCase):
         self.assertEquals(tm.test_val, tm2.test_val)
         tm.delete()
 
+    def test_acknowledged_save(self):
+        """
+        Tests that acknowledged saves update the instance in place instead of returning a new vertex
+        """
+        tm = TestVertexModel(test_val=8, name='123456789')
+        result = tm.save(ack=True)
+        self.assertIs(result, tm)
+        self.assertIsNotNone(tm.id)
+        self.assertEqual(tm._values['test_val'].previous_value, 8)
+
+        tm.test_val = 100
+        self.assertIs(tm.save(ack=True), tm)
+        self.assertEqual(tm._values['test_val'].previous_value, 100)
+
+        tm2 = TestVertexModel.get(tm.id)
+        self.assertEqual(tm2.test_val, 100)
+        tm.delete()
+
+    def test_acknowledged_save_reads_back_fields(self):
+        """ Tests that acknowledged saves read requested fields back, using their database field names """
+        tm = AliasedTestModel(test_val=8, name='123456789')
+        tm.save(ack=True, fields=['test_val'])
+        self.assertEqual(tm.test_val, 8)
+
+        tm1 = AliasedTestModel.get(tm.id)
+        tm1.test_val = 7
+        tm1.save()
+
+        tm.name = 'changed'
+        tm.save(ack=True, fields=['test_val'])
+        self.assertEqual(tm.test_val, 7)
+        self.assertEqual(tm._values['test_val'].previous_value, 7)
+        tm.delete()
+
     def test_model_deleting_works_properly(self):
         """
         Tests that an instance's delete method deletes the instance
@@ -156,6 +195,50 @@ class TestVertexIO(BaseMogwaiTestCase):
         v2.delete()
         v3.delete()
 
+    def test_aggregate_method(self):
+        v1 = TestVertexModel.create(name='agg', test_val=-10)
+        v2 = TestVertexModel.create(name='agg', test_val=-20)
+        v3 = TestVertexModel.create(name='agg2', test_val=-30)
+
+        where = {'name': 'agg'}
+        self.assertEqual(TestVertexModel.aggregate(where=where), {'count': 2})
+        self.assertEqual(TestVertexModel.aggregate(sum='test_val', min='test_val', max='test_val', where=where),
+                         {'count': 2, 'sum': -30, 'min': -20, 'max': -10})
+
+        groups = TestVertexModel.aggregate(group_by='name', sum='test_val', where=[('test_val', -5, 'LESS_THAN')])
+        self.assertEqual(groups['agg'], {'count': 2, 'sum': -30})
+        self.assertEqual(groups['agg2'], {'count': 1, 'sum': -30})
+
+        self.assertEqual(TestVertexModel.aggregate(where={'name': 'no such name'}), {'count': 0})
+        v1.delete()
+        v2.delete()
+        v3.delete()
+
+    def test_aggregate_conversions(self):
+        import datetime
+        import decimal
+        from pytz import utc
+        calls = []
+
+        def aggregate_elements(cls, *args):
+            calls.append(args)
+            return {None: {'count': 1, 'sum': 12.5, 'max': 1420070400}}
+
+        EventTestModel._aggregate_elements = classmethod(aggregate_elements)
+        try:
+            results = EventTestModel.aggregate(sum='amount', max='happened',
+                                               where=[('happened', datetime.datetime(2014, 1, 1, tzinfo=utc),
+                                                       'GREATER_THAN')])
+            with self.assertRaises(MogwaiQueryError):
+                EventTestModel.aggregate(count=False)
+        finally:
+            del EventTestModel._aggregate_elements
+
+        where = calls[0][0]
+        self.assertEqual(where, [['eventtestmodel_happened', 1388534400.0, 'GREATER_THAN']])
+        self.assertEqual(results, {'count': 1, 'sum': decimal.Decimal('12.5'),
+                                   'max': datetime.datetime(2015, 1, 1, tzinfo=utc)})
+
     def test_get_by_id(self):
         v1 = TestVertexModel.create()
         results = TestVertexModel.get(v1.id)
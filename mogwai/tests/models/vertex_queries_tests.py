@@ -78,3 +78,22 @@ class SimpleQueryTest(BaseMogwaiTestCase):
     def test_double_interval(self):
         result = self.q.interval('fierceness', 2.5, 5.2)._get_partial()
         self.assertEqual(result, "g.v(id).query().interval('fierceness', v0 as double, v1 as double)")
+
+    def test_group_count(self):
+        # group counts are computed by the server, only the counts are returned
+        from mogwai import connection
+        vertex = MockVertex()
+        vertex._id = 1
+        q = Query(vertex)
+        scripts = []
+        execute_query = connection.execute_query
+        connection.execute_query = lambda script, params, **kwargs: scripts.append((script, dict(params))) or {}
+        try:
+            self.assertEqual(q.labels('test').group_count('age'), {})
+            self.assertEqual(q.group_count('age', edges=True), {})
+        finally:
+            connection.execute_query = execute_query
+        self.assertEqual(scripts[0][0],
+                         "g.v(id).query().labels('test').vertices()._().groupCount{it.getProperty(gkey)}.cap.next()")
+        self.assertEqual(scripts[0][1]['gkey'], 'age')
+        self.assertEqual(scripts[1][0], "g.v(id).query().edges()._().groupCount{it.getProperty(gkey)}.cap.next()")
@@ -5,7 +5,7 @@ from nose.plugins.attrib import attr
 
 from mogwai.tests.base import BaseMogwaiTestCase
 
-from mogwai.models import Vertex, Edge, IN, OUT, BOTH, GREATER_THAN, LESS_THAN
+from mogwai.models import Vertex, Edge, IN, OUT, BOTH, EQUAL, GREATER_THAN, LESS_THAN
 from mogwai import properties
 
 
@@ -144,6 +144,66 @@ class TestVertexTraversals(BaseTraversalTestCase):
         self.assertEqual(len(results), 2)
         self.assertIn(self.beekeeping, results)
 
+    def test_type_filter_before_range(self):
+        """Test that type filtered traversals return full pages"""
+        results = self.blake.bothV(types=[Course], limit=1, offset=0)
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], Course)
+
+    def test_edge_property_predicates(self):
+        """Test that traversals can filter on the traversed edge properties"""
+        results = self.jon.outV(EnrolledIn, has=[('enrolledin_enthusiasm', 5, GREATER_THAN)])
+        self.assertEqual(len(results), 0)
+
+        results = self.jon.outV(EnrolledIn, has={'enrolledin_enthusiasm': 1})
+        self.assertEqual(len(results), 1)
+        self.assertIn(self.beekeeping, results)
+
+
+@attr('unit', 'traversals', 'degree')
+class TestVertexDegree(BaseTraversalTestCase):
+
+    def test_degree(self):
+        """Test that edges are counted without being loaded"""
+        self.assertEqual(self.jon.degree(), 2)
+        self.assertEqual(self.jon.degree(OUT), 1)
+        self.assertEqual(self.jon.degree(IN, TaughtBy), 1)
+        self.assertEqual(self.jon.degree(IN, EnrolledIn), 0)
+        self.assertEqual(self.jon.degree(BOTH, EnrolledIn, TaughtBy), 2)
+
+    def test_degrees(self):
+        """Test that edges of many vertices are counted in one request"""
+        degrees = Person.degrees([self.jon, self.eric, self.blake], OUT, EnrolledIn)
+        self.assertDictEqual(degrees, {self.jon.id: 1, self.eric.id: 1, self.blake.id: 1})
+
+    def test_has_edge(self):
+        """Test edge existence checks"""
+        self.assertTrue(self.jon.has_edge(EnrolledIn))
+        self.assertTrue(self.jon.has_edge(EnrolledIn, self.beekeeping))
+        self.assertFalse(self.jon.has_edge(EnrolledIn, self.physics))
+        self.assertTrue(self.jon.has_edge(TaughtBy, self.physics, direction=IN))
+        self.assertFalse(self.jon.has_edge(TaughtBy))
+
+
+@attr('unit', 'traversals')
+class TestTraversalFilters(BaseMogwaiTestCase):
+
+    def test_edge_types_become_labels(self):
+        self.assertEqual(Person._get_traversal_filters('outE', [], [EnrolledIn]), (['enrolled_in'], None))
+        self.assertEqual(Person._get_traversal_filters('outE', [EnrolledIn, TaughtBy], [TaughtBy]),
+                         (['taught_by'], None))
+        self.assertIsNone(Person._get_traversal_filters('outE', [EnrolledIn], [TaughtBy]))
+
+    def test_vertex_types_are_kept(self):
+        self.assertEqual(Person._get_traversal_filters('outV', [EnrolledIn], [Course]), (['enrolled_in'], ['course']))
+        self.assertEqual(Person._get_traversal_filters('outV', [EnrolledIn], None), (['enrolled_in'], None))
+
+    def test_predicates(self):
+        self.assertIsNone(Person._get_predicates(None))
+        self.assertEqual(Person._get_predicates({'since': 5}), [['since', 5, EQUAL]])
+        self.assertEqual(Person._get_predicates([('since', 5), ('weight', 2, GREATER_THAN)]),
+                         [['since', 5, EQUAL], ['weight', 2, GREATER_THAN]])
+
 
 @attr('unit', 'traversals')
 class TestVertexCentricQueries(BaseTraversalTestCase):
@@ -184,3 +244,57 @@ class TestVertexCentricQueries(BaseTraversalTestCase):
                                                                                2).vertices()))
         self.assertEqual(0, len(self.blake.query().labels(EnrolledIn).interval('enrolledin_enthusiasm', 2,
                                                                                8).vertices()))
+
+
+@attr('unit', 'traversals', 'pagination')
+class TestCursorPagination(BaseTraversalTestCase):
+
+    def test_keyset_traversal_pages(self):
+        """Test that cursor pagination walks all edges exactly once"""
+        first = self.jon._keyset_traversal('bothE', [], 1)
+        self.assertEqual(len(first), 1)
+        self.assertIsNotNone(first.cursor)
+
+        second = self.jon._keyset_traversal('bothE', [], 1, cursor=first.cursor)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first[0], second[0])
+
+        last = self.jon._keyset_traversal('bothE', [], 1, cursor=second.cursor)
+        self.assertEqual(len(last), 0)
+        self.assertIsNone(last.cursor)
+
+    def test_keyset_vertex_traversal_types(self):
+        """Test that cursor pagination applies the type filter before the page is cut"""
+        results = self.blake._keyset_traversal('bothV', [], 5, types=[Course])
+        self.assertEqual(len(results), 2)
+        self.assertIn(self.beekeeping, results)
+        self.assertIn(self.theoretics, results)
+
+    def test_query_after(self):
+        """Test that vertex-centric queries can be cursor paginated"""
+        page = self.jon.query().labels(EnrolledIn, TaughtBy).direction(BOTH).limit(1).after().edges()
+        self.assertEqual(len(page), 1)
+        page = self.jon.query().labels(EnrolledIn, TaughtBy).direction(BOTH).limit(1).after(page.cursor).edges()
+        self.assertEqual(len(page), 1)
+        self.assertIn(page[0], (self.jon_physics, self.jon_in_beekeeping))
+
+    def test_keyset_resumes_after_deleted_edge(self):
+        """Test that cursor pagination continues when the last edge of a page is deleted before the next page"""
+        student = Person.create(name='Student', age=20)
+        courses = [Course.create(name='Course {}'.format(i), credits=1.0) for i in range(3)]
+        edges = [EnrolledIn.create(student, course, enthusiasm=i) for i, course in enumerate(courses)]
+        try:
+            first = student._keyset_traversal('outE', [EnrolledIn], 1)
+            self.assertEqual(len(first), 1)
+            first[0].delete()
+
+            page = student._keyset_traversal('outE', [EnrolledIn], 1, cursor=first.cursor)
+            seen = list(page)
+            while page.cursor is not None:
+                page = student._keyset_traversal('outE', [EnrolledIn], 1, cursor=page.cursor)
+                seen.extend(page)
+            self.assertEqual(len(seen), 2)
+            self.assertEqual(set(e._id for e in seen), set(e._id for e in edges) - {first[0]._id})
+        finally:
+            for element in edges + courses + [student]:
+                element.delete()
@@ -91,4 +91,41 @@ class GraphRelationshipVertexIOTestCase(BaseMogwaiTestCase):
         v11.delete()
         v12.delete()
         v21.delete()
-        v22.delete()
\ No newline at end of file
+        v22.delete()
+
+    @attr('relationship_pagination')
+    def test_relationship_pagination(self):
+        """ Test that limit and offset are applied to the relationship results """
+
+        v1 = self.vertex_model.create(name='test1')
+        e1, v2 = v1.relation.create(vertex_params={'name': 'new_relation_1'})
+        e2, v3 = v1.relation.create(vertex_params={'name': 'new_relation_2'})
+
+        self.assertEqual(len(v1.relation.vertices()), 2)
+        self.assertEqual(len(v1.relation.vertices(limit=1)), 1)
+        self.assertEqual(len(v1.relation.vertices(limit=1, offset=1)), 1)
+        self.assertEqual(len(v1.relation.vertices(limit=1, offset=2)), 0)
+        self.assertEqual(len(v1.relation.edges(limit=1)), 1)
+
+        v1.delete()
+        v2.delete()
+        v3.delete()
+
+    @attr('relationship_prefetch')
+    def test_relationship_prefetch(self):
+        """ Test that a relationship can be loaded for many vertices at once """
+
+        v11 = self.vertex_model.create(name='test1')
+        e1, v12 = v11.relation.create(vertex_params={'name': 'new_relation_1'})
+        v21 = self.vertex_model.create(name='test2')
+
+        results = v11.relation.prefetch([v11, v21])
+        self.assertListEqual(results[v11.id], [v12])
+        self.assertListEqual(results[v21.id], [])
+
+        results = v11.relation.prefetch([v11, v21], edges=True)
+        self.assertListEqual(results[v11.id], [e1])
+
+        v11.delete()
+        v12.delete()
+        v21.delete()
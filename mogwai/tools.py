@@ -1,12 +1,9 @@
 ## TODO: Reference: Tooling from werkzeug tools - citation needed
 from __future__ import unicode_literals
 import sys
-from rexpro.exceptions import RexProConnectionException, RexProScriptException
-from mogwai._compat import reraise, string_types, PY2
+from mogwai._compat import reraise, string_types, PY2, lazy_attributes
 from mogwai import connection
 from mogwai.exceptions import MogwaiBlueprintsWrapperException
-from factory import base
-from rexpro.connectors.sync import RexProSyncConnection
 
 
 class ImportStringError(ImportError):
@@ -172,42 +169,6 @@ class LazyImportClass(object):
         return getattr(self.klass, '__setup_instantiated_vertex')(*args, **kwargs)
 
 
-class Factory(base.Factory):
-    """Factory for Mogwai models. """
-
-    ABSTRACT_FACTORY = True
-
-    _associated_model = None
-
-    @classmethod
-    def _load_target_class(cls, class_definition):
-        """ So we can support potential circular import problems, by using normal import_string import specification.
-        """
-        associated_class = super(Factory, cls)._load_target_class(class_definition)
-
-        if isinstance(associated_class, string_types) and '.' in associated_class:
-            if cls._associated_model is None:
-                cls._associated_model = import_string(associated_class)
-                cls._associated_model.FACTORY_CLASS = cls
-            return cls._associated_model
-
-        if associated_class and associated_class.FACTORY_CLASS is None:
-            associated_class.FACTORY_CLASS = cls
-
-        return associated_class
-
-    @classmethod
-    def _create(cls, target_class, *args, **kwargs):
-        """Create an instance of the model, and save it to the database."""
-        from mogwai.models import Edge
-        if issubclass(target_class.__class__, Edge):
-            assert ('outV' in kwargs and 'inV' in kwargs), "Edges require in and out Vertices"
-            obj = target_class.create(outV=kwargs.get('outV'), inV=kwargs.get('inV'), *args, **kwargs)
-        else:
-            obj = target_class.create(*args, **kwargs)
-        return obj
-
-
 class SessionPoolManager(object):
     """A context manager that exposes a pool whose connections share the same session.
     If RexPro is used without concurrency, it is not necessary to use connections
@@ -219,6 +180,8 @@ class SessionPoolManager(object):
     :param int pool_size: the maximum number of simultaneous connections for this pool
     :return: the used RexPro connection pool (with default session)
     """
+    # tags the metrics of the pool
+    pool_name = 'session'
 
     def __init__(self, bindings=None, pool_size=10):
         self.bindings = bindings
@@ -228,14 +191,14 @@ class SessionPoolManager(object):
         # assign original execute_query()
         self.original_execute_query = connection.execute_query
         # create a pool with session
-        self.pool = connection.CONNECTION_POOL_TYPE(pool_size=self.pool_size, with_session=True,
-                                                    **connection.HOST_PARAMS)
+        self.pool = connection.create_pool(pool_name=self.pool_name, pool_size=self.pool_size, with_session=True)
 
         # assign optional binding variables
         if self.bindings:
             connection.execute_query('g', params=self.bindings, isolate=False, pool=self.pool)
 
         # patch execute_query if we're running non-concurrently
+        from rexpro.connectors.sync import RexProSyncConnection
         if connection.CONNECTION_TYPE == RexProSyncConnection:
             # shadow execute_query with default self.pool
             def execute_in_pool(query, params=None, transaction=True, isolate=True,
@@ -270,6 +233,7 @@ class BlueprintsWrapper(SessionPoolManager):
     :return: the used RexPro connection pool (with default session)
     :raises MogwaiBlueprintsWrapperException: if no class name is provided
     """
+    pool_name = 'blueprints'
 
     def __init__(self, class_name=None, setup=None, *args, **kwargs):
         super(BlueprintsWrapper, self).__init__(*args, **kwargs)
@@ -313,6 +277,7 @@ class PartitionGraph(BlueprintsWrapper):
     :return: the used RexPro connection pool (with default session)
     :raises MogwaiBlueprintsWrapperException: if no write partition is provided
     """
+    pool_name = 'partition'
 
     def __init__(self, write=None, read=None, *args, **kwargs):
         if not write: # pragma: no cover
@@ -320,4 +285,50 @@ class PartitionGraph(BlueprintsWrapper):
         read = read or []
         super(PartitionGraph, self).__init__('PartitionGraph', *args, **kwargs)
         self.g_assignment = "g = new PartitionGraph(g, '_partition', '{}')".format(write)
-        self.setup = ["g.addReadPartition('{}')".format(rp) for rp in read]
\ No newline at end of file
+        self.setup = ["g.addReadPartition('{}')".format(rp) for rp in read]
+
+
+def _build_factory_class():
+    """ Builds the Factory base class, factory-boy is only imported when it is used """
+    from factory import base
+
+    class Factory(base.Factory):
+        """Factory for Mogwai models. """
+
+        ABSTRACT_FACTORY = True
+
+        _associated_model = None
+
+        @classmethod
+        def _load_target_class(cls, class_definition):
+            """ So we can support potential circular import problems, by using normal import_string import
+            specification.
+            """
+            associated_class = super(Factory, cls)._load_target_class(class_definition)
+
+            if isinstance(associated_class, string_types) and '.' in associated_class:
+                if cls._associated_model is None:
+                    cls._associated_model = import_string(associated_class)
+                    cls._associated_model.FACTORY_CLASS = cls
+                return cls._associated_model
+
+            if associated_class and associated_class.FACTORY_CLASS is None:
+                associated_class.FACTORY_CLASS = cls
+
+            return associated_class
+
+        @classmethod
+        def _create(cls, target_class, *args, **kwargs):
+            """Create an instance of the model, and save it to the database."""
+            from mogwai.models import Edge
+            if issubclass(target_class.__class__, Edge):
+                assert ('outV' in kwargs and 'inV' in kwargs), "Edges require in and out Vertices"
+                obj = target_class.create(outV=kwargs.get('outV'), inV=kwargs.get('inV'), *args, **kwargs)
+            else:
+                obj = target_class.create(*args, **kwargs)
+            return obj
+
+    return Factory
+
+
+lazy_attributes(globals(), {'Factory': _build_factory_class})